@@ -1,4 +1,5 @@
 import asyncio
+import hashlib
 import json
 import time
 from typing import Any, Callable, Dict, List, Optional
@@ -6,13 +7,26 @@ from typing import Any, Callable, Dict, List, Optional
 from pydantic import Field
 
 from app.agent.mcp import MCPAgent
+from app.cache.query_cache import (
+    QueryCache,
+    QueryCacheEntry,
+    QueryCacheMatch,
+    get_query_cache,
+    schema_fingerprint,
+)
+from app.config import config
 from app.llm import LLM
+from app.llm_router import StepType
 from app.logger import logger
 from app.prompt.database_query import (
+    DATABASE_QUERY_ANSWER_PROMPT,
+    DATABASE_QUERY_FAST_PATH_PROMPT,
     DATABASE_QUERY_NEXT_STEP,
     DATABASE_QUERY_SYSTEM_PROMPT,
 )
-from app.schema import AgentState
+from app.retry import query_budget
+from app.schema import AgentState, Message
+from app.sql import is_read_only_sql
 
 
 class EnhancedDatabaseQueryAgent(MCPAgent):
@@ -41,6 +55,36 @@ class EnhancedDatabaseQueryAgent(MCPAgent):
     # 查询状态追踪
     query_results: Optional[str] = None
     max_retries: int = Field(default=3, description="最大重试次数")
+    executed_sqls: List[str] = Field(
+        default_factory=list, description="本轮查询中成功执行的只读 SQL"
+    )
+    sql_results: List[str] = Field(
+        default_factory=list, description="与 executed_sqls 对应的查询结果"
+    )
+
+    # 语义查询缓存（进程内共享，未启用时为 None）
+    query_cache: Optional[QueryCache] = Field(default_factory=get_query_cache)
+    answer_context_chars: int = Field(
+        default=8000, description="生成回答时每条 SQL 结果保留的最大字符数"
+    )
+
+    # 快速路径：简单问题一次结构化调用生成 SQL，失败时回退到完整 ReAct 流程
+    fast_path: bool = Field(
+        default_factory=lambda: config.agent_config.fast_path,
+        description="是否启用单次调用快速路径",
+    )
+    fast_path_schema_chars: int = Field(
+        default=12000, description="快速路径提示词中表结构的最大字符数"
+    )
+    fast_path_history_messages: int = Field(
+        default=6, description="快速路径提示词中保留的历史对话条数"
+    )
+
+    # 流式输出：将 LLM 生成中的增量内容实时推送给状态回调
+    stream_responses: bool = Field(
+        default_factory=lambda: config.agent_config.stream_responses,
+        description="是否流式转发 LLM 增量输出",
+    )
 
     # 加载策略配置
     metadata_injected: bool = Field(default=False, description="元数据是否已注入")
@@ -71,7 +115,7 @@ class EnhancedDatabaseQueryAgent(MCPAgent):
             status_callback: 状态回调函数
         """
         self._status_callback = status_callback
-        self._report_status("🔌 正在连接MCP服务器...")
+        await self._report_status("🔌 正在连接MCP服务器...")
 
         await super().initialize(
             connection_type=connection_type,
@@ -87,7 +131,7 @@ class EnhancedDatabaseQueryAgent(MCPAgent):
         self.loading_strategy = loading_strategy
 
         # 预加载基础元数据
-        self._report_status("📊 正在预加载数据库元数据...")
+        await self._report_status("📊 正在预加载数据库元数据...")
         await self._preload_basic_metadata()
 
         # 配置元数据策略
@@ -115,13 +159,35 @@ class EnhancedDatabaseQueryAgent(MCPAgent):
                     await self._status_callback(payload)
                 else:
                     self._status_callback(payload)
-        logger.info(f"[{type}] {message}")
+        if type == "delta":
+            # 流式增量过于频繁，仅在调试级别记录
+            logger.debug(f"[{type}] {message}")
+        else:
+            logger.info(f"[{type}] {message}")
 
     async def think(self) -> bool:
         """决定下一步操作"""
         await self._report_status("🤔 正在思考下一步操作...", type="thought")
         return await super().think()
 
+    def _should_stream(self) -> bool:
+        """仅在有状态回调（如 WebSocket）时流式请求 LLM"""
+        return self.stream_responses and self._status_callback is not None
+
+    async def _on_llm_delta(self, delta: dict) -> None:
+        """将 LLM 的内容增量和工具调用参数增量转发给前端"""
+        if delta["type"] == "content":
+            await self._report_status(
+                delta["content"],
+                type="delta",
+                data={"kind": "content", "step": self.current_step},
+            )
+        elif delta["type"] == "tool_call":
+            data = {"kind": "tool_call", "step": self.current_step, "index": delta["index"]}
+            if delta.get("name"):
+                data["tool"] = delta["name"]
+            await self._report_status(delta["arguments"], type="delta", data=data)
+
     async def _handle_special_tool(self, name: str, result: Any, **kwargs) -> None:
         """处理特殊工具调用并报告状态"""
         tool_input = kwargs.get("tool_input", {})
@@ -141,6 +207,7 @@ class EnhancedDatabaseQueryAgent(MCPAgent):
         elif "execute_sql" in name:
             # 修正：工具实际使用的参数名是 query 而不是 sql
             sql = tool_input.get("query", "")
+            self._record_sql(sql, result)
             await self._report_status(
                 "⚡ 正在执行SQL查询...",
                 type="tool_call",
@@ -161,9 +228,251 @@ class EnhancedDatabaseQueryAgent(MCPAgent):
 
         await super()._handle_special_tool(name, result, **kwargs)
 
+    def _classify_step(self) -> StepType:
+        """根据本轮最近一次工具调用判断下一步的类型，供模型路由使用"""
+        for msg in reversed(self.messages):
+            if msg.role == "user":
+                break
+            if msg.role != "tool" or not msg.name:
+                continue
+            if "execute_sql" in msg.name:
+                # SQL 执行成功后通常只需组织回答，失败则需要修正 SQL
+                output = (msg.content or "").split("\n", 1)[-1]
+                if self._is_sql_success(output):
+                    return StepType.ANSWER_SYNTHESIS
+                return StepType.SQL_GENERATION
+            # 查看表结构之后的下一步通常是编写 SQL
+            return StepType.SQL_GENERATION
+
+        # 本轮尚无工具调用：已缓存表结构时可直接写 SQL，否则先探索表结构
+        if self.metadata_cache.get("schemas"):
+            return StepType.SQL_GENERATION
+        return StepType.EXPLORATION
+
+    def _record_sql(self, sql: str, result: Any) -> None:
+        """记录成功执行的只读 SQL 及其结果"""
+        if not sql or not is_read_only_sql(sql) or getattr(result, "error", None):
+            return
+        output = result.output if hasattr(result, "output") else str(result)
+        if not self._is_sql_success(output):
+            return
+        self.executed_sqls.append(sql)
+        self.sql_results.append(output)
+
+    @staticmethod
+    def _is_sql_success(output: Optional[str]) -> bool:
+        """判断 execute_sql 的输出是否为成功结果"""
+        if not output:
+            return False
+        try:
+            payload = json.loads(output)
+        except (TypeError, ValueError):
+            return False
+        return isinstance(payload, dict) and "error" not in payload
+
+    def _schema_version(self) -> str:
+        """当前表结构版本（用于隔离不同 schema 下的缓存）"""
+        return schema_fingerprint(self.metadata_cache.get("tables", {}))
+
+    @staticmethod
+    def _digest_results(outputs: List[str]) -> str:
+        return hashlib.sha1("\n".join(outputs).encode("utf-8")).hexdigest()
+
+    async def _phrase_answer(
+        self,
+        question: str,
+        sqls: List[str],
+        outputs: List[str],
+        template: str = "",
+    ) -> str:
+        """基于已执行 SQL 的结果，用一次 LLM 调用生成自然语言回答"""
+        results_text = "\n\n".join(
+            f"SQL: {sql}\n结果: {output[: self.answer_context_chars]}"
+            for sql, output in zip(sqls, outputs)
+        )
+        prompt = DATABASE_QUERY_ANSWER_PROMPT.format(
+            question=question, results=results_text, template=template or "无"
+        )
+        llm = self._llm_for(StepType.ANSWER_SYNTHESIS)
+        return await llm.ask([Message.user_message(prompt)], stream=False)
+
+    async def _answer_from_cache(self, request: str, match: QueryCacheMatch) -> Optional[str]:
+        """通过查询缓存的精确命中回答：重新执行缓存的 SQL 获取最新数据，跳过规划步骤
+
+        近似命中不在此处作答（措辞相近的问题可能含义相反），由快速路径作为参考使用。
+        """
+        start_time = time.time()
+        entry = match.entry
+        await self._report_status(
+            "⚡ 命中查询缓存，正在获取最新数据...",
+            data={"sql": entry.sqls[-1]},
+        )
+
+        outputs = []
+        for sql in entry.sqls:
+            try:
+                output = await self._execute_mcp_tool("execute_sql", {"query": sql})
+            except Exception as e:
+                logger.warning(f"Cached SQL failed to execute: {e}")
+                output = None
+            if not self._is_sql_success(output):
+                logger.info(f"Invalidating query cache entry for: {entry.question}")
+                self.query_cache.invalidate(entry)
+                return None
+            outputs.append(output)
+
+        if self._digest_results(outputs) == entry.result_digest:
+            answer = entry.answer
+        else:
+            answer = await self._phrase_answer(request, entry.sqls, outputs, entry.answer)
+
+        self.executed_sqls = list(entry.sqls)
+        self.sql_results = outputs
+        self.query_cache.record_hit(entry, time.time() - start_time)
+        logger.info(self.query_cache.report())
+        return answer
+
+    def _build_schema_context(self) -> str:
+        """基于已缓存的元数据构建紧凑的表结构描述"""
+        tables = self.metadata_cache.get("tables", {}).get("data", [])
+        schemas = self.metadata_cache.get("schemas", {})
+        lines = []
+        for table in tables:
+            table_name = table.get("name")
+            if not table_name:
+                continue
+            schema = (schemas.get(table_name) or {}).get("data") or {}
+            # 兼容 {"data": {...}} 与 MCP 服务器直接返回的结构
+            schema = schema.get("data", schema) if isinstance(schema, dict) else {}
+            columns = schema.get("columns") or table.get("keyColumns", [])
+            column_text = ", ".join(
+                f"{col.get('name')} {col.get('type', '')}".strip()
+                + (f" -- {col['comment']}" if col.get("comment") else "")
+                for col in columns
+            )
+            comment = table.get("comment") or ""
+            lines.append(f"- {table_name}({column_text})" + (f"  # {comment}" if comment else ""))
+        return "\n".join(lines)[: self.fast_path_schema_chars]
+
+    def _build_history_context(self) -> str:
+        """提取最近的用户/助手对话，供快速路径理解追问"""
+        history = [
+            f"{message.role}: {message.content}"
+            for message in self.messages
+            if message.role in ("user", "assistant")
+            and message.content
+            and not message.tool_calls
+        ]
+        return "\n".join(history[-self.fast_path_history_messages :]) or "无"
+
+    @staticmethod
+    def _parse_fast_path_plan(raw: str) -> Optional[dict]:
+        """解析快速路径返回的 JSON（容忍代码块包裹）"""
+        import re
+
+        match = re.search(r"\{[\s\S]*\}", raw or "")
+        if not match:
+            return None
+        try:
+            plan = json.loads(match.group(0))
+        except ValueError:
+            return None
+        return plan if isinstance(plan, dict) else None
+
+    @staticmethod
+    def _format_reference(entry: Optional[QueryCacheEntry]) -> str:
+        if not entry:
+            return "无"
+        sqls = "\n".join(entry.sqls)
+        return f"历史问题: {entry.question}\nSQL:\n{sqls}"
+
+    async def _run_fast_path(
+        self, request: str, reference: Optional[QueryCacheEntry] = None
+    ) -> Optional[str]:
+        """快速路径：一次结构化调用生成 SQL，执行后再调用一次生成回答
+
+        reference 为查询缓存中措辞相近的历史问题，其 SQL 仅作为生成时的参考。
+        返回 None 表示快速路径不适用或失败，调用方应回退到完整的 ReAct 流程。
+        """
+        schema_context = self._build_schema_context()
+        if not schema_context:
+            return None
+
+        prompt = DATABASE_QUERY_FAST_PATH_PROMPT.format(
+            schema=schema_context,
+            history=self._build_history_context(),
+            question=request,
+            reference=self._format_reference(reference),
+        )
+        try:
+            raw = await self._llm_for(StepType.SQL_GENERATION).ask(
+                [Message.user_message(prompt)], stream=False, temperature=0
+            )
+        except Exception as e:
+            logger.warning(f"Fast path planning failed, falling back: {e}")
+            return None
+
+        plan = self._parse_fast_path_plan(raw)
+        if not plan or not plan.get("answerable"):
+            logger.info("Fast path declined, falling back to full agent loop")
+            return None
+
+        sql = (plan.get("sql") or "").strip()
+        if not is_read_only_sql(sql):
+            logger.warning(f"Fast path produced non read-only SQL, falling back: {sql}")
+            return None
+
+        await self._report_status(
+            "⚡ 正在执行SQL查询...",
+            type="tool_call",
+            data={"tool": "execute_sql", "input": {"query": sql}, "sql": sql},
+        )
+        try:
+            output = await self._execute_mcp_tool("execute_sql", {"query": sql})
+        except Exception as e:
+            logger.warning(f"Fast path SQL failed, falling back: {e}")
+            return None
+        if not self._is_sql_success(output):
+            logger.info(f"Fast path SQL returned an error, falling back: {output}")
+            return None
+
+        self.executed_sqls.append(sql)
+        self.sql_results.append(output)
+        return await self._phrase_answer(
+            request, [sql], [output], plan.get("answer_template", "")
+        )
+
+    def _store_in_cache(self, request: str, answer: str, elapsed: float) -> None:
+        """将本轮查询的 SQL 与最终回答写入查询缓存"""
+        if not self.query_cache or not self.executed_sqls or not answer:
+            return
+        self.query_cache.store(
+            question=request,
+            schema_version=self._schema_version(),
+            sqls=list(self.executed_sqls),
+            answer=answer,
+            result_digest=self._digest_results(self.sql_results),
+            elapsed=elapsed,
+        )
+
+    def _fork_state(self) -> Dict[str, Any]:
+        """分叉出的会话共享已加载的元数据目录，无需重新加载表结构"""
+        return {
+            "metadata_cache": self.metadata_cache,
+            "last_cache_update": self.last_cache_update,
+            "metadata_injected": self.metadata_injected,
+            "loading_strategy": self.loading_strategy,
+            "query_cache": self.query_cache,
+            "fast_path": self.fast_path,
+            "stream_responses": self.stream_responses,
+        }
+
     async def reset(self):
         """重置代理状态（保留连接）"""
         self.query_results = None
+        self.executed_sqls = []
+        self.sql_results = []
+        self.result_store.clear()
         self.messages = []
 
     async def _preload_basic_metadata(self):
@@ -188,10 +497,10 @@ class EnhancedDatabaseQueryAgent(MCPAgent):
             self.last_cache_update = current_time
 
             table_count = len(tables_data.get("data", []))
-            self._report_status(f"📋 发现 {table_count} 个数据表")
+            await self._report_status(f"📋 发现 {table_count} 个数据表")
         except Exception as e:
             logger.warning(f"Failed to preload basic metadata: {e}")
-            self._report_status(f"⚠️ 元数据预加载失败: {e}")
+            await self._report_status(f"⚠️ 元数据预加载失败: {e}")
 
     async def _inject_metadata_with_strategy(self):
         """根据策略注入元数据到系统提示词"""
@@ -214,7 +523,7 @@ class EnhancedDatabaseQueryAgent(MCPAgent):
             else:
                 strategy = self.loading_strategy
 
-            self._report_status(f"📝 使用加载策略: {strategy}")
+            await self._report_status(f"📝 使用加载策略: {strategy}")
 
             if strategy == "full":
                 await self._inject_full_metadata(tables_data)
@@ -225,12 +534,12 @@ class EnhancedDatabaseQueryAgent(MCPAgent):
 
         except Exception as e:
             logger.error(f"Failed to inject metadata: {e}", exc_info=True)
-            self._report_status(f"❌ 元数据注入失败: {e}")
+            await self._report_status(f"❌ 元数据注入失败: {e}")
 
     async def _inject_full_metadata(self, tables_data: dict):
         """注入完整元数据（包含所有表结构）"""
         table_count = len(tables_data["data"])
-        self._report_status(f"📥 正在加载 {table_count} 个表的完整结构...")
+        await self._report_status(f"📥 正在加载 {table_count} 个表的完整结构...")
 
         metadata_text = "\n\n## 📊 数据库结构信息 (完整)\n\n"
 
@@ -283,12 +592,12 @@ class EnhancedDatabaseQueryAgent(MCPAgent):
             metadata_text += "\n"
 
         self.system_prompt = self.system_prompt + metadata_text
-        self._report_status("✅ 完整元数据已注入")
+        await self._report_status("✅ 完整元数据已注入")
 
     async def _inject_relationship_metadata(self, tables_data: dict):
         """注入关系元数据（仅包含表名和关系，按需加载详情）"""
         table_count = len(tables_data["data"])
-        self._report_status(f"🔗 正在加载 {table_count} 个表的关系信息...")
+        await self._report_status(f"🔗 正在加载 {table_count} 个表的关系信息...")
 
         metadata_text = "\n\n## 📊 数据库关系信息 (按需加载)\n\n"
         metadata_text += "以下是表列表及其关系。详细结构将按需加载。\n\n"
@@ -334,7 +643,7 @@ class EnhancedDatabaseQueryAgent(MCPAgent):
             metadata_text += "\n"
 
         self.system_prompt = self.system_prompt + metadata_text
-        self._report_status("✅ 关系元数据已注入")
+        await self._report_status("✅ 关系元数据已注入")
 
     async def _parallel_load_schemas(self, table_names: List[str]) -> Dict[str, dict]:
         """并行加载多个表的结构"""
@@ -370,6 +679,11 @@ class EnhancedDatabaseQueryAgent(MCPAgent):
                     "get_table_schema", {"table": table_name}
                 )
                 schema = json.loads(result)
+                # 结构已经取回，顺便缓存以供快速路径使用
+                self.metadata_cache.setdefault("schemas", {})[table_name] = {
+                    "data": schema,
+                    "cached_at": time.time(),
+                }
 
                 relationships = []
                 if "data" in schema:
@@ -409,11 +723,51 @@ class EnhancedDatabaseQueryAgent(MCPAgent):
         if status_callback:
             self._status_callback = status_callback
 
+        # 缓存、快速路径与完整流程中的所有 LLM 调用共享同一 LLM 耗时预算（不含工具调用与排队时间）
+        with query_budget():
+            return await self._run_query(request, **kwargs)
+
+    async def _run_query(self, request: Optional[str] = None, **kwargs) -> str:
+        """处理一次查询：查询缓存 → 快速路径 → 完整 ReAct 流程"""
+        start_time = time.time()
+        # 仅在没有上下文的新问题上使用查询缓存，避免指代类追问命中错误答案
+        fresh_context = bool(request) and not any(
+            message.role == "user" for message in self.messages
+        )
+
         if self.state == AgentState.IDLE and self.current_step == 0:
             self.query_results = None
-            # Refresh LLM instance to pick up any global config changes
+            self.executed_sqls = []
+            self.sql_results = []
+            # Shared default LLM; settings reloads are applied to it in place
             self.llm = LLM()
-            self._report_status("🤔 正在分析您的问题...")
+            await self._report_status("🤔 正在分析您的问题...")
+
+            reference = None
+            if fresh_context and self.query_cache:
+                match = self.query_cache.lookup(request, self._schema_version())
+                if match and match.exact:
+                    cached_answer = await self._answer_from_cache(request, match)
+                    if cached_answer:
+                        self.update_memory("user", request)
+                        self.update_memory("assistant", cached_answer)
+                        return cached_answer
+                elif match:
+                    reference = match.entry
+
+            if request and self.fast_path:
+                fast_answer = await self._run_fast_path(request, reference)
+                if fast_answer:
+                    self.update_memory("user", request)
+                    self.update_memory("assistant", fast_answer)
+                    if fresh_context:
+                        self._store_in_cache(
+                            request, fast_answer, time.time() - start_time
+                        )
+                    return fast_answer
+                # 回退到完整流程前丢弃快速路径的中间结果
+                self.executed_sqls = []
+                self.sql_results = []
 
         try:
             result = await super(MCPAgent, self).run(
@@ -426,6 +780,19 @@ class EnhancedDatabaseQueryAgent(MCPAgent):
         self.current_step = 0
         self.state = AgentState.IDLE
 
+        answer = self._extract_final_answer(result)
+
+        if (
+            fresh_context
+            and "Terminated: Reached max steps" not in result
+            and "Thinking complete - no action needed" not in result
+        ):
+            self._store_in_cache(request, answer, time.time() - start_time)
+
+        return answer
+
+    def _extract_final_answer(self, result: str) -> str:
+        """从消息历史或执行结果中提取最终回答"""
         # 尝试从消息历史中获取最后的助手回复
         import re
 
@@ -498,5 +865,5 @@ class EnhancedDatabaseQueryAgent(MCPAgent):
 
     async def cleanup(self) -> None:
         """清理资源"""
-        self._report_status("🧹 正在清理资源...")
+        await self._report_status("🧹 正在清理资源...")
         await super().cleanup()
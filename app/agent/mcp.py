@@ -9,6 +9,7 @@ from app.schema import AgentState, Message
 from app.tool.base import ToolResult
 from app.tool.mcp import MCPClients
 from app.tool import Terminate, ToolCollection
+from app.tool.fetch_result import FetchResult
 
 
 class MCPAgent(ToolCallAgent):
@@ -30,10 +31,13 @@ class MCPAgent(ToolCallAgent):
 
     max_steps: int = 20
     connection_type: str = "stdio"  # "stdio" or "sse"
+    # Forks share the MCP sessions of the agent they came from and must not close them
+    owns_connection: bool = True
 
     # Track tool schemas to detect changes
     tool_schemas: Dict[str, Dict[str, Any]] = Field(default_factory=dict)
     _refresh_tools_interval: int = 5  # Refresh tools every N steps
+    _tools_version: Optional[int] = None  # mcp_clients version available_tools was built from
 
     # Special tool names that should trigger termination
     special_tool_names: List[str] = Field(default_factory=lambda: ["terminate"])
@@ -69,14 +73,15 @@ class MCPAgent(ToolCallAgent):
             raise ValueError(f"Unsupported connection type: {self.connection_type}")
 
         # Create a combined tool collection with both base tools and MCP tools
-        base_tools = ToolCollection(Terminate())
-        self.available_tools = ToolCollection(*(base_tools.tools + self.mcp_clients.tools))
+        self._build_available_tools()
 
         # Store initial tool schemas
         await self._refresh_tools()
 
         # Add system message about available tools
-        tool_names = list(self.mcp_clients.tool_map.keys()) + ["terminate"]
+        tool_names = list(self.mcp_clients.tool_map.keys()) + [
+            tool.name for tool in self._base_tools()
+        ]
         tools_info = ", ".join(tool_names)
 
         # Add system prompt and available tools information
@@ -86,6 +91,40 @@ class MCPAgent(ToolCallAgent):
             )
         )
 
+    def fork(self) -> "MCPAgent":
+        """Create an independent agent session on the same MCP connections.
+
+        The fork has its own memory, state and result store, but shares the
+        connected MCP clients (and whatever ``_fork_state`` adds) with this
+        agent. It never disconnects them; the original agent owns them.
+        """
+        agent = self.__class__(
+            llm=self.llm,
+            system_prompt=self.system_prompt,
+            next_step_prompt=self.next_step_prompt,
+            max_steps=self.max_steps,
+            mcp_clients=self.mcp_clients,
+            connection_type=self.connection_type,
+            tool_schemas=dict(self.tool_schemas),
+            owns_connection=False,
+            **self._fork_state(),
+        )
+        agent._build_available_tools()
+        return agent
+
+    def _fork_state(self) -> Dict[str, Any]:
+        """Extra fields a fork shares with or copies from this agent"""
+        return {}
+
+    def _base_tools(self) -> List[Any]:
+        """Local tools offered alongside the MCP server's tools"""
+        return [Terminate(), FetchResult(store=self.result_store)]
+
+    def _build_available_tools(self) -> None:
+        """Combine the base tools with the connected MCP servers' tools"""
+        self.available_tools = ToolCollection(*(self._base_tools() + list(self.mcp_clients.tools)))
+        self._tools_version = self.mcp_clients.version
+
     async def _refresh_tools(self) -> Tuple[List[str], List[str]]:
         """Refresh the list of available tools from the MCP server.
 
@@ -99,10 +138,6 @@ class MCPAgent(ToolCallAgent):
         response = await self.mcp_clients.list_tools()
         current_tools = {tool.name: tool.inputSchema for tool in response.tools}
 
-        # Rebuild available_tools to include both base tools and MCP tools
-        base_tools = ToolCollection(Terminate())
-        self.available_tools = ToolCollection(*(base_tools.tools + self.mcp_clients.tools))
-
         # Determine added, removed, and changed tools
         current_names = set(current_tools.keys())
         previous_names = set(self.tool_schemas.keys())
@@ -119,6 +154,16 @@ class MCPAgent(ToolCallAgent):
         # Update stored schemas
         self.tool_schemas = current_tools
 
+        # Rebuild available_tools only when the tool set changed, so memoized
+        # tool params and their token cost survive across steps
+        if (
+            added_tools
+            or removed_tools
+            or changed_tools
+            or self._tools_version != self.mcp_clients.version
+        ):
+            self._build_available_tools()
+
         # Log and notify about changes
         if added_tools:
             logger.info(f"Added MCP tools: {added_tools}")
@@ -177,7 +222,7 @@ class MCPAgent(ToolCallAgent):
 
     async def cleanup(self) -> None:
         """Clean up MCP connection when done."""
-        if self.mcp_clients.sessions:
+        if self.owns_connection and self.mcp_clients.sessions:
             await self.mcp_clients.disconnect()
             logger.info("MCP connection closed")
 
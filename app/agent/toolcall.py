@@ -1,15 +1,32 @@
 import asyncio
 import json
-from typing import Any, List, Optional, Union
+import time
+from typing import Any, Dict, List, Optional, Union
 
-from pydantic import Field
+from openai.types.chat import ChatCompletionMessage
+from pydantic import Field, PrivateAttr
 
 from app.agent.react import ReActAgent
+from app.config import config
 from app.exceptions import TokenLimitExceeded
+from app.llm import LLM
+from app.llm_router import ModelRouter, StepType, get_model_router
 from app.logger import logger
-from app.prompt.toolcall import NEXT_STEP_PROMPT, SYSTEM_PROMPT
-from app.schema import TOOL_CHOICE_TYPE, AgentState, Message, ToolCall, ToolChoice
+from app.prompt.toolcall import (
+    NEXT_STEP_PROMPT,
+    SUMMARIZE_HISTORY_PROMPT,
+    SYSTEM_PROMPT,
+)
+from app.schema import (
+    TOOL_CHOICE_TYPE,
+    AgentState,
+    Message,
+    Role,
+    ToolCall,
+    ToolChoice,
+)
 from app.tool import CreateChatCompletion, Terminate, ToolCollection
+from app.tool.result_store import ResultStore, build_digest
 
 
 TOOL_CALL_REQUIRED = "Tool calls required but none provided"
@@ -31,21 +48,54 @@ class ToolCallAgent(ReActAgent):
     special_tool_names: List[str] = Field(default_factory=lambda: [Terminate().name])
 
     tool_calls: List[ToolCall] = Field(default_factory=list)
-    _current_base64_image: Optional[str] = None
+    # base64 images produced by tool calls, keyed by tool call id
+    _tool_call_images: Dict[str, str] = PrivateAttr(default_factory=dict)
 
     max_steps: int = 30
     max_observe: Optional[Union[int, bool]] = None
+    max_concurrent_tools: int = Field(
+        default_factory=lambda: config.agent_config.max_concurrent_tools,
+        description="Maximum number of parallel-safe tool calls to run at once",
+    )
+
+    # Large tool results are replaced by a digest and kept out of band
+    observation_token_budget: int = Field(
+        default_factory=lambda: config.agent_config.observation_token_budget,
+        description="Token size above which tool output is compacted (0 disables)",
+    )
+    result_store: ResultStore = Field(default_factory=ResultStore, exclude=True)
+
+    # Picks a model per step type when [model_routing] is enabled
+    model_router: ModelRouter = Field(default_factory=get_model_router, exclude=True)
+
+    # History sent to the LLM is kept under a token budget
+    memory_token_budget: int = Field(
+        default_factory=lambda: config.agent_config.memory_token_budget,
+        description="Token budget for the conversation history (0 disables compaction)",
+    )
+    memory_keep_recent: int = Field(
+        default_factory=lambda: config.agent_config.memory_keep_recent,
+        description="Most recent message groups that are never compacted",
+    )
+    summarize_history: bool = Field(
+        default_factory=lambda: config.agent_config.summarize_history,
+        description="Summarize dropped history instead of discarding it",
+    )
 
     async def think(self) -> bool:
         """Process current state and decide next actions using tools"""
+        await self._compact_memory()
+
+        # The next-step prompt is sent with each request but not stored, so it
+        # does not pile up in the history once per step
+        messages = self.messages
         if self.next_step_prompt:
-            user_msg = Message.user_message(self.next_step_prompt)
-            self.messages += [user_msg]
+            messages = messages + [Message.user_message(self.next_step_prompt)]
 
         try:
             # Get response with tool options
-            response = await self.llm.ask_tool(
-                messages=self.messages,
+            response = await self._ask_llm(
+                messages=messages,
                 system_msgs=(
                     [Message.system_message(self.system_prompt)]
                     if self.system_prompt
@@ -53,15 +103,20 @@ class ToolCallAgent(ReActAgent):
                 ),
                 tools=self.available_tools.to_params(),
                 tool_choice=self.tool_choices,
+                tools_tokens=self.available_tools.params_tokens(self.llm.count_tokens),
             )
         except ValueError:
             raise
         except Exception as e:
-            # Check if this is a RetryError containing TokenLimitExceeded
-            if hasattr(e, "__cause__") and isinstance(e.__cause__, TokenLimitExceeded):
-                token_limit_error = e.__cause__
+            # Check if this is (or was caused by) TokenLimitExceeded
+            if isinstance(e, TokenLimitExceeded) or isinstance(
+                getattr(e, "__cause__", None), TokenLimitExceeded
+            ):
+                token_limit_error = (
+                    e if isinstance(e, TokenLimitExceeded) else e.__cause__
+                )
                 logger.error(
-                    f"🚨 Token limit error (from RetryError): {token_limit_error}"
+                    f"🚨 Token limit error: {token_limit_error}"
                 )
                 self.memory.add_message(
                     Message.assistant_message(
@@ -128,6 +183,76 @@ class ToolCallAgent(ReActAgent):
             )
             return False
 
+    def _should_stream(self) -> bool:
+        """Whether LLM responses should be streamed to ``_on_llm_delta``"""
+        return False
+
+    async def _on_llm_delta(self, delta: dict) -> None:
+        """Receive a content or tool-call delta while a response is streamed"""
+
+    def _classify_step(self) -> StepType:
+        """Classify the upcoming step so the router can pick a model for it"""
+        return StepType.DEFAULT
+
+    def _llm_for(self, step_type: StepType) -> LLM:
+        """LLM to use for a step of the given type (the agent's own by default)"""
+        return self.model_router.select(step_type, self.llm)
+
+    async def _ask_llm(self, **request) -> Optional[ChatCompletionMessage]:
+        """Request the next response, streaming deltas when enabled"""
+        llm = self._llm_for(self._classify_step())
+        start = time.monotonic()
+        if not self._should_stream():
+            response = await llm.ask_tool(**request)
+        else:
+            response = None
+            async for event in llm.ask_tool_stream(**request):
+                if event["type"] == "message":
+                    response = event["message"]
+                else:
+                    await self._on_llm_delta(event)
+        self.model_router.observe(llm.config_name, time.monotonic() - start)
+        return response
+
+    async def _compact_memory(self) -> None:
+        """Keep the stored history within the memory token budget"""
+        if not self.memory_token_budget:
+            return
+
+        dropped = self.memory.compact(
+            self.memory_token_budget,
+            # Shares the per-message costs cached when requests are counted
+            self.llm.token_counter.count_message_tokens,
+            keep_recent=self.memory_keep_recent,
+        )
+        if not dropped:
+            return
+
+        logger.info(f"🧹 Compacted conversation memory, dropped {len(dropped)} messages")
+        if self.summarize_history:
+            summary = await self._summarize_messages(dropped)
+            if summary:
+                self.memory.insert_summary(summary)
+
+    async def _summarize_messages(self, messages: List[Message]) -> Optional[str]:
+        """Condense dropped messages into a short summary, or None on failure"""
+        history = "\n".join(
+            f"{msg.role}: {msg.content}"
+            for msg in messages
+            if msg.content and msg.role != "tool"
+        )
+        if not history:
+            return None
+        try:
+            summary = await self.llm.ask(
+                [Message.user_message(SUMMARIZE_HISTORY_PROMPT.format(history=history))],
+                stream=False,
+            )
+        except Exception as e:
+            logger.warning(f"Failed to summarize compacted history: {e}")
+            return None
+        return f"Summary of earlier conversation:\n{summary}" if summary else None
+
     async def act(self) -> str:
         """Execute tool calls and handle their results"""
         if not self.tool_calls:
@@ -138,31 +263,98 @@ class ToolCallAgent(ReActAgent):
             return self.messages[-1].content or "No content or commands to execute"
 
         results = []
-        for command in self.tool_calls:
-            # Reset base64_image for each tool call
-            self._current_base64_image = None
+        for batch in self._plan_tool_batches(self.tool_calls):
+            batch_results = await self._execute_tool_batch(batch)
 
-            result = await self.execute_tool(command)
+            # Tool messages are appended in the original call order so the
+            # history stays valid for the tool-call protocol
+            for command, result in zip(batch, batch_results):
+                if self.max_observe:
+                    result = result[: self.max_observe]
 
-            if self.max_observe:
-                result = result[: self.max_observe]
-
-            logger.info(
-                f"🎯 Tool '{command.function.name}' completed its mission! Result: {result}"
-            )
+                logger.info(
+                    f"🎯 Tool '{command.function.name}' completed its mission! Result: {result}"
+                )
 
-            # Add tool response to memory
-            tool_msg = Message.tool_message(
-                content=result,
-                tool_call_id=command.id,
-                name=command.function.name,
-                base64_image=self._current_base64_image,
-            )
-            self.memory.add_message(tool_msg)
-            results.append(result)
+                # Add tool response to memory
+                tool_msg = Message.tool_message(
+                    content=result,
+                    tool_call_id=command.id,
+                    name=command.function.name,
+                    base64_image=self._tool_call_images.pop(command.id, None),
+                )
+                self.memory.add_message(tool_msg)
+                results.append(result)
 
         return "\n\n".join(results)
 
+    def _close_pending_tool_calls(self) -> None:
+        """Answer tool calls that a cancelled run left without results.
+
+        Providers reject a history in which an assistant tool call is not
+        followed by its tool result, which would break the next request.
+        """
+        messages = self.memory.messages
+        answered = set()
+        for message in reversed(messages):
+            if message.role == Role.TOOL:
+                answered.add(message.tool_call_id)
+                continue
+            if message.role == Role.ASSISTANT and message.tool_calls:
+                for call in message.tool_calls:
+                    if call.id not in answered:
+                        self.memory.add_message(
+                            Message.tool_message(
+                                content="Cancelled before completion.",
+                                tool_call_id=call.id,
+                                name=call.function.name,
+                            )
+                        )
+            return
+
+    def _is_parallel_safe_call(self, command: ToolCall) -> bool:
+        """Check whether a tool call may run concurrently with its neighbours"""
+        if not command or not command.function:
+            return False
+        tool = self.available_tools.get_tool(command.function.name)
+        if not tool or self._is_special_tool(command.function.name):
+            return False
+        try:
+            args = json.loads(command.function.arguments or "{}")
+        except json.JSONDecodeError:
+            return False
+        return isinstance(args, dict) and tool.is_parallel_safe(**args)
+
+    def _plan_tool_batches(self, tool_calls: List[ToolCall]) -> List[List[ToolCall]]:
+        """Group consecutive parallel-safe calls; other calls run on their own"""
+        batches: List[List[ToolCall]] = []
+        current: List[ToolCall] = []
+        for command in tool_calls:
+            if self.max_concurrent_tools > 1 and self._is_parallel_safe_call(command):
+                current.append(command)
+                continue
+            if current:
+                batches.append(current)
+                current = []
+            batches.append([command])
+        if current:
+            batches.append(current)
+        return batches
+
+    async def _execute_tool_batch(self, batch: List[ToolCall]) -> List[str]:
+        """Execute a batch of tool calls, concurrently when there is more than one"""
+        if len(batch) == 1:
+            return [await self.execute_tool(batch[0])]
+
+        semaphore = asyncio.Semaphore(self.max_concurrent_tools)
+
+        async def run(command: ToolCall) -> str:
+            async with semaphore:
+                return await self.execute_tool(command)
+
+        logger.info(f"⚡ Running {len(batch)} tool calls concurrently")
+        return list(await asyncio.gather(*(run(command) for command in batch)))
+
     async def execute_tool(self, command: ToolCall) -> str:
         """Execute a single tool call with robust error handling"""
         if not command or not command.function or not command.function.name:
@@ -186,11 +378,11 @@ class ToolCallAgent(ReActAgent):
             # Check if result is a ToolResult with base64_image
             if hasattr(result, "base64_image") and result.base64_image:
                 # Store the base64_image for later use in tool_message
-                self._current_base64_image = result.base64_image
+                self._tool_call_images[command.id] = result.base64_image
 
             # Format result for display (standard case)
             observation = (
-                f"Observed output of cmd `{name}` executed:\n{str(result)}"
+                f"Observed output of cmd `{name}` executed:\n{self._compact_output(name, str(result))}"
                 if result
                 else f"Cmd `{name}` completed with no output"
             )
@@ -207,6 +399,24 @@ class ToolCallAgent(ReActAgent):
             logger.exception(error_msg)
             return f"Error: {error_msg}"
 
+    def _compact_output(self, name: str, output: str) -> str:
+        """Replace tool output above the token budget with a structured digest"""
+        budget = self.observation_token_budget
+        # Cheap length check first: BPE never yields more than ~3 tokens per character
+        if not budget or name == "fetch_result" or len(output) * 3 <= budget:
+            return output
+        if self.llm.count_tokens(output) <= budget:
+            return output
+
+        handle = self.result_store.put(output)
+        digest = build_digest(output, handle, text_chars=budget * 2)
+        logger.info(
+            f"🗜️ Compacted {len(output)} chars of '{name}' output into {len(digest)} chars (handle {handle})"
+        )
+        if "fetch_result" in self.available_tools.tool_map:
+            digest += f"\n(Full result stored as `{handle}`; use `fetch_result` to page through rows if needed.)"
+        return digest
+
     async def _handle_special_tool(self, name: str, result: Any, **kwargs):
         """Handle special tool execution and state changes"""
         if not self._is_special_tool(name):
@@ -254,6 +464,12 @@ class ToolCallAgent(ReActAgent):
         """
         try:
             return await super().run(request)
+        except asyncio.CancelledError:
+            # Leave the session usable for the next request
+            self._close_pending_tool_calls()
+            self.tool_calls = []
+            self.current_step = 0
+            raise
         finally:
             # Only cleanup if auto_cleanup is True
             if auto_cleanup:
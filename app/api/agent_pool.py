@@ -0,0 +1,264 @@
+"""Warm agent sessions for the websocket endpoint.
+
+Starting an agent means spawning the MCP server, listing its tools and loading
+the table catalog, which takes seconds on a large schema. The pool does that
+once per *generation*: a base agent owns the MCP connection and the catalog,
+and every websocket connection leases a fork of it (own memory and state,
+shared connection and catalog). Released sessions are reset and reused.
+
+A generation is replaced when the database configuration changes
+(``invalidate``) or when it is older than ``max_age``; the old one keeps
+serving its current leases and is closed when the last one is released.
+"""
+import asyncio
+import sys
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List, Optional
+
+from app.agent.enhanced_database_query import EnhancedDatabaseQueryAgent
+from app.config import AgentPoolSettings, config
+from app.logger import logger
+from app.schema import AgentState
+
+
+class _Generation:
+    """One MCP connection with its base agent and idle sessions."""
+
+    def __init__(self):
+        self.agent: Optional[EnhancedDatabaseQueryAgent] = None
+        self.idle: List[EnhancedDatabaseQueryAgent] = []
+        self.leases = 0
+        self.stale = False
+        self.created_at = time.monotonic()
+        self.stop = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+
+    @property
+    def healthy(self) -> bool:
+        return (
+            not self.stale
+            and self.agent is not None
+            and bool(self.agent.mcp_clients.sessions)
+            and not self.task.done()
+        )
+
+
+class AgentPool:
+    """Lease pre-initialized agent sessions sharing one MCP connection."""
+
+    def __init__(self, settings: Optional[AgentPoolSettings] = None):
+        self._settings = settings
+        self._current: Optional[_Generation] = None
+        self._generations: List[_Generation] = []
+        self._refresh: Optional[asyncio.Task] = None
+        self._lock: Optional[asyncio.Lock] = None
+
+    @property
+    def settings(self) -> AgentPoolSettings:
+        # Follow config reloads unless settings were given explicitly
+        return self._settings or config.agent_pool_config
+
+    def _get_lock(self) -> asyncio.Lock:
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    def _connect_args(self) -> dict:
+        settings = self.settings
+        return {
+            "connection_type": "stdio",
+            "command": settings.mcp_command or sys.executable,
+            "args": list(settings.mcp_args),
+            "loading_strategy": settings.loading_strategy,
+        }
+
+    async def _hold(self, generation: _Generation, ready: asyncio.Future) -> None:
+        """Own the generation's MCP connection until it is stopped.
+
+        The stdio client's cancel scopes must be exited by the task that
+        entered them, so connecting and disconnecting both happen here.
+        """
+        agent = EnhancedDatabaseQueryAgent()
+        try:
+            await agent.initialize(**self._connect_args())
+        except Exception as e:
+            if not ready.done():
+                ready.set_exception(e)
+            await agent.cleanup()
+            return
+        generation.agent = agent
+        if not ready.done():
+            ready.set_result(None)
+        try:
+            await generation.stop.wait()
+        finally:
+            await agent.cleanup()
+
+    async def _spawn(self) -> _Generation:
+        start = time.perf_counter()
+        generation = _Generation()
+        ready = asyncio.get_running_loop().create_future()
+        generation.task = asyncio.create_task(self._hold(generation, ready))
+        # Tracked while connecting so close() can stop it too
+        self._generations.append(generation)
+        try:
+            await ready
+        except BaseException:
+            self._retire(generation)
+            raise
+        generation.idle = [
+            generation.agent.fork() for _ in range(self.settings.warm_sessions)
+        ]
+        logger.info(
+            f"Agent pool: MCP connection ready in {time.perf_counter() - start:.2f}s, "
+            f"{len(generation.idle)} warm sessions"
+        )
+        return generation
+
+    def _retire(self, generation: _Generation) -> None:
+        generation.stale = True
+        generation.idle.clear()
+        if generation.leases == 0:
+            generation.stop.set()
+            if generation in self._generations:
+                self._generations.remove(generation)
+
+    async def _replace(self) -> None:
+        """Build a fresh generation in the background and swap it in."""
+        try:
+            generation = await self._spawn()
+        except Exception as e:
+            logger.warning(f"Agent pool: refresh failed, keeping current connection: {e}")
+            return
+        async with self._get_lock():
+            old, self._current = self._current, generation
+        if old is not None:
+            self._retire(old)
+
+    async def _generation(self) -> _Generation:
+        generation = self._current
+        if generation is not None and generation.healthy:
+            max_age = self.settings.max_age
+            expired = max_age and time.monotonic() - generation.created_at > max_age
+            if expired and (self._refresh is None or self._refresh.done()):
+                self._refresh = asyncio.create_task(self._replace())
+            return generation
+
+        async with self._get_lock():
+            if self._current is generation:
+                if generation is not None:
+                    self._retire(generation)
+                self._current = None
+                self._current = await self._spawn()
+            return self._current
+
+    async def start(self) -> None:
+        """Connect and warm up sessions ahead of the first websocket."""
+        if not self.settings.enabled:
+            return
+        try:
+            await self._generation()
+        except Exception as e:
+            logger.warning(f"Agent pool warm-up failed, will retry on first connection: {e}")
+
+    def invalidate(self) -> None:
+        """Drop the current connection, e.g. after the database config changed.
+
+        Leased sessions finish on the old connection; a new one is started in
+        the background for the next lease.
+        """
+        if self._current is not None:
+            self._retire(self._current)
+        if self.settings.enabled:
+            try:
+                asyncio.get_running_loop()
+            except RuntimeError:
+                return
+            self._refresh = asyncio.create_task(self.start())
+
+    async def _recycle(self, agent: EnhancedDatabaseQueryAgent) -> bool:
+        if agent.state == AgentState.RUNNING:
+            # A cancelled run that has not unwound yet still uses this session
+            return False
+        try:
+            await agent.reset()
+        except Exception as e:
+            logger.warning(f"Agent pool: dropping session that failed to reset: {e}")
+            return False
+        agent.state = AgentState.IDLE
+        agent.current_step = 0
+        agent._status_callback = None
+        return True
+
+    @asynccontextmanager
+    async def lease(self) -> AsyncIterator[EnhancedDatabaseQueryAgent]:
+        """Lease an agent session for the duration of the block."""
+        if not self.settings.enabled:
+            agent = EnhancedDatabaseQueryAgent()
+            try:
+                await agent.initialize(**self._connect_args())
+                yield agent
+            finally:
+                await agent.cleanup()
+            return
+
+        generation = await self._generation()
+        agent = generation.idle.pop() if generation.idle else generation.agent.fork()
+        generation.leases += 1
+        try:
+            yield agent
+        finally:
+            generation.leases -= 1
+            if generation.stale:
+                if generation.leases == 0:
+                    self._retire(generation)
+            elif len(generation.idle) < self.settings.max_idle and await self._recycle(agent):
+                generation.idle.append(agent)
+
+    async def cached_tables(self) -> Optional[dict]:
+        """Table catalog of the warm connection, or None if it is not connected."""
+        generation = self._current
+        if generation is None or not generation.healthy:
+            return None
+        tables = await generation.agent.get_cached_tables()
+        return tables if tables and "data" in tables else None
+
+    def stats(self) -> dict:
+        generation = self._current
+        return {
+            "enabled": self.settings.enabled,
+            "connected": generation is not None and generation.healthy,
+            "idle": len(generation.idle) if generation else 0,
+            "leased": sum(g.leases for g in self._generations),
+            "generations": len(self._generations),
+        }
+
+    async def close(self) -> None:
+        """Disconnect every generation, leased or not."""
+        if self._refresh is not None and not self._refresh.done():
+            self._refresh.cancel()
+        generations, self._generations = self._generations, []
+        self._current = None
+        for generation in generations:
+            generation.stale = True
+            generation.idle.clear()
+            generation.stop.set()
+        tasks = [g.task for g in generations if g.task is not None]
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+
+_agent_pool: Optional[AgentPool] = None
+_agent_pool_lock = threading.Lock()
+
+
+def get_agent_pool() -> AgentPool:
+    """Return the process-wide agent pool."""
+    global _agent_pool
+    if _agent_pool is None:
+        with _agent_pool_lock:
+            if _agent_pool is None:
+                _agent_pool = AgentPool()
+    return _agent_pool
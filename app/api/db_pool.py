@@ -0,0 +1,166 @@
+"""Shared database access for the REST routes.
+
+The settings page polls these endpoints, so the config file is only parsed
+again when it changes on disk, connections are reused from a small pool, and
+blocking pymysql calls run in worker threads instead of on the event loop.
+"""
+import asyncio
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, TypeVar
+
+import pymysql
+import toml
+
+from app.logger import logger
+
+
+T = TypeVar("T")
+
+
+class ConfigSnapshot:
+    """Parsed config file, reloaded when its mtime or size changes."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._key: Optional[Tuple[int, int]] = None
+        self._data: Dict[str, Any] = {}
+        self._loaded = False
+        self._lock = threading.Lock()
+        self.loads = 0
+
+    def _stat_key(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def exists(self) -> bool:
+        return self._stat_key() is not None
+
+    def get(self) -> Dict[str, Any]:
+        """Return the parsed config, re-reading the file only if it changed."""
+        key = self._stat_key()
+        with self._lock:
+            if not self._loaded or key != self._key:
+                self._data = toml.load(self.path) if key else {}
+                self._key = key
+                self._loaded = True
+                self.loads += 1
+            return self._data
+
+    def mysql(self) -> Dict[str, Any]:
+        return self.get().get("mysql", {})
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._loaded = False
+
+
+def config_fingerprint(db_config: Dict[str, Any]) -> tuple:
+    return tuple(
+        db_config.get(key) for key in ("host", "port", "user", "password", "database")
+    )
+
+
+class MySQLPool:
+    """Thread-safe pool of pymysql connections for the configured database.
+
+    Connections are keyed by the database settings; when the settings change,
+    idle connections to the old database are closed instead of reused.
+    """
+
+    def __init__(self, max_size: int = 4, connect_timeout: int = 5):
+        self.max_size = max_size
+        self.connect_timeout = connect_timeout
+        self._idle: List[pymysql.connections.Connection] = []
+        self._key: Optional[tuple] = None
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._lock = threading.Lock()
+        self.opened = 0
+
+    def _connect(self, db_config: Dict[str, Any]) -> pymysql.connections.Connection:
+        self.opened += 1
+        return pymysql.connect(
+            host=db_config.get("host", "localhost"),
+            port=int(db_config.get("port", 3306)),
+            user=db_config.get("user", "root"),
+            password=db_config.get("password", ""),
+            database=db_config.get("database", ""),
+            charset="utf8mb4",
+            connect_timeout=self.connect_timeout,
+        )
+
+    def _checkout(self, key: tuple) -> Optional[pymysql.connections.Connection]:
+        with self._lock:
+            if key != self._key:
+                self._close_idle()
+                self._key = key
+            conn = self._idle.pop() if self._idle else None
+        if conn is None:
+            return None
+        try:
+            conn.ping(reconnect=True)
+            return conn
+        except Exception as e:
+            logger.debug(f"Discarding stale MySQL connection: {e}")
+            self._close(conn)
+            return None
+
+    def _checkin(self, key: tuple, conn: pymysql.connections.Connection) -> None:
+        with self._lock:
+            if key == self._key and len(self._idle) < self.max_size:
+                self._idle.append(conn)
+                return
+        self._close(conn)
+
+    @staticmethod
+    def _close(conn: pymysql.connections.Connection) -> None:
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _close_idle(self) -> None:
+        idle, self._idle = self._idle, []
+        for conn in idle:
+            self._close(conn)
+
+    @contextmanager
+    def connection(
+        self, db_config: Dict[str, Any]
+    ) -> Iterator[pymysql.connections.Connection]:
+        """Borrow a connection (blocking; call from a worker thread)."""
+        key = config_fingerprint(db_config)
+        with self._slots:
+            conn = self._checkout(key) or self._connect(db_config)
+            try:
+                yield conn
+            except Exception:
+                # The connection may be mid-result or broken; don't reuse it
+                self._close(conn)
+                raise
+            else:
+                self._checkin(key, conn)
+
+    def _run(
+        self,
+        db_config: Dict[str, Any],
+        fn: Callable[[pymysql.connections.Connection], T],
+    ) -> T:
+        with self.connection(db_config) as conn:
+            return fn(conn)
+
+    async def run(
+        self,
+        db_config: Dict[str, Any],
+        fn: Callable[[pymysql.connections.Connection], T],
+    ) -> T:
+        """Run ``fn(connection)`` in a worker thread with a pooled connection."""
+        return await asyncio.to_thread(self._run, db_config, fn)
+
+    def close(self) -> None:
+        with self._lock:
+            self._close_idle()
@@ -0,0 +1,240 @@
+"""Stream query results as CSV, NDJSON or Arrow IPC.
+
+Rows are read with an unbuffered (server-side) cursor in a worker thread,
+encoded in batches and handed to the response through a bounded queue, so
+memory stays flat regardless of result size and a slow client throttles the
+read instead of buffering it.
+"""
+import asyncio
+import csv
+import io
+import json
+import threading
+from typing import Any, AsyncIterator, Dict, List
+
+import pymysql
+from pymysql.constants import FIELD_TYPE
+
+from app.api.db_pool import MySQLPool
+from app.logger import logger
+
+
+EXPORT_FORMATS = {
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrow"),
+}
+
+# Rows fetched and encoded per chunk, and chunks buffered ahead of the client
+BATCH_ROWS = 5000
+QUEUE_CHUNKS = 4
+
+
+class ExportCancelled(Exception):
+    """The client went away; the connection is dropped instead of drained."""
+
+
+class _CsvEncoder:
+    def __init__(self, columns: List[str], description):
+        self.columns = columns
+
+    def header(self) -> bytes:
+        # BOM so spreadsheet tools detect UTF-8 (table data is often Chinese)
+        return "\ufeff".encode() + self._rows([self.columns])
+
+    def _rows(self, rows) -> bytes:
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        return buffer.getvalue().encode("utf-8")
+
+    def batch(self, rows: List[tuple]) -> bytes:
+        return self._rows(rows)
+
+    def footer(self) -> bytes:
+        return b""
+
+
+class _NdjsonEncoder:
+    def __init__(self, columns: List[str], description):
+        self.columns = columns
+
+    def header(self) -> bytes:
+        return b""
+
+    def batch(self, rows: List[tuple]) -> bytes:
+        return "".join(
+            json.dumps(dict(zip(self.columns, row)), default=str, ensure_ascii=False) + "\n"
+            for row in rows
+        ).encode("utf-8")
+
+    def footer(self) -> bytes:
+        return b""
+
+
+def _arrow_type(pa, column) -> Any:
+    """Map a DB-API column description to an Arrow type."""
+    type_code, scale = column[1], column[5]
+    if type_code in (
+        FIELD_TYPE.TINY,
+        FIELD_TYPE.SHORT,
+        FIELD_TYPE.LONG,
+        FIELD_TYPE.LONGLONG,
+        FIELD_TYPE.INT24,
+        FIELD_TYPE.YEAR,
+    ):
+        return pa.int64()
+    if type_code in (FIELD_TYPE.FLOAT, FIELD_TYPE.DOUBLE):
+        return pa.float64()
+    if type_code in (FIELD_TYPE.DECIMAL, FIELD_TYPE.NEWDECIMAL):
+        return pa.decimal128(38, scale or 0)
+    if type_code == FIELD_TYPE.DATE:
+        return pa.date32()
+    if type_code in (FIELD_TYPE.DATETIME, FIELD_TYPE.TIMESTAMP):
+        return pa.timestamp("us")
+    if type_code == FIELD_TYPE.TIME:
+        return pa.duration("us")
+    return pa.string()
+
+
+class _ArrowEncoder:
+    def __init__(self, columns: List[str], description):
+        import pyarrow as pa
+
+        self.pa = pa
+        self.schema = pa.schema(
+            [pa.field(name, _arrow_type(pa, column)) for name, column in zip(columns, description)]
+        )
+        self.chunks: List[bytes] = []
+        self.writer = pa.ipc.new_stream(self, self.schema)
+
+    # File-like sink for the IPC writer
+    closed = False
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def _drain(self) -> bytes:
+        data, self.chunks = b"".join(self.chunks), []
+        return data
+
+    def _array(self, values: list, field):
+        if field.type == self.pa.string():
+            # Text-like columns may hold bytes (BLOB) or JSON/enum values
+            values = [
+                value.decode("utf-8", "replace")
+                if isinstance(value, bytes)
+                else value if value is None or isinstance(value, str) else str(value)
+                for value in values
+            ]
+        return self.pa.array(values, type=field.type)
+
+    def header(self) -> bytes:
+        return self._drain()
+
+    def batch(self, rows: List[tuple]) -> bytes:
+        columns = list(zip(*rows))
+        arrays = [self._array(list(values), field) for values, field in zip(columns, self.schema)]
+        self.writer.write_batch(self.pa.record_batch(arrays, schema=self.schema))
+        return self._drain()
+
+    def footer(self) -> bytes:
+        self.writer.close()
+        return self._drain()
+
+
+_ENCODERS = {"csv": _CsvEncoder, "ndjson": _NdjsonEncoder, "arrow": _ArrowEncoder}
+
+
+def arrow_available() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class ResultExporter:
+    """Run one read-only query and encode its rows in the requested format."""
+
+    def __init__(self, sql: str, fmt: str, db_config: Dict[str, Any], pool: MySQLPool):
+        self.sql = sql
+        self.fmt = fmt
+        self.db_config = db_config
+        self.pool = pool
+        self.cancelled = threading.Event()
+        self.rows = 0
+
+    def run(self, put) -> None:
+        """Stream encoded chunks to ``put`` (blocking; runs in a worker thread)."""
+        with self.pool.connection(self.db_config) as conn:
+            cursor = conn.cursor(pymysql.cursors.SSCursor)
+            cursor.execute("START TRANSACTION READ ONLY")
+            cursor.execute(self.sql)
+            description = cursor.description or []
+            columns = [column[0] for column in description]
+            encoder = _ENCODERS[self.fmt](columns, description)
+            if not put(encoder.header()):
+                raise ExportCancelled()
+            while True:
+                rows = cursor.fetchmany(BATCH_ROWS)
+                if not rows:
+                    break
+                self.rows += len(rows)
+                if not put(encoder.batch(rows)):
+                    # Closing an unbuffered cursor would read the rest of the
+                    # result; dropping the connection aborts it instead
+                    raise ExportCancelled()
+            put(encoder.footer())
+            cursor.close()
+            conn.rollback()
+
+
+async def stream_export(exporter: ResultExporter) -> AsyncIterator[bytes]:
+    """Yield the encoded chunks of an export as they are produced."""
+    loop = asyncio.get_running_loop()
+    chunks: asyncio.Queue = asyncio.Queue()
+    # Chunks the worker may queue ahead of the client
+    slots = threading.Semaphore(QUEUE_CHUNKS)
+
+    def put(chunk: bytes) -> bool:
+        # Wait for a free slot, giving up once the client has gone away
+        while not slots.acquire(timeout=0.1):
+            if exporter.cancelled.is_set():
+                return False
+        loop.call_soon_threadsafe(chunks.put_nowait, chunk)
+        return True
+
+    task = asyncio.create_task(asyncio.to_thread(exporter.run, put))
+    get = None
+    try:
+        while True:
+            get = asyncio.ensure_future(chunks.get())
+            await asyncio.wait({get, task}, return_when=asyncio.FIRST_COMPLETED)
+            if get.done():
+                slots.release()
+                if get.result():
+                    yield get.result()
+                continue
+            get.cancel()
+            # The producer has finished; everything it queued is still there
+            while not chunks.empty():
+                chunk = chunks.get_nowait()
+                if chunk:
+                    yield chunk
+            break
+        # Headers are already sent, so a truncated body is the only signal left
+        task.result()
+    finally:
+        exporter.cancelled.set()
+        if get is not None:
+            get.cancel()
+        try:
+            await asyncio.shield(task)
+        except ExportCancelled:
+            logger.info(f"Export cancelled after {exporter.rows} rows")
+        except Exception as e:
+            logger.error(f"Export failed after {exporter.rows} rows: {e}")
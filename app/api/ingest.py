@@ -0,0 +1,298 @@
+"""Load uploaded CSV files into MySQL.
+
+The file is read as a stream: column types are inferred from the first rows,
+the target table is created (or an existing one verified), and rows are
+inserted in ``executemany`` batches on a pooled connection, so memory stays
+constant regardless of file size. Loading runs in a worker thread and
+reports progress events back to the event loop.
+
+A new table is loaded under a staging name and renamed once every row is in,
+so a failed or cancelled load leaves no table behind. Rows appended to an
+existing table are committed per batch; errors report how many were kept.
+"""
+import asyncio
+import csv
+import io
+import re
+import threading
+import time
+import uuid
+from itertools import chain
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional
+
+from app.api.db_pool import MySQLPool
+from app.config import IngestSettings, config
+from app.logger import logger
+
+
+_INT = re.compile(r"^[+-]?(0|[1-9]\d{0,17})$")
+_FLOAT = re.compile(r"^[+-]?((0|[1-9]\d*)(\.\d*)?|\.\d+)([eE][+-]?\d+)?$")
+_DATE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+_DATETIME = re.compile(r"^\d{4}-\d{2}-\d{2} \d{2}:\d{2}(:\d{2}(\.\d{1,6})?)?$")
+
+# Candidate types from most to least specific; strings are the fallback
+_TYPE_PATTERNS = [
+    ("BIGINT", _INT),
+    ("DOUBLE", _FLOAT),
+    ("DATE", _DATE),
+    ("DATETIME", _DATETIME),
+]
+
+
+class IngestError(Exception):
+    """Raised when a CSV file cannot be loaded into the target table.
+
+    ``rows`` is the number of rows left committed in the table.
+    """
+
+    def __init__(self, message: str, rows: int = 0):
+        super().__init__(message)
+        self.rows = rows
+
+
+def sanitize_identifier(name: str, fallback: str) -> str:
+    """Turn a file or header name into a MySQL identifier (max 64 chars)."""
+    name = re.sub(r"\W+", "_", name.strip()).strip("_")[:64]
+    return name or fallback
+
+
+def column_names(header: List[str]) -> List[str]:
+    """Sanitized, de-duplicated column names for a CSV header."""
+    names: List[str] = []
+    seen = set()
+    for i, raw in enumerate(header):
+        name = sanitize_identifier(raw, f"col_{i + 1}")
+        base, n = name, 2
+        while name.lower() in seen:
+            suffix = f"_{n}"
+            name = base[: 64 - len(suffix)] + suffix
+            n += 1
+        seen.add(name.lower())
+        names.append(name)
+    return names
+
+
+def infer_column_types(rows: List[List[str]], width: int) -> List[str]:
+    """Infer a MySQL type per column from sampled rows.
+
+    Empty values are treated as NULL. Numbers with leading zeros stay strings
+    (codes, zip codes), and strings longer than 255 characters become TEXT.
+    """
+    types = []
+    for col in range(width):
+        candidates = [name for name, _ in _TYPE_PATTERNS]
+        longest = 0
+        for row in rows:
+            value = row[col].strip() if col < len(row) else ""
+            if not value:
+                continue
+            longest = max(longest, len(value))
+            candidates = [
+                name
+                for name, pattern in _TYPE_PATTERNS
+                if name in candidates and pattern.match(value)
+            ]
+        if longest and candidates:
+            types.append(candidates[0])
+        else:
+            types.append("VARCHAR(255)" if longest <= 255 else "TEXT")
+    return types
+
+
+def _sniff_encoding(path: Path) -> str:
+    """UTF-8 (with or without BOM), falling back to GB18030 for legacy exports."""
+    with path.open("rb") as f:
+        head = f.read(64 * 1024)
+    try:
+        head.decode("utf-8")
+    except UnicodeDecodeError as e:
+        # A multi-byte character may be cut at the end of the sample
+        if e.start < len(head) - 4:
+            return "gb18030"
+    return "utf-8-sig"
+
+
+class CsvIngestor:
+    """Stream one CSV file into a MySQL table."""
+
+    def __init__(
+        self,
+        path: Path,
+        table: str,
+        db_config: Dict[str, Any],
+        pool: MySQLPool,
+        settings: Optional[IngestSettings] = None,
+    ):
+        self.path = path
+        self.table = table
+        self.db_config = db_config
+        self.pool = pool
+        self.settings = settings or config.ingest_config
+        self.cancelled = threading.Event()
+
+    def _rows(self, reader: Iterator[List[str]], width: int) -> Iterator[tuple]:
+        for line, row in enumerate(reader, start=2):
+            if not row:
+                continue
+            if len(row) > width:
+                raise IngestError(f"第 {line} 行有 {len(row)} 个字段，表头只有 {width} 列")
+            values = [value if value.strip() else None for value in row]
+            values.extend([None] * (width - len(values)))
+            yield tuple(values)
+
+    def _prepare_table(
+        self, cursor, columns: List[str], types: List[str]
+    ) -> Optional[str]:
+        """Check an existing table has the same columns, or create a staging
+        table for a new one.
+
+        Returns the staging table name, or None to append to the existing table.
+        """
+        cursor.execute(
+            "SELECT COLUMN_NAME FROM information_schema.COLUMNS "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s "
+            "ORDER BY ORDINAL_POSITION",
+            (self.table,),
+        )
+        existing = [row[0].lower() for row in cursor.fetchall()]
+        if existing:
+            if existing != [name.lower() for name in columns]:
+                raise IngestError(
+                    f"表 `{self.table}` 已存在且列不一致: "
+                    f"现有 {existing}, 文件 {columns}"
+                )
+            return None
+        definitions = ", ".join(
+            f"`{name}` {sql_type} NULL" for name, sql_type in zip(columns, types)
+        )
+        staging = f"{self.table[:46]}__ingest_{uuid.uuid4().hex[:8]}"
+        cursor.execute(
+            f"CREATE TABLE `{staging}` ({definitions}) DEFAULT CHARSET=utf8mb4"
+        )
+        return staging
+
+    def run(self, emit: Callable[[dict], None]) -> dict:
+        """Load the file (blocking) and return a summary."""
+        start = time.monotonic()
+        total_bytes = self.path.stat().st_size
+        encoding = _sniff_encoding(self.path)
+
+        with self.path.open("rb") as raw:
+            text = io.TextIOWrapper(raw, encoding=encoding, newline="")
+            reader = csv.reader(text)
+            header = next(reader, None)
+            if not header:
+                raise IngestError("CSV 文件为空")
+            columns = column_names(header)
+
+            sample: List[List[str]] = []
+            for row in reader:
+                sample.append(row)
+                if len(sample) >= self.settings.sample_rows:
+                    break
+            types = infer_column_types(sample, len(columns))
+            emit(
+                {
+                    "type": "schema",
+                    "table": self.table,
+                    "columns": [
+                        {"name": name, "type": sql_type}
+                        for name, sql_type in zip(columns, types)
+                    ],
+                }
+            )
+
+            rows = self._rows(chain(sample, reader), len(columns))
+            loaded = 0
+            with self.pool.connection(self.db_config) as conn:
+                with conn.cursor() as cursor:
+                    staging = self._prepare_table(cursor, columns, types)
+                    conn.commit()
+                    insert = (
+                        f"INSERT INTO `{staging or self.table}` ("
+                        + ", ".join(f"`{name}`" for name in columns)
+                        + ") VALUES ("
+                        + ", ".join(["%s"] * len(columns))
+                        + ")"
+                    )
+                    try:
+                        while not self.cancelled.is_set():
+                            batch = [
+                                row
+                                for _, row in zip(range(self.settings.batch_size), rows)
+                            ]
+                            if not batch:
+                                break
+                            cursor.executemany(insert, batch)
+                            conn.commit()
+                            loaded += len(batch)
+                            emit(
+                                {
+                                    "type": "progress",
+                                    "rows": loaded,
+                                    "bytes": min(raw.tell(), total_bytes),
+                                    "total_bytes": total_bytes,
+                                }
+                            )
+                        if self.cancelled.is_set():
+                            raise IngestError("导入已取消")
+                        if staging:
+                            cursor.execute(
+                                f"RENAME TABLE `{staging}` TO `{self.table}`"
+                            )
+                    except Exception as e:
+                        if staging:
+                            self._drop_staging(conn, cursor, staging)
+                            raise IngestError(f"{e}，未创建表 `{self.table}`") from e
+                        raise IngestError(
+                            f"{e}，已有 {loaded} 行写入表 `{self.table}`", rows=loaded
+                        ) from e
+
+        return {
+            "type": "done",
+            "table": self.table,
+            "created": staging is not None,
+            "rows": loaded,
+            "seconds": round(time.monotonic() - start, 2),
+        }
+
+    def _drop_staging(self, conn, cursor, staging: str) -> None:
+        try:
+            conn.rollback()
+            cursor.execute(f"DROP TABLE IF EXISTS `{staging}`")
+        except Exception as e:
+            logger.warning(f"Could not drop staging table {staging}: {e}")
+
+
+async def stream_ingest(ingestor: CsvIngestor) -> AsyncIterator[dict]:
+    """Run an ingestor in a worker thread, yielding its events as they occur.
+
+    Closing the iterator (e.g. the client disconnected) stops the load after
+    the current batch.
+    """
+    loop = asyncio.get_running_loop()
+    events: asyncio.Queue = asyncio.Queue()
+
+    def emit(event: dict) -> None:
+        loop.call_soon_threadsafe(events.put_nowait, event)
+
+    async def load() -> None:
+        try:
+            emit(await asyncio.to_thread(ingestor.run, emit))
+        except IngestError as e:
+            emit({"type": "error", "error": str(e), "rows": e.rows})
+        except Exception as e:
+            logger.error(f"Loading {ingestor.path.name} into {ingestor.table} failed: {e}")
+            emit({"type": "error", "error": str(e), "rows": 0})
+
+    task = asyncio.create_task(load())
+    try:
+        while True:
+            event = await events.get()
+            yield event
+            if event["type"] in ("done", "error"):
+                break
+    finally:
+        ingestor.cancelled.set()
+        await asyncio.shield(task)
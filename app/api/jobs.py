@@ -0,0 +1,228 @@
+"""Asynchronous query jobs.
+
+Questions submitted to ``/api/v1/jobs`` are queued and answered by a fixed
+number of workers, each running one agent session leased from an agent pool.
+Clients poll or come back later for the result; finished jobs are kept for
+``result_ttl`` seconds.
+
+By default jobs lease from their own ``AgentPool``, i.e. their own MCP server
+process and database connection pool, so batch-like traffic cannot take the
+database slots of the interactive websocket sessions. With
+``dedicated_pool = false`` they share the websocket pool and its database
+limit, and only the worker count bounds their share. The LLM rate limiter is
+process-wide either way.
+"""
+import asyncio
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from app.api.agent_pool import AgentPool, get_agent_pool
+from app.config import JobSettings, config
+from app.llm import track_token_usage
+from app.logger import logger
+
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+FINISHED = (SUCCEEDED, FAILED, CANCELLED)
+
+
+class JobQueueFull(Exception):
+    """Raised when a job is submitted while ``max_queued`` jobs are pending."""
+
+
+@dataclass
+class Job:
+    job_id: str
+    query: str
+    status: str = QUEUED
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Optional[str] = None
+    error: Optional[str] = None
+    sql: List[str] = field(default_factory=list)
+    tokens: Dict[str, int] = field(default_factory=dict)
+
+    def summary(self) -> dict:
+        """Job state without the (possibly large) result."""
+        return {
+            "job_id": self.job_id,
+            "query": self.query,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+        }
+
+    def detail(self) -> dict:
+        return {
+            **self.summary(),
+            "result": self.result,
+            "sql": self.sql,
+            "tokens": self.tokens,
+        }
+
+
+class JobManager:
+    """Queue of jobs processed by a bounded set of worker tasks."""
+
+    def __init__(
+        self,
+        settings: Optional[JobSettings] = None,
+        pool: Optional[AgentPool] = None,
+    ):
+        self.settings = settings or config.job_config
+        self._pool = pool
+        self._own_pool: Optional[AgentPool] = None
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._running: Dict[str, asyncio.Task] = {}
+
+    @property
+    def pool(self) -> AgentPool:
+        if self._pool is not None:
+            return self._pool
+        if not self.settings.dedicated_pool:
+            return get_agent_pool()
+        if self._own_pool is None:
+            self._own_pool = AgentPool()
+        return self._own_pool
+
+    def invalidate(self) -> None:
+        """Reconnect the dedicated pool, e.g. after the database config changed."""
+        if self._own_pool is not None:
+            self._own_pool.invalidate()
+
+    def _ensure_workers(self) -> None:
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        self._workers = [task for task in self._workers if not task.done()]
+        for i in range(len(self._workers), self.settings.workers):
+            self._workers.append(asyncio.create_task(self._worker(i)))
+
+    def _purge(self) -> None:
+        """Drop finished jobs older than the retention period."""
+        cutoff = time.time() - self.settings.result_ttl
+        expired = [
+            job_id
+            for job_id, job in self._jobs.items()
+            if job.status in FINISHED and job.finished_at < cutoff
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def submit(self, query: str) -> Job:
+        self._purge()
+        pending = sum(job.status == QUEUED for job in self._jobs.values())
+        if pending >= self.settings.max_queued:
+            raise JobQueueFull(f"{pending} jobs are already waiting")
+        self._ensure_workers()
+        job = Job(job_id=uuid.uuid4().hex, query=query)
+        self._jobs[job.job_id] = job
+        self._queue.put_nowait(job.job_id)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        self._purge()
+        return self._jobs.get(job_id)
+
+    def list(self) -> List[Job]:
+        self._purge()
+        return list(self._jobs.values())
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """Cancel a queued or running job; finished jobs are left as they are."""
+        job = self.get(job_id)
+        if job is None or job.status in FINISHED:
+            return job
+        self._finish(job, CANCELLED)
+        task = self._running.get(job_id)
+        if task is not None:
+            task.cancel()
+        return job
+
+    def stats(self) -> dict:
+        counts = {status: 0 for status in (QUEUED, RUNNING, *FINISHED)}
+        for job in self._jobs.values():
+            counts[job.status] += 1
+        return {
+            "workers": self.settings.workers,
+            "dedicated_pool": self._pool is None and self.settings.dedicated_pool,
+            **counts,
+        }
+
+    @staticmethod
+    def _finish(job: Job, status: str, error: Optional[str] = None) -> None:
+        job.status = status
+        job.error = error
+        job.finished_at = time.time()
+
+    async def _worker(self, index: int) -> None:
+        while True:
+            job = self._jobs.get(await self._queue.get())
+            if job is None or job.status != QUEUED:
+                continue
+            job.status = RUNNING
+            job.started_at = time.time()
+            task = asyncio.create_task(self._run(job))
+            self._running[job.job_id] = task
+            try:
+                await task
+            except asyncio.CancelledError:
+                if job.status != CANCELLED:
+                    # The worker itself is being shut down
+                    self._finish(job, CANCELLED, "Server shut down")
+                    raise
+            except Exception as e:
+                logger.error(f"Job {job.job_id} failed: {e}")
+                self._finish(job, FAILED, str(e))
+            finally:
+                self._running.pop(job.job_id, None)
+
+    async def _run(self, job: Job) -> None:
+        async with self.pool.lease() as agent:
+            with track_token_usage() as usage:
+                job.result = await agent.run(job.query)
+            job.sql = list(agent.executed_sqls)
+            job.tokens = {
+                "input": usage.input_tokens,
+                "completion": usage.completion_tokens,
+                "total": usage.total_tokens,
+            }
+        self._finish(job, SUCCEEDED)
+
+    async def close(self) -> None:
+        workers, self._workers = self._workers, []
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        for job in self._jobs.values():
+            if job.status not in FINISHED:
+                self._finish(job, CANCELLED, "Server shut down")
+        if self._own_pool is not None:
+            await self._own_pool.close()
+
+
+_job_manager: Optional[JobManager] = None
+_job_manager_lock = threading.Lock()
+
+
+def get_job_manager() -> JobManager:
+    """Return the process-wide job manager."""
+    global _job_manager
+    if _job_manager is None:
+        with _job_manager_lock:
+            if _job_manager is None:
+                _job_manager = JobManager()
+    return _job_manager
@@ -1,13 +1,23 @@
 from fastapi import APIRouter, File, UploadFile, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import Optional, List, Dict
-import shutil
+from typing import AsyncIterator, Optional, List, Dict
+import asyncio
+import json
 import os
+import time
 from pathlib import Path
 import toml
 import pymysql
+from app.api.agent_pool import get_agent_pool
+from app.api.db_pool import ConfigSnapshot, MySQLPool, config_fingerprint
+from app.api.export import EXPORT_FORMATS, ResultExporter, arrow_available, stream_export
+from app.api.ingest import CsvIngestor, sanitize_identifier, stream_ingest
+from app.api.jobs import FINISHED, JobQueueFull, get_job_manager
+from app.api.sessions import last_sql, recorded_sql
 from app.config import config
 from app.llm import LLM
+from app.sql import is_read_only_sql
 
 router = APIRouter()
 
@@ -16,6 +26,15 @@ UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 
 CONFIG_PATH = Path(__file__).parent.parent.parent / "config" / "config.toml"
 
+# Shared by all requests: the config is re-parsed only when the file changes
+config_snapshot = ConfigSnapshot(CONFIG_PATH)
+mysql_pool = MySQLPool()
+
+# Seconds a table listing read from the database is reused while the agent
+# pool has no catalog loaded
+TABLE_LIST_TTL = 60
+_table_list: Optional[tuple] = None  # (config fingerprint, expires at, tables)
+
 
 class DatabaseConfig(BaseModel):
     host: str = "localhost"
@@ -36,6 +55,10 @@ class LLMConfig(BaseModel):
     models: Optional[List[str]] = None
 
 
+class JobRequest(BaseModel):
+    query: str
+
+
 @router.get("/health")
 async def health_check():
     return {"status": "ok"}
@@ -64,6 +87,11 @@ async def save_config(db_config: DatabaseConfig):
         with open(CONFIG_PATH, "w", encoding="utf-8") as f:
             toml.dump(config, f)
 
+        # The MCP server reads the database settings at startup; reconnect
+        config_snapshot.invalidate()
+        get_agent_pool().invalidate()
+        get_job_manager().invalidate()
+
         return {"success": True, "message": "配置已保存"}
 
     except Exception as e:
@@ -74,7 +102,8 @@ async def save_config(db_config: DatabaseConfig):
 async def test_connection(db_config: DatabaseConfig):
     """Test database connection with provided config."""
     try:
-        connection = pymysql.connect(
+        connection = await asyncio.to_thread(
+            pymysql.connect,
             host=db_config.host,
             port=db_config.port,
             user=db_config.user,
@@ -89,20 +118,25 @@ async def test_connection(db_config: DatabaseConfig):
         return {"success": False, "error": str(e)}
 
 
+def _show_tables(connection) -> List[str]:
+    with connection.cursor() as cursor:
+        cursor.execute("SHOW TABLES")
+        return [row[0] for row in cursor.fetchall()]
+
+
 @router.get("/tables")
 async def get_tables():
-    """Fetch tables from the database via direct MySQL connection."""
+    """List tables from the agent's catalog, falling back to a pooled query."""
+    global _table_list
     try:
-        # Load config
-        if not CONFIG_PATH.exists():
+        if not config_snapshot.exists():
             return {
                 "tables": [],
                 "success": False,
                 "error": "请先在设置中配置数据库连接",
             }
 
-        config = toml.load(CONFIG_PATH)
-        db_config = config.get("mysql", {})
+        db_config = config_snapshot.mysql()
 
         if not db_config.get("database"):
             return {
@@ -111,22 +145,22 @@ async def get_tables():
                 "error": "请先在设置中配置数据库名称",
             }
 
-        # Connect to database
-        connection = pymysql.connect(
-            host=db_config.get("host", "localhost"),
-            port=int(db_config.get("port", 3306)),
-            user=db_config.get("user", "root"),
-            password=db_config.get("password", ""),
-            database=db_config.get("database", ""),
-            charset="utf8mb4",
-        )
+        # The warm agent connection already holds the table catalog
+        catalog = await get_agent_pool().cached_tables()
+        if catalog is not None:
+            tables = [table["name"] for table in catalog["data"]]
+            return {"tables": tables, "success": True}
 
-        cursor = connection.cursor()
-        cursor.execute("SHOW TABLES")
-        tables = [row[0] for row in cursor.fetchall()]
+        fingerprint = config_fingerprint(db_config)
+        if (
+            _table_list is not None
+            and _table_list[0] == fingerprint
+            and _table_list[1] > time.monotonic()
+        ):
+            return {"tables": _table_list[2], "success": True}
 
-        cursor.close()
-        connection.close()
+        tables = await mysql_pool.run(db_config, _show_tables)
+        _table_list = (fingerprint, time.monotonic() + TABLE_LIST_TTL, tables)
 
         return {"tables": tables, "success": True}
 
@@ -138,10 +172,10 @@ async def get_tables():
 async def get_llm_config():
     """Get current LLM configurations from config.toml."""
     try:
-        if not CONFIG_PATH.exists():
+        if not config_snapshot.exists():
             return {"success": False, "error": "配置文件不存在"}
 
-        config_data = toml.load(CONFIG_PATH)
+        config_data = config_snapshot.get()
         return {
             "success": True,
             "config": {
@@ -163,8 +197,8 @@ async def sync_provider_settings(data: dict):
         # 1. Update config loader (persists to disk and reloads memory)
         config.update_from_settings(data)
 
-        # 2. Clear LLM client cache to force re-initialization on next use
-        LLM.clear_cache()
+        # 2. Swap settings on live LLM instances; pooled connections are kept
+        LLM.reload_settings()
 
         return {"success": True, "message": "Settings synchronized successfully"}
     except Exception as e:
@@ -193,16 +227,169 @@ async def save_llm_config(data: dict):
         return {"success": False, "error": str(e)}
 
 
+async def _save_upload(file: UploadFile, path: Path) -> int:
+    """Copy an upload to disk in chunks without blocking the event loop."""
+    chunk_bytes = config.ingest_config.chunk_bytes
+    size = 0
+    with path.open("wb") as buffer:
+        while chunk := await file.read(chunk_bytes):
+            await asyncio.to_thread(buffer.write, chunk)
+            size += len(chunk)
+    return size
+
+
+async def _ingest_events(ingestor: CsvIngestor) -> AsyncIterator[str]:
+    global _table_list
+    async for event in stream_ingest(ingestor):
+        if event["type"] == "done":
+            # Reload the catalog so the agent can query the new table
+            _table_list = None
+            get_agent_pool().invalidate()
+            get_job_manager().invalidate()
+        yield json.dumps(event, ensure_ascii=False) + "\n"
+
+
 @router.post("/upload")
-async def upload_file(file: UploadFile = File(...)):
+async def upload_file(
+    file: UploadFile = File(...),
+    ingest: bool = False,
+    table: Optional[str] = None,
+):
+    """Store an upload; with ``ingest=true`` also load a CSV into MySQL.
+
+    Ingestion streams NDJSON events (schema, progress, done or error).
+    """
+    file_path = UPLOAD_DIR / Path(file.filename).name
     try:
-        file_path = UPLOAD_DIR / file.filename
-        with file_path.open("wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        size = await _save_upload(file, file_path)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    if not ingest:
         return {
             "filename": file.filename,
             "path": str(file_path),
+            "size": size,
             "message": "File uploaded successfully",
         }
+
+    if file_path.suffix.lower() != ".csv":
+        raise HTTPException(status_code=400, detail="仅支持将 CSV 文件导入数据库")
+    db_config = config_snapshot.mysql()
+    if not db_config.get("database"):
+        raise HTTPException(status_code=400, detail="请先在设置中配置数据库名称")
+
+    ingestor = CsvIngestor(
+        file_path,
+        sanitize_identifier(table or file_path.stem, "uploaded_data"),
+        db_config,
+        mysql_pool,
+    )
+    return StreamingResponse(_ingest_events(ingestor), media_type="application/x-ndjson")
+
+
+@router.get("/export")
+async def export_results(
+    format: str = "csv",
+    session_id: Optional[str] = None,
+    sql: Optional[str] = None,
+):
+    """Stream the rows of a read-only query as CSV, NDJSON or Arrow IPC.
+
+    Only SQL the agent ran in the websocket session ``session_id`` can be
+    exported: ``sql`` selects one of its recorded statements, and defaults
+    to the last one.
+    """
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"不支持的导出格式: {format}")
+    if format == "arrow" and not arrow_available():
+        raise HTTPException(status_code=400, detail="Arrow 导出需要安装 pyarrow")
+
+    if not session_id:
+        raise HTTPException(status_code=400, detail="导出需要指定会话 session_id")
+    if sql:
+        sql = recorded_sql(session_id, sql)
+        if not sql:
+            raise HTTPException(status_code=403, detail="只能导出当前会话中执行过的查询")
+    else:
+        sql = last_sql(session_id)
+        if not sql:
+            raise HTTPException(status_code=404, detail="当前会话没有可导出的查询")
+    # Recorded statements were already checked; the read-only transaction in
+    # the exporter is a second line of defence
+    if not is_read_only_sql(sql):
+        raise HTTPException(status_code=400, detail="仅允许导出只读查询的结果")
+
+    db_config = config_snapshot.mysql()
+    if not db_config.get("database"):
+        raise HTTPException(status_code=400, detail="请先在设置中配置数据库名称")
+
+    chunks = stream_export(ResultExporter(sql, format, db_config, mysql_pool))
+    # Run the query before sending headers so SQL errors become a 400
+    try:
+        first = await chunks.__anext__()
+    except StopAsyncIteration:
+        first = b""
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise HTTPException(status_code=400, detail=f"导出查询失败: {e}")
+
+    async def body() -> AsyncIterator[bytes]:
+        yield first
+        async for chunk in chunks:
+            yield chunk
+
+    media_type, extension = EXPORT_FORMATS[format]
+    return StreamingResponse(
+        body(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="export.{extension}"'},
+    )
+
+
+@router.post("/jobs", status_code=202)
+async def submit_job(request: JobRequest):
+    """Queue a question for a background worker; poll ``/jobs/{job_id}``."""
+    if not request.query.strip():
+        raise HTTPException(status_code=400, detail="问题不能为空")
+    try:
+        job = get_job_manager().submit(request.query)
+    except JobQueueFull as e:
+        raise HTTPException(
+            status_code=429, detail=f"任务队列已满: {e}", headers={"Retry-After": "10"}
+        )
+    return job.summary()
+
+
+@router.get("/jobs")
+async def list_jobs():
+    manager = get_job_manager()
+    return {
+        "jobs": [job.summary() for job in manager.list()],
+        "stats": manager.stats(),
+    }
+
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = get_job_manager().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="任务不存在或已过期")
+    return job.summary()
+
+
+@router.get("/jobs/{job_id}/result")
+async def get_job_result(job_id: str):
+    job = get_job_manager().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="任务不存在或已过期")
+    if job.status not in FINISHED:
+        raise HTTPException(status_code=409, detail=f"任务尚未完成: {job.status}")
+    return job.detail()
+
+
+@router.delete("/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    job = get_job_manager().cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="任务不存在或已过期")
+    return job.summary()
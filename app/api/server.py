@@ -1,11 +1,35 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 
 # Trigger reload for config change
 from fastapi.middleware.cors import CORSMiddleware
-from app.api.routes import router as api_router
+from app.api.agent_pool import get_agent_pool
+from app.api.jobs import get_job_manager
+from app.api.routes import mysql_pool, router as api_router
 from app.api.websocket import router as ws_router
+from app.config import config
+from app.llm_client import close_clients, warm_up
+from app.tokenizer import configure_cache_dir
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    configure_cache_dir()
+    if config.llm_client_config.warm_up:
+        await warm_up(config.llm.values())
+    # Connect the MCP server and load the catalog without delaying startup
+    pool_warm_up = asyncio.create_task(get_agent_pool().start())
+    yield
+    pool_warm_up.cancel()
+    await get_job_manager().close()
+    await get_agent_pool().close()
+    mysql_pool.close()
+    await close_clients()
+
 
-app = FastAPI(title="Database Copilot API")
+app = FastAPI(title="Database Copilot API", lifespan=lifespan)
 
 # Configure CORS
 app.add_middleware(
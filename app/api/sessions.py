@@ -0,0 +1,84 @@
+"""Registry of open websocket sessions shared with the REST routes.
+
+Lets endpoints such as the result export refer to "the last query this chat
+ran" without passing SQL through the client. Only statements the agent ran
+in the session are recorded, so they are the only SQL a client can export.
+"""
+import threading
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, Iterable, Optional
+
+from app.sql import is_read_only_sql, strip_sql_comments
+
+
+# Read-only statements remembered per session
+HISTORY_SIZE = 20
+
+
+@dataclass
+class SessionInfo:
+    session_id: str
+    sqls: Deque[str] = field(default_factory=lambda: deque(maxlen=HISTORY_SIZE))
+    updated_at: float = field(default_factory=time.time)
+
+    @property
+    def last_sql(self) -> Optional[str]:
+        return self.sqls[-1] if self.sqls else None
+
+
+_sessions: Dict[str, SessionInfo] = {}
+_lock = threading.Lock()
+
+
+def open_session() -> str:
+    session_id = uuid.uuid4().hex
+    with _lock:
+        _sessions[session_id] = SessionInfo(session_id)
+    return session_id
+
+
+def close_session(session_id: str) -> None:
+    with _lock:
+        _sessions.pop(session_id, None)
+
+
+def record_sqls(session_id: str, sqls: Iterable[str]) -> Optional[str]:
+    """Remember the read-only statements of a finished query.
+
+    Returns the last of them, if any.
+    """
+    read_only = [sql for sql in sqls if is_read_only_sql(sql)]
+    with _lock:
+        info = _sessions.get(session_id)
+        if info is not None and read_only:
+            for sql in read_only:
+                if sql in info.sqls:
+                    info.sqls.remove(sql)
+                info.sqls.append(sql)
+            info.updated_at = time.time()
+    return read_only[-1] if read_only else None
+
+
+def last_sql(session_id: str) -> Optional[str]:
+    with _lock:
+        info = _sessions.get(session_id)
+        return info.last_sql if info else None
+
+
+def recorded_sql(session_id: str, sql: str) -> Optional[str]:
+    """The statement of the session matching ``sql``, if the agent ran it.
+
+    Comments and surrounding whitespace are ignored when comparing.
+    """
+    wanted = strip_sql_comments(sql)
+    with _lock:
+        info = _sessions.get(session_id)
+        if info is None:
+            return None
+        return next(
+            (recorded for recorded in info.sqls if strip_sql_comments(recorded) == wanted),
+            None,
+        )
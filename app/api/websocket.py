@@ -1,12 +1,14 @@
 import asyncio
 import json
 import logging
-import sys
+import time
 from typing import Optional
 
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 
 from app.agent.enhanced_database_query import EnhancedDatabaseQueryAgent
+from app.api.agent_pool import get_agent_pool
+from app.api.sessions import close_session, open_session, record_sqls
 from app.schema import AgentState
 
 # Configure logging
@@ -14,100 +16,166 @@ logger = logging.getLogger("websocket")
 
 router = APIRouter()
 
+# Seconds to wait for a cancelled query to release its LLM and MCP calls
+CANCEL_TIMEOUT = 1.0
+
 
 @router.websocket("/chat")
 async def websocket_endpoint(websocket: WebSocket):
     await websocket.accept()
     logger.info("New WebSocket connection accepted")
 
-    # Initialize the agent for this session
-    agent = EnhancedDatabaseQueryAgent()
+    connected_at = time.perf_counter()
+
+    try:
+        # Lease a warm session: the MCP connection and table catalog are shared
+        # by the pool, so the connection is ready without starting a server
+        async with get_agent_pool().lease() as agent:
+            ready_ms = (time.perf_counter() - connected_at) * 1000
+            logger.info(f"Agent session ready in {ready_ms:.0f}ms")
+            await _serve(websocket, agent)
+
+    except WebSocketDisconnect:
+        logger.info("WebSocket disconnected")
+    except Exception as e:
+        logger.error(f"WebSocket error: {e}")
 
-    # Use the current python executable to run the MCP server
-    # This assumes the server code is in the python path
-    mcp_command = sys.executable
-    mcp_args = ["-m", "mysql_mcp_server.server"]
 
+async def _serve(websocket: WebSocket, agent: EnhancedDatabaseQueryAgent) -> None:
+    """Handle queries on one connection until the client disconnects."""
+    # The session id lets REST routes (e.g. result export) refer to this chat
+    session_id = open_session()
     try:
-        # Initialize connection to MCP server
-        await agent.initialize(
-            connection_type="stdio",
-            command=mcp_command,
-            args=mcp_args,
+        await _serve_session(websocket, agent, session_id)
+    finally:
+        close_session(session_id)
+
+
+async def _serve_session(
+    websocket: WebSocket, agent: EnhancedDatabaseQueryAgent, session_id: str
+) -> None:
+    # Send welcome message
+    await websocket.send_text(
+        json.dumps(
+            {
+                "type": "system",
+                "content": "Database Copilot Agent Connected. Ready for queries.",
+                "status": "ready",
+                "session_id": session_id,
+            }
         )
+    )
+
+    # Define status callback for WebSocket
+    async def status_callback(payload):
+        if isinstance(payload, dict) and payload.get("type") == "delta":
+            await websocket.send_text(json.dumps(payload))
+            return
+        logger.info(f"📤 Sending status payload to client: {payload}")
+        if isinstance(payload, dict):
+            await websocket.send_text(json.dumps(payload))
+        else:
+            await websocket.send_text(
+                json.dumps(
+                    {"type": "status", "content": str(payload), "status": "busy"}
+                )
+            )
 
-        # Send welcome message
+    async def run_query(user_query: str) -> None:
+        # Notify client that processing started
         await websocket.send_text(
             json.dumps(
                 {
-                    "type": "system",
-                    "content": "Database Copilot Agent Connected. Ready for queries.",
-                    "status": "ready",
+                    "type": "status",
+                    "content": "🤔 Thinking...",
+                    "status": "busy",
                 }
             )
         )
-
-        # Define status callback for WebSocket
-        async def status_callback(payload):
-            logger.info(f"📤 Sending status payload to client: {payload}")
-            if isinstance(payload, dict):
-                await websocket.send_text(json.dumps(payload))
-            else:
-                await websocket.send_text(
-                    json.dumps(
-                        {"type": "status", "content": str(payload), "status": "busy"}
-                    )
+        try:
+            # Run the agent with the status callback
+            result = await agent.run(user_query, status_callback=status_callback)
+
+            exportable = record_sqls(session_id, agent.executed_sqls) is not None
+
+            # Send final result
+            await websocket.send_text(
+                json.dumps(
+                    {
+                        "type": "response",
+                        "content": result,
+                        "status": "ready",
+                        "exportable": exportable,
+                    }
+                )
+            )
+        except Exception as e:
+            logger.error(f"Error processing message: {e}")
+            await websocket.send_text(
+                json.dumps(
+                    {
+                        "type": "error",
+                        "content": f"Error processing query: {str(e)}",
+                        "status": "error",
+                    }
                 )
+            )
 
+    # Queries run as tasks so "cancel" and new queries are read while one runs
+    query_task: Optional[asyncio.Task] = None
+    try:
         while True:
             # Receive message from client
             data = await websocket.receive_text()
             try:
                 message_obj = json.loads(data)
-                user_query = message_obj.get("content")
-
-                if not user_query:
-                    continue
-
-                # Notify client that processing started
-                await websocket.send_text(
-                    json.dumps(
-                        {
-                            "type": "status",
-                            "content": "🤔 Thinking...",
-                            "status": "busy",
-                        }
-                    )
-                )
-
-                # Run the agent with the status callback
-                result = await agent.run(user_query, status_callback=status_callback)
-
-                # Send final result
-                await websocket.send_text(
-                    json.dumps(
-                        {"type": "response", "content": result, "status": "ready"}
-                    )
-                )
-
             except json.JSONDecodeError:
                 logger.warning("Received invalid JSON")
-            except Exception as e:
-                logger.error(f"Error processing message: {e}")
-                await websocket.send_text(
-                    json.dumps(
-                        {
-                            "type": "error",
-                            "content": f"Error processing query: {str(e)}",
-                            "status": "error",
-                        }
+                continue
+
+            if message_obj.get("type") == "cancel":
+                if await _cancel(query_task):
+                    await websocket.send_text(
+                        json.dumps(
+                            {
+                                "type": "cancelled",
+                                "content": "Query cancelled.",
+                                "status": "ready",
+                            }
+                        )
                     )
-                )
+                continue
 
-    except WebSocketDisconnect:
-        logger.info("WebSocket disconnected")
-    except Exception as e:
-        logger.error(f"WebSocket error: {e}")
+            user_query = message_obj.get("content")
+            if not user_query:
+                continue
+
+            # A new query supersedes the one still running
+            await _cancel(query_task)
+            query_task = asyncio.create_task(run_query(user_query))
+            query_task.add_done_callback(_reap)
     finally:
-        # Cleanup agent resources
-        await agent.cleanup()
+        # Stop LLM calls and SQL of an abandoned query before releasing the session
+        await _cancel(query_task)
+
+
+def _reap(task: asyncio.Task) -> None:
+    # Errors are reported to the client inside the task; this only covers a
+    # client that went away while the result was being sent
+    if not task.cancelled() and task.exception() is not None:
+        logger.info(f"Query finished after client left: {task.exception()}")
+
+
+async def _cancel(task: Optional[asyncio.Task]) -> bool:
+    """Cancel a running query task and wait briefly for it to unwind.
+
+    Returns True if a running task was cancelled.
+    """
+    if task is None or task.done():
+        return False
+    task.cancel()
+    await asyncio.wait({task}, timeout=CANCEL_TIMEOUT)
+    if not task.done():
+        logger.warning(f"Query task still unwinding after {CANCEL_TIMEOUT}s")
+    logger.info("Cancelled in-flight query")
+    return True
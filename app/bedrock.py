@@ -1,16 +1,27 @@
+import asyncio
 import json
-import sys
 import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, List, Literal, Optional
+from typing import Any, AsyncIterator, Dict, List, Literal, Optional, Union
 
-import boto3
 
+# Bedrock calls are blocking (boto3), so they run on a dedicated thread pool;
+# this bounds concurrent requests per client and the HTTP connection pool
+MAX_CONCURRENCY = 32
 
-# Global variables to track the current tool use ID across function calls
-# Tmp solution
-CURRENT_TOOLUSE_ID = None
+# Bedrock stop reasons mapped to OpenAI finish reasons
+FINISH_REASONS = {
+    "end_turn": "stop",
+    "stop_sequence": "stop",
+    "tool_use": "tool_calls",
+    "max_tokens": "length",
+    "content_filtered": "content_filter",
+    "guardrail_intervened": "content_filter",
+}
+
+_EXHAUSTED = object()
 
 
 # Class to handle OpenAI-style response formatting
@@ -36,14 +47,19 @@ class OpenAIResponse:
 
 # Main client class for interacting with Amazon Bedrock
 class BedrockClient:
-    def __init__(self):
-        # Initialize Bedrock client, you need to configure AWS env first
-        try:
-            self.client = boto3.client("bedrock-runtime")
-            self.chat = Chat(self.client)
-        except Exception as e:
-            print(f"Error initializing Bedrock client: {e}")
-            sys.exit(1)
+    def __init__(self, client: Any = None):
+        # Use the given bedrock-runtime client (e.g. a stub), or create one
+        # from the AWS environment configuration
+        if client is None:
+            import boto3
+            from botocore.config import Config
+
+            client = boto3.client(
+                "bedrock-runtime",
+                config=Config(max_pool_connections=MAX_CONCURRENCY),
+            )
+        self.client = client
+        self.chat = Chat(client)
 
 
 # Chat interface class
@@ -56,6 +72,14 @@ class Chat:
 class ChatCompletions:
     def __init__(self, client):
         self.client = client
+        self._executor = ThreadPoolExecutor(
+            max_workers=MAX_CONCURRENCY, thread_name_prefix="bedrock"
+        )
+
+    async def _call(self, fn, *args, **kwargs):
+        # Run a blocking boto3 call without blocking the event loop
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, lambda: fn(*args, **kwargs))
 
     def _convert_openai_tools_to_bedrock_format(self, tools):
         # Convert OpenAI function calling format to Bedrock tool format
@@ -83,52 +107,64 @@ class ChatCompletions:
                 bedrock_tools.append(bedrock_tool)
         return bedrock_tools
 
+    @staticmethod
+    def _text_blocks(content: Union[str, List[dict], None]) -> List[dict]:
+        # Bedrock rejects empty text blocks; image parts are not forwarded
+        if isinstance(content, list):
+            texts = [part.get("text") for part in content if part.get("type") == "text"]
+        else:
+            texts = [content]
+        return [{"text": text} for text in texts if text]
+
     def _convert_openai_messages_to_bedrock_format(self, messages):
         # Convert OpenAI message format to Bedrock message format
         bedrock_messages = []
         system_prompt = []
+
+        def append(role: str, content: List[dict]) -> None:
+            # Bedrock requires alternating roles, so consecutive messages with
+            # the same role (e.g. several tool results) are merged
+            if bedrock_messages and bedrock_messages[-1]["role"] == role:
+                bedrock_messages[-1]["content"].extend(content)
+            else:
+                bedrock_messages.append({"role": role, "content": content})
+
         for message in messages:
-            if message.get("role") == "system":
-                system_prompt = [{"text": message.get("content")}]
-            elif message.get("role") == "user":
-                bedrock_message = {
-                    "role": message.get("role", "user"),
-                    "content": [{"text": message.get("content")}],
-                }
-                bedrock_messages.append(bedrock_message)
-            elif message.get("role") == "assistant":
-                bedrock_message = {
-                    "role": "assistant",
-                    "content": [{"text": message.get("content")}],
-                }
-                openai_tool_calls = message.get("tool_calls", [])
-                if openai_tool_calls:
-                    bedrock_tool_use = {
-                        "toolUseId": openai_tool_calls[0]["id"],
-                        "name": openai_tool_calls[0]["function"]["name"],
-                        "input": json.loads(
-                            openai_tool_calls[0]["function"]["arguments"]
-                        ),
-                    }
-                    bedrock_message["content"].append({"toolUse": bedrock_tool_use})
-                    global CURRENT_TOOLUSE_ID
-                    CURRENT_TOOLUSE_ID = openai_tool_calls[0]["id"]
-                bedrock_messages.append(bedrock_message)
-            elif message.get("role") == "tool":
-                bedrock_message = {
-                    "role": "user",
-                    "content": [
+            role = message.get("role")
+            if role == "system":
+                system_prompt.extend(self._text_blocks(message.get("content")))
+            elif role == "user":
+                append("user", self._text_blocks(message.get("content")) or [{"text": "."}])
+            elif role == "assistant":
+                content = self._text_blocks(message.get("content"))
+                for tool_call in message.get("tool_calls") or []:
+                    content.append(
+                        {
+                            "toolUse": {
+                                "toolUseId": tool_call["id"],
+                                "name": tool_call["function"]["name"],
+                                "input": json.loads(
+                                    tool_call["function"]["arguments"] or "{}"
+                                ),
+                            }
+                        }
+                    )
+                append("assistant", content or [{"text": "."}])
+            elif role == "tool":
+                append(
+                    "user",
+                    [
                         {
                             "toolResult": {
-                                "toolUseId": CURRENT_TOOLUSE_ID,
-                                "content": [{"text": message.get("content")}],
+                                "toolUseId": message.get("tool_call_id"),
+                                "content": self._text_blocks(message.get("content"))
+                                or [{"text": "."}],
                             }
                         }
                     ],
-                }
-                bedrock_messages.append(bedrock_message)
+                )
             else:
-                raise ValueError(f"Invalid role: {message.get('role')}")
+                raise ValueError(f"Invalid role: {role}")
         return system_prompt, bedrock_messages
 
     def _convert_bedrock_response_to_openai_format(self, bedrock_response):
@@ -146,10 +182,8 @@ class ChatCompletions:
             for content_item in bedrock_response["output"]["message"]["content"]:
                 if content_item.get("toolUse"):
                     bedrock_tool_use = content_item["toolUse"]
-                    global CURRENT_TOOLUSE_ID
-                    CURRENT_TOOLUSE_ID = bedrock_tool_use["toolUseId"]
                     openai_tool_call = {
-                        "id": CURRENT_TOOLUSE_ID,
+                        "id": bedrock_tool_use["toolUseId"],
                         "type": "function",
                         "function": {
                             "name": bedrock_tool_use["name"],
@@ -159,6 +193,7 @@ class ChatCompletions:
                     openai_tool_calls.append(openai_tool_call)
 
         # Construct final OpenAI format response
+        stop_reason = bedrock_response.get("stopReason", "end_turn")
         openai_format = {
             "id": f"chatcmpl-{uuid.uuid4()}",
             "created": int(time.time()),
@@ -166,7 +201,7 @@ class ChatCompletions:
             "system_fingerprint": None,
             "choices": [
                 {
-                    "finish_reason": bedrock_response.get("stopReason", "end_turn"),
+                    "finish_reason": FINISH_REASONS.get(stop_reason, stop_reason),
                     "index": 0,
                     "message": {
                         "content": content,
@@ -180,18 +215,47 @@ class ChatCompletions:
                     },
                 }
             ],
-            "usage": {
-                "completion_tokens": bedrock_response.get("usage", {}).get(
-                    "outputTokens", 0
-                ),
-                "prompt_tokens": bedrock_response.get("usage", {}).get(
-                    "inputTokens", 0
-                ),
-                "total_tokens": bedrock_response.get("usage", {}).get("totalTokens", 0),
-            },
+            "usage": self._convert_usage(bedrock_response.get("usage", {})),
         }
         return OpenAIResponse(openai_format)
 
+    @staticmethod
+    def _convert_usage(usage: dict) -> dict:
+        return {
+            "completion_tokens": usage.get("outputTokens", 0),
+            "prompt_tokens": usage.get("inputTokens", 0),
+            "total_tokens": usage.get("totalTokens", 0),
+        }
+
+    def _request(
+        self,
+        model: str,
+        messages: List[Dict[str, str]],
+        max_tokens: int,
+        temperature: float,
+        tools: Optional[List[dict]],
+        tool_choice: str,
+    ) -> dict:
+        # Build the keyword arguments shared by converse and converse_stream
+        system_prompt, bedrock_messages = self._convert_openai_messages_to_bedrock_format(
+            messages
+        )
+        request = {
+            "modelId": model,
+            "messages": bedrock_messages,
+            "inferenceConfig": {"temperature": temperature, "maxTokens": max_tokens},
+        }
+        if system_prompt:
+            request["system"] = system_prompt
+        if tools:
+            tool_config = {"tools": tools}
+            if tool_choice == "required":
+                tool_config["toolChoice"] = {"any": {}}
+            elif tool_choice == "auto":
+                tool_config["toolChoice"] = {"auto": {}}
+            request["toolConfig"] = tool_config
+        return request
+
     async def _invoke_bedrock(
         self,
         model: str,
@@ -203,19 +267,40 @@ class ChatCompletions:
         **kwargs,
     ) -> OpenAIResponse:
         # Non-streaming invocation of Bedrock model
-        (
-            system_prompt,
-            bedrock_messages,
-        ) = self._convert_openai_messages_to_bedrock_format(messages)
-        response = self.client.converse(
-            modelId=model,
-            system=system_prompt,
-            messages=bedrock_messages,
-            inferenceConfig={"temperature": temperature, "maxTokens": max_tokens},
-            toolConfig={"tools": tools} if tools else None,
+        request = self._request(
+            model, messages, max_tokens, temperature, tools, tool_choice
+        )
+        response = await self._call(self.client.converse, **request)
+        return self._convert_bedrock_response_to_openai_format(response)
+
+    def _chunk(
+        self,
+        chunk_id: str,
+        model: str,
+        delta: Optional[dict] = None,
+        finish_reason: Optional[str] = None,
+        usage: Optional[dict] = None,
+    ) -> OpenAIResponse:
+        # OpenAI-style streaming chunk; usage comes in a final chunk without choices
+        choices = []
+        if delta is not None or finish_reason is not None:
+            choices.append(
+                {
+                    "index": 0,
+                    "delta": {"role": None, "content": None, "tool_calls": None, **(delta or {})},
+                    "finish_reason": finish_reason,
+                }
+            )
+        return OpenAIResponse(
+            {
+                "id": chunk_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": choices,
+                "usage": usage,
+            }
         )
-        openai_response = self._convert_bedrock_response_to_openai_format(response)
-        return openai_response
 
     async def _invoke_bedrock_stream(
         self,
@@ -226,92 +311,115 @@ class ChatCompletions:
         tools: Optional[List[dict]] = None,
         tool_choice: Literal["none", "auto", "required"] = "auto",
         **kwargs,
-    ) -> OpenAIResponse:
-        # Streaming invocation of Bedrock model
-        (
-            system_prompt,
-            bedrock_messages,
-        ) = self._convert_openai_messages_to_bedrock_format(messages)
-        response = self.client.converse_stream(
-            modelId=model,
-            system=system_prompt,
-            messages=bedrock_messages,
-            inferenceConfig={"temperature": temperature, "maxTokens": max_tokens},
-            toolConfig={"tools": tools} if tools else None,
+    ) -> AsyncIterator[OpenAIResponse]:
+        # Streaming invocation of Bedrock model, yielding OpenAI-style chunks
+        # as converse_stream events arrive
+        request = self._request(
+            model, messages, max_tokens, temperature, tools, tool_choice
         )
-
-        # Initialize response structure
-        bedrock_response = {
-            "output": {"message": {"role": "", "content": []}},
-            "stopReason": "",
-            "usage": {},
-            "metrics": {},
-        }
-        bedrock_response_text = ""
-        bedrock_response_tool_input = ""
-
-        # Process streaming response
+        response = await self._call(self.client.converse_stream, **request)
         stream = response.get("stream")
-        if stream:
-            for event in stream:
-                if event.get("messageStart", {}).get("role"):
-                    bedrock_response["output"]["message"]["role"] = event[
-                        "messageStart"
-                    ]["role"]
-                if event.get("contentBlockDelta", {}).get("delta", {}).get("text"):
-                    bedrock_response_text += event["contentBlockDelta"]["delta"]["text"]
-                    print(
-                        event["contentBlockDelta"]["delta"]["text"], end="", flush=True
+        if stream is None:
+            return
+
+        chunk_id = f"chatcmpl-{uuid.uuid4()}"
+        # Bedrock content block index -> OpenAI tool call index
+        tool_indexes: Dict[int, int] = {}
+        events = iter(stream)
+        try:
+            while True:
+                event = await self._call(next, events, _EXHAUSTED)
+                if event is _EXHAUSTED:
+                    break
+                if "messageStart" in event:
+                    yield self._chunk(
+                        chunk_id, model, {"role": event["messageStart"].get("role")}
                     )
-                if event.get("contentBlockStop", {}).get("contentBlockIndex") == 0:
-                    bedrock_response["output"]["message"]["content"].append(
-                        {"text": bedrock_response_text}
+                elif "contentBlockStart" in event:
+                    start = event["contentBlockStart"]
+                    tool_use = start.get("start", {}).get("toolUse")
+                    if tool_use:
+                        index = tool_indexes.setdefault(
+                            start.get("contentBlockIndex", 0), len(tool_indexes)
+                        )
+                        yield self._chunk(
+                            chunk_id,
+                            model,
+                            {
+                                "tool_calls": [
+                                    {
+                                        "index": index,
+                                        "id": tool_use["toolUseId"],
+                                        "type": "function",
+                                        "function": {
+                                            "name": tool_use["name"],
+                                            "arguments": "",
+                                        },
+                                    }
+                                ]
+                            },
+                        )
+                elif "contentBlockDelta" in event:
+                    block = event["contentBlockDelta"]
+                    delta = block.get("delta", {})
+                    if delta.get("text"):
+                        yield self._chunk(chunk_id, model, {"content": delta["text"]})
+                    elif "toolUse" in delta:
+                        index = tool_indexes.get(block.get("contentBlockIndex", 0), 0)
+                        yield self._chunk(
+                            chunk_id,
+                            model,
+                            {
+                                "tool_calls": [
+                                    {
+                                        "index": index,
+                                        "id": None,
+                                        "type": None,
+                                        "function": {
+                                            "name": None,
+                                            "arguments": delta["toolUse"].get("input", ""),
+                                        },
+                                    }
+                                ]
+                            },
+                        )
+                elif "messageStop" in event:
+                    stop_reason = event["messageStop"].get("stopReason", "end_turn")
+                    yield self._chunk(
+                        chunk_id,
+                        model,
+                        finish_reason=FINISH_REASONS.get(stop_reason, stop_reason),
                     )
-                if event.get("contentBlockStart", {}).get("start", {}).get("toolUse"):
-                    bedrock_tool_use = event["contentBlockStart"]["start"]["toolUse"]
-                    tool_use = {
-                        "toolUseId": bedrock_tool_use["toolUseId"],
-                        "name": bedrock_tool_use["name"],
-                    }
-                    bedrock_response["output"]["message"]["content"].append(
-                        {"toolUse": tool_use}
+                elif "metadata" in event:
+                    yield self._chunk(
+                        chunk_id,
+                        model,
+                        usage=self._convert_usage(event["metadata"].get("usage", {})),
                     )
-                    global CURRENT_TOOLUSE_ID
-                    CURRENT_TOOLUSE_ID = bedrock_tool_use["toolUseId"]
-                if event.get("contentBlockDelta", {}).get("delta", {}).get("toolUse"):
-                    bedrock_response_tool_input += event["contentBlockDelta"]["delta"][
-                        "toolUse"
-                    ]["input"]
-                    print(
-                        event["contentBlockDelta"]["delta"]["toolUse"]["input"],
-                        end="",
-                        flush=True,
-                    )
-                if event.get("contentBlockStop", {}).get("contentBlockIndex") == 1:
-                    bedrock_response["output"]["message"]["content"][1]["toolUse"][
-                        "input"
-                    ] = json.loads(bedrock_response_tool_input)
-        print()
-        openai_response = self._convert_bedrock_response_to_openai_format(
-            bedrock_response
-        )
-        return openai_response
+        finally:
+            # Stop reading the HTTP response if the consumer went away early
+            close = getattr(stream, "close", None)
+            if close is not None:
+                close()
 
-    def create(
+    async def create(
         self,
         model: str,
         messages: List[Dict[str, str]],
-        max_tokens: int,
-        temperature: float,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
         stream: Optional[bool] = True,
         tools: Optional[List[dict]] = None,
         tool_choice: Literal["none", "auto", "required"] = "auto",
         **kwargs,
-    ) -> OpenAIResponse:
-        # Main entry point for chat completion
+    ) -> Union[OpenAIResponse, AsyncIterator[OpenAIResponse]]:
+        # Main entry point for chat completion, mirroring the OpenAI async
+        # client: a response, or an async iterator of chunks when streaming
         bedrock_tools = []
         if tools is not None:
             bedrock_tools = self._convert_openai_tools_to_bedrock_format(tools)
+        max_tokens = max_tokens or kwargs.get("max_completion_tokens") or 4096
+        temperature = 1.0 if temperature is None else temperature
         if stream:
             return self._invoke_bedrock_stream(
                 model,
@@ -322,13 +430,12 @@ class ChatCompletions:
                 tool_choice,
                 **kwargs,
             )
-        else:
-            return self._invoke_bedrock(
-                model,
-                messages,
-                max_tokens,
-                temperature,
-                bedrock_tools,
-                tool_choice,
-                **kwargs,
-            )
+        return await self._invoke_bedrock(
+            model,
+            messages,
+            max_tokens,
+            temperature,
+            bedrock_tools,
+            tool_choice,
+            **kwargs,
+        )
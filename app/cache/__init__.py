@@ -0,0 +1,9 @@
+from app.cache.query_cache import QueryCache, get_query_cache
+from app.cache.response_cache import ResponseCache, get_response_cache
+
+__all__ = [
+    "QueryCache",
+    "get_query_cache",
+    "ResponseCache",
+    "get_response_cache",
+]
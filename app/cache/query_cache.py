@@ -0,0 +1,359 @@
+"""Semantic cache mapping natural-language questions to generated SQL.
+
+Questions are normalized and shingled into character n-grams, then indexed
+with MinHash + LSH banding so that trivially reworded questions land on the
+same entry without any external service. Entries are scoped to a schema
+version so a changed catalog never serves stale SQL.
+
+Only exact matches are safe to answer from: near matches can differ in a
+single word that reverses the question (highest/lowest), so callers use
+them as a hint for SQL generation rather than as an answer.
+"""
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set, Tuple
+
+from pydantic import BaseModel, Field
+
+from app.config import PROJECT_ROOT, QueryCacheSettings, config
+from app.logger import logger
+
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+# Punctuation/filler that never changes the meaning of a question
+_NOISE_PATTERN = re.compile(r"[\s\W_]+", re.UNICODE)
+_FILLER_PATTERN = re.compile(r"(请问|请|帮我|麻烦|一下|please|can you|could you)")
+# Literals that must match exactly for two questions to share an answer
+_LITERAL_PATTERN = re.compile(r"\d+(?:\.\d+)?|'[^']*'|\"[^\"]*\"|“[^”]*”|‘[^’]*’")
+
+
+def normalize_question(question: str) -> str:
+    """Normalize a question for cache keying (width, case, punctuation, filler)."""
+    text = unicodedata.normalize("NFKC", question or "").lower()
+    text = _FILLER_PATTERN.sub(" ", text)
+    return _NOISE_PATTERN.sub("", text)
+
+
+def extract_literals(question: str) -> Tuple[str, ...]:
+    """Extract numbers and quoted values, which near-duplicates must share."""
+    text = unicodedata.normalize("NFKC", question or "").lower()
+    return tuple(sorted(_LITERAL_PATTERN.findall(text)))
+
+
+def schema_fingerprint(tables_data: dict) -> str:
+    """Compute a stable version string for a ``list_tables`` payload."""
+    tables = tables_data.get("data", []) if isinstance(tables_data, dict) else []
+    shape = sorted(
+        (
+            table.get("name", ""),
+            sorted(col.get("name", "") for col in table.get("keyColumns", [])),
+        )
+        for table in tables
+        if isinstance(table, dict)
+    )
+    digest = hashlib.sha1(json.dumps(shape, ensure_ascii=False).encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+class MinHasher:
+    """MinHash signatures over character n-grams."""
+
+    def __init__(self, num_perm: int = 64, ngram_size: int = 2, seed: int = 1):
+        self.num_perm = num_perm
+        self.ngram_size = ngram_size
+        rng = random.Random(seed)
+        self._perms = [
+            (rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME))
+            for _ in range(num_perm)
+        ]
+
+    def shingles(self, text: str) -> Set[str]:
+        if len(text) <= self.ngram_size:
+            return {text} if text else set()
+        return {
+            text[i : i + self.ngram_size]
+            for i in range(len(text) - self.ngram_size + 1)
+        }
+
+    def signature(self, text: str) -> List[int]:
+        hashes = [
+            int.from_bytes(
+                hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "little"
+            )
+            for s in self.shingles(text)
+        ]
+        if not hashes:
+            return [_MAX_HASH] * self.num_perm
+        return [
+            min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in hashes)
+            for a, b in self._perms
+        ]
+
+    @staticmethod
+    def similarity(sig_a: List[int], sig_b: List[int]) -> float:
+        """Estimate Jaccard similarity from two signatures."""
+        if not sig_a or len(sig_a) != len(sig_b):
+            return 0.0
+        return sum(1 for a, b in zip(sig_a, sig_b) if a == b) / len(sig_a)
+
+
+class QueryCacheEntry(BaseModel):
+    """A cached question with the SQL that answered it."""
+
+    question: str
+    normalized: str
+    schema_version: str
+    literals: List[str] = Field(default_factory=list)
+    signature: List[int] = Field(default_factory=list)
+    sqls: List[str] = Field(default_factory=list)
+    answer: str = ""
+    result_digest: str = ""
+    elapsed: float = Field(0.0, description="Seconds the full agent run took")
+    created_at: float = Field(default_factory=time.time)
+    hits: int = 0
+
+    @property
+    def key(self) -> str:
+        return f"{self.schema_version}:{self.normalized}"
+
+
+class QueryCacheMatch(BaseModel):
+    """Result of a successful cache lookup."""
+
+    entry: QueryCacheEntry
+    similarity: float
+    exact: bool
+
+
+class QueryCache:
+    """Process-wide NL-to-SQL cache with near-duplicate matching."""
+
+    def __init__(self, settings: Optional[QueryCacheSettings] = None):
+        self.settings = settings or QueryCacheSettings()
+        self.hasher = MinHasher(self.settings.num_perm, self.settings.ngram_size)
+        self._rows_per_band = max(1, self.settings.num_perm // self.settings.bands)
+        self._entries: "OrderedDict[str, QueryCacheEntry]" = OrderedDict()
+        self._buckets: Dict[Tuple[str, int, Tuple[int, ...]], Set[str]] = {}
+        self._lock = threading.RLock()
+        self._stats = {
+            "lookups": 0,
+            "exact_hits": 0,
+            "near_hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "invalidations": 0,
+            "saved_seconds": 0.0,
+        }
+        self._path = (
+            PROJECT_ROOT / self.settings.persist_path
+            if self.settings.persist_path
+            else None
+        )
+        self._load()
+
+    def _bands(self, entry: QueryCacheEntry) -> List[Tuple[str, int, Tuple[int, ...]]]:
+        r = self._rows_per_band
+        return [
+            (entry.schema_version, i, tuple(entry.signature[i * r : (i + 1) * r]))
+            for i in range(len(entry.signature) // r)
+        ]
+
+    def _is_expired(self, entry: QueryCacheEntry) -> bool:
+        return bool(self.settings.ttl) and time.time() - entry.created_at > self.settings.ttl
+
+    def _index(self, entry: QueryCacheEntry) -> None:
+        for band in self._bands(entry):
+            self._buckets.setdefault(band, set()).add(entry.key)
+
+    def _unindex(self, entry: QueryCacheEntry) -> None:
+        for band in self._bands(entry):
+            keys = self._buckets.get(band)
+            if keys:
+                keys.discard(entry.key)
+                if not keys:
+                    del self._buckets[band]
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry:
+            self._unindex(entry)
+
+    def lookup(self, question: str, schema_version: str) -> Optional[QueryCacheMatch]:
+        """Find an exact or near-duplicate entry for the question."""
+        normalized = normalize_question(question)
+        if not normalized:
+            return None
+
+        with self._lock:
+            self._stats["lookups"] += 1
+            key = f"{schema_version}:{normalized}"
+            entry = self._entries.get(key)
+            if entry and not self._is_expired(entry):
+                self._entries.move_to_end(key)
+                self._stats["exact_hits"] += 1
+                return QueryCacheMatch(entry=entry, similarity=1.0, exact=True)
+            if entry:
+                self._remove(key)
+
+            probe = QueryCacheEntry(
+                question=question,
+                normalized=normalized,
+                schema_version=schema_version,
+                signature=self.hasher.signature(normalized),
+            )
+            literals = list(extract_literals(question))
+            candidates: Set[str] = set()
+            for band in self._bands(probe):
+                candidates |= self._buckets.get(band, set())
+
+            best: Optional[QueryCacheEntry] = None
+            best_score = 0.0
+            for candidate_key in candidates:
+                candidate = self._entries.get(candidate_key)
+                if not candidate or candidate.literals != literals:
+                    continue
+                if self._is_expired(candidate):
+                    self._remove(candidate_key)
+                    continue
+                score = MinHasher.similarity(probe.signature, candidate.signature)
+                if score > best_score:
+                    best, best_score = candidate, score
+
+            if best and best_score >= self.settings.similarity_threshold:
+                self._entries.move_to_end(best.key)
+                self._stats["near_hits"] += 1
+                return QueryCacheMatch(entry=best, similarity=best_score, exact=False)
+
+            self._stats["misses"] += 1
+            return None
+
+    def store(
+        self,
+        question: str,
+        schema_version: str,
+        sqls: List[str],
+        answer: str,
+        result_digest: str = "",
+        elapsed: float = 0.0,
+    ) -> Optional[QueryCacheEntry]:
+        """Cache the SQL and final answer produced for a question."""
+        normalized = normalize_question(question)
+        if not normalized or not sqls or not answer:
+            return None
+
+        entry = QueryCacheEntry(
+            question=question,
+            normalized=normalized,
+            schema_version=schema_version,
+            literals=list(extract_literals(question)),
+            signature=self.hasher.signature(normalized),
+            sqls=sqls,
+            answer=answer,
+            result_digest=result_digest,
+            elapsed=elapsed,
+        )
+        with self._lock:
+            self._remove(entry.key)
+            self._entries[entry.key] = entry
+            self._index(entry)
+            while len(self._entries) > self.settings.max_entries:
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+            self._stats["stores"] += 1
+            self._save()
+        return entry
+
+    def record_hit(self, entry: QueryCacheEntry, elapsed: float) -> None:
+        """Account the latency saved by answering from the cache."""
+        with self._lock:
+            entry.hits += 1
+            self._stats["saved_seconds"] += max(0.0, entry.elapsed - elapsed)
+
+    def invalidate(self, entry: QueryCacheEntry) -> None:
+        """Drop an entry whose SQL no longer executes cleanly."""
+        with self._lock:
+            self._remove(entry.key)
+            self._stats["invalidations"] += 1
+            self._save()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._buckets.clear()
+            self._save()
+
+    def stats(self) -> dict:
+        """Return hit-rate and latency-saved counters."""
+        with self._lock:
+            stats = dict(self._stats)
+            hits = stats["exact_hits"] + stats["near_hits"]
+            stats["entries"] = len(self._entries)
+            stats["hit_rate"] = hits / stats["lookups"] if stats["lookups"] else 0.0
+            return stats
+
+    def report(self) -> str:
+        stats = self.stats()
+        return (
+            f"Query cache: {stats['exact_hits']} exact hits + {stats['near_hits']} near hints "
+            f"/ {stats['lookups']} lookups (hit rate {stats['hit_rate']:.1%}), "
+            f"{stats['entries']} entries, saved {stats['saved_seconds']:.1f}s"
+        )
+
+    def _load(self) -> None:
+        if not self._path or not self._path.exists():
+            return
+        try:
+            with self._path.open("r", encoding="utf-8") as f:
+                raw_entries = json.load(f)
+            for raw in raw_entries:
+                entry = QueryCacheEntry(**raw)
+                if len(entry.signature) != self.settings.num_perm:
+                    entry.signature = self.hasher.signature(entry.normalized)
+                if not self._is_expired(entry):
+                    self._entries[entry.key] = entry
+                    self._index(entry)
+            logger.info(f"Loaded {len(self._entries)} query cache entries from {self._path}")
+        except Exception as e:
+            logger.warning(f"Failed to load query cache from {self._path}: {e}")
+
+    def _save(self) -> None:
+        if not self._path:
+            return
+        try:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self._path.with_suffix(self._path.suffix + ".tmp")
+            with tmp_path.open("w", encoding="utf-8") as f:
+                json.dump(
+                    [entry.model_dump() for entry in self._entries.values()],
+                    f,
+                    ensure_ascii=False,
+                )
+            os.replace(tmp_path, self._path)
+        except Exception as e:
+            logger.warning(f"Failed to persist query cache to {self._path}: {e}")
+
+
+_query_cache: Optional[QueryCache] = None
+_query_cache_lock = threading.Lock()
+
+
+def get_query_cache() -> Optional[QueryCache]:
+    """Return the shared query cache, or None when disabled in config."""
+    global _query_cache
+    settings = config.query_cache_config
+    if not settings or not settings.enabled:
+        return None
+    if _query_cache is None:
+        with _query_cache_lock:
+            if _query_cache is None:
+                _query_cache = QueryCache(settings)
+    return _query_cache
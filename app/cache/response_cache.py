@@ -0,0 +1,215 @@
+"""Content-addressed cache of LLM responses.
+
+Each request is keyed by a hash of everything that determines the model's
+output (model, formatted messages, tools, tool choice, temperature and token
+limit), so replaying a session or re-running a batch of questions reuses the
+earlier responses instead of calling the provider again. Responses live in an
+in-memory LRU tier backed by an optional on-disk tier with size eviction.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from app.config import PROJECT_ROOT, ResponseCacheSettings, config
+from app.logger import logger
+
+
+class ResponseCache:
+    """Two-tier (memory + disk) cache of LLM response payloads."""
+
+    def __init__(self, settings: Optional[ResponseCacheSettings] = None):
+        self.settings = settings or ResponseCacheSettings()
+        self._memory: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        # key -> (file size, mtime) of the disk tier, oldest first
+        self._disk_index: "OrderedDict[str, tuple]" = OrderedDict()
+        self._disk_bytes = 0
+        self._lock = threading.RLock()
+        self._stats = {
+            "lookups": 0,
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "evictions": 0,
+            "saved_tokens": 0,
+        }
+        self._dir: Optional[Path] = None
+        if self.settings.disk_path:
+            path = Path(self.settings.disk_path)
+            self._dir = path if path.is_absolute() else PROJECT_ROOT / path
+            self._scan_disk()
+
+    @staticmethod
+    def key(**parts: Any) -> str:
+        """Hash request parts into a stable cache key.
+
+        Keys are sorted and non-JSON values stringified, so equal requests map
+        to the same key regardless of argument order.
+        """
+        canonical = json.dumps(
+            parts, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str
+        )
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def _is_expired(self, entry: Dict[str, Any]) -> bool:
+        ttl = self.settings.ttl
+        return bool(ttl) and time.time() - entry.get("created_at", 0) > ttl
+
+    def _file(self, key: str) -> Path:
+        return self._dir / key[:2] / f"{key}.json"
+
+    def _scan_disk(self) -> None:
+        if not self._dir.exists():
+            return
+        files = []
+        for path in self._dir.glob("*/*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            files.append((stat.st_mtime, path.stem, stat.st_size))
+        for mtime, key, size in sorted(files):
+            self._disk_index[key] = (size, mtime)
+            self._disk_bytes += size
+        if files:
+            logger.info(
+                f"Response cache: {len(files)} entries on disk in {self._dir} "
+                f"({self._disk_bytes / 1e6:.1f} MB)"
+            )
+
+    def _remember(self, key: str, entry: Dict[str, Any]) -> None:
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.settings.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _read_disk(self, key: str) -> Optional[Dict[str, Any]]:
+        if self._dir is None or key not in self._disk_index:
+            return None
+        try:
+            with self._file(key).open("r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception as e:
+            logger.warning(f"Failed to read cached LLM response {key[:12]}: {e}")
+            self._remove_disk(key)
+            return None
+
+    def _write_disk(self, key: str, entry: Dict[str, Any]) -> None:
+        if self._dir is None:
+            return
+        path = self._file(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(".tmp")
+            data = json.dumps(entry, ensure_ascii=False).encode("utf-8")
+            tmp_path.write_bytes(data)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f"Failed to persist LLM response to {path}: {e}")
+            return
+
+        self._remove_disk(key, unlink=False)
+        self._disk_index[key] = (len(data), time.time())
+        self._disk_bytes += len(data)
+
+        limit = self.settings.max_disk_mb * 1024 * 1024
+        while self._disk_bytes > limit and len(self._disk_index) > 1:
+            oldest = next(iter(self._disk_index))
+            self._remove_disk(oldest)
+            self._stats["evictions"] += 1
+
+    def _remove_disk(self, key: str, unlink: bool = True) -> None:
+        info = self._disk_index.pop(key, None)
+        if info:
+            self._disk_bytes -= info[0]
+        if unlink and self._dir is not None:
+            try:
+                self._file(key).unlink()
+            except OSError:
+                pass
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached payload for a key, or None on a miss."""
+        with self._lock:
+            self._stats["lookups"] += 1
+            entry = self._memory.get(key)
+            tier = "memory_hits"
+            if entry is None:
+                entry = self._read_disk(key)
+                tier = "disk_hits"
+            if entry is not None and self._is_expired(entry):
+                self._memory.pop(key, None)
+                self._remove_disk(key)
+                entry = None
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+
+            self._remember(key, entry)
+            if key in self._disk_index:
+                self._disk_index.move_to_end(key)
+            self._stats[tier] += 1
+            self._stats["saved_tokens"] += entry.get("tokens", 0)
+            return entry["payload"]
+
+    def put(self, key: str, payload: Any, tokens: int = 0) -> None:
+        """Store a JSON-serializable response payload.
+
+        Args:
+            key: Key from ``ResponseCache.key``.
+            payload: Response content (text or a dumped message).
+            tokens: Tokens the original call consumed, reported as saved on hits.
+        """
+        entry = {"payload": payload, "tokens": tokens, "created_at": time.time()}
+        with self._lock:
+            self._remember(key, entry)
+            self._write_disk(key, entry)
+            self._stats["stores"] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            for key in list(self._disk_index):
+                self._remove_disk(key)
+
+    def stats(self) -> dict:
+        """Return hit-rate and size counters."""
+        with self._lock:
+            stats = dict(self._stats)
+            hits = stats["memory_hits"] + stats["disk_hits"]
+            stats["memory_entries"] = len(self._memory)
+            stats["disk_entries"] = len(self._disk_index)
+            stats["disk_mb"] = self._disk_bytes / (1024 * 1024)
+            stats["hit_rate"] = hits / stats["lookups"] if stats["lookups"] else 0.0
+            return stats
+
+    def report(self) -> str:
+        stats = self.stats()
+        return (
+            f"LLM response cache: {stats['memory_hits']} memory + {stats['disk_hits']} disk hits "
+            f"/ {stats['lookups']} lookups (hit rate {stats['hit_rate']:.1%}), "
+            f"{stats['disk_entries']} entries on disk ({stats['disk_mb']:.1f} MB), "
+            f"saved ~{stats['saved_tokens']} tokens"
+        )
+
+
+_response_cache: Optional[ResponseCache] = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """Return the shared response cache, or None when disabled in config."""
+    global _response_cache
+    settings = config.response_cache_config
+    if not settings or not settings.enabled:
+        return None
+    if _response_cache is None:
+        with _response_cache_lock:
+            if _response_cache is None:
+                _response_cache = ResponseCache(settings)
+    return _response_cache
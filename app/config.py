@@ -212,6 +212,215 @@ class DatabaseSettings(BaseModel):
         }
 
 
+class QueryCacheSettings(BaseModel):
+    """Configuration for the natural-language-to-SQL semantic cache"""
+
+    enabled: bool = Field(False, description="Whether to cache generated SQL")
+    similarity_threshold: float = Field(
+        0.85,
+        description="Minimum estimated Jaccard similarity for a near hit (used as a SQL hint)",
+    )
+    ngram_size: int = Field(2, description="Character n-gram size for shingling")
+    num_perm: int = Field(64, description="Number of MinHash permutations")
+    bands: int = Field(16, description="Number of LSH bands")
+    max_entries: int = Field(1000, description="Maximum number of cached questions")
+    ttl: int = Field(86400, description="Entry lifetime in seconds (0 to disable)")
+    persist_path: Optional[str] = Field(
+        None, description="Optional JSON file (relative to project root) to persist entries"
+    )
+
+
+class ResponseCacheSettings(BaseModel):
+    """Configuration for the content-addressed LLM response cache"""
+
+    enabled: bool = Field(False, description="Whether to reuse identical LLM responses")
+    memory_entries: int = Field(512, description="Responses kept in the in-memory tier")
+    disk_path: Optional[str] = Field(
+        "cache/llm_responses",
+        description="Directory (relative to project root) of the on-disk tier; empty to disable",
+    )
+    max_disk_mb: float = Field(256.0, description="Size limit of the on-disk tier in MB")
+    ttl: int = Field(
+        7 * 86400, description="Entry lifetime in seconds (0 to disable)"
+    )
+
+
+class AgentSettings(BaseModel):
+    """Configuration for agent execution behaviour"""
+
+    fast_path: bool = Field(
+        False,
+        description="Answer simple questions with a single SQL-generation call before falling back to the full loop",
+    )
+    max_concurrent_tools: int = Field(
+        4,
+        description="Maximum number of parallel-safe tool calls from one response to run at once (1 disables)",
+    )
+    observation_token_budget: int = Field(
+        2000,
+        description="Tool output above this many tokens is replaced by a digest and stored out of band (0 disables)",
+    )
+    memory_token_budget: int = Field(
+        16000,
+        description="Token budget for conversation history; older tool output is pruned and old turns dropped above it (0 disables)",
+    )
+    memory_keep_recent: int = Field(
+        4, description="Most recent message groups that are never compacted"
+    )
+    summarize_history: bool = Field(
+        True, description="Summarize dropped history with one LLM call instead of discarding it"
+    )
+    stream_responses: bool = Field(
+        True,
+        description="Stream LLM output to status callbacks (e.g. the web UI) as it is generated",
+    )
+
+
+class LLMClientSettings(BaseModel):
+    """Configuration for the shared HTTP clients used to reach LLM providers"""
+
+    max_connections: int = Field(
+        100, description="Maximum concurrent connections per provider endpoint"
+    )
+    max_keepalive_connections: int = Field(
+        20, description="Idle connections kept open per provider endpoint"
+    )
+    keepalive_expiry: float = Field(
+        120.0, description="Seconds an idle connection is kept before closing"
+    )
+    connect_timeout: float = Field(10.0, description="Connection timeout in seconds")
+    warm_up: bool = Field(
+        False,
+        description="Open connections to configured providers when the API server starts",
+    )
+
+
+class LLMRetrySettings(BaseModel):
+    """Configuration for deadline-based retries and hedged LLM requests"""
+
+    max_attempts: int = Field(4, description="Maximum attempts per LLM call")
+    attempt_timeout: float = Field(
+        120.0, description="Seconds a single attempt may take before it is retried"
+    )
+    query_budget: float = Field(
+        300.0,
+        description=(
+            "Total seconds spent in LLM calls for one agent query (0 for no limit); "
+            "tool calls and rate-limiter waits are not counted"
+        ),
+    )
+    base_delay: float = Field(0.5, description="Initial backoff between attempts")
+    max_delay: float = Field(8.0, description="Maximum backoff between attempts")
+    hedge: bool = Field(
+        False,
+        description="Send a duplicate request when the first exceeds the latency percentile",
+    )
+    hedge_percentile: float = Field(
+        0.95, description="Latency percentile after which a hedged request is sent"
+    )
+    hedge_min_samples: int = Field(
+        20, description="Latencies to observe before hedging starts"
+    )
+    hedge_min_delay: float = Field(
+        1.0, description="Never hedge earlier than this many seconds"
+    )
+    latency_window: int = Field(
+        200, description="Number of recent latencies used for the percentile"
+    )
+
+
+class TokenizerSettings(BaseModel):
+    """Configuration for prompt token counting"""
+
+    mode: str = Field(
+        "exact",
+        description="'exact' (tiktoken) or 'estimate' (fast character-based estimate)",
+    )
+    cache_dir: Optional[str] = Field(
+        "cache/tiktoken",
+        description="Directory (relative to project root) caching tiktoken BPE files",
+    )
+    weights: Dict[str, List[float]] = Field(
+        default_factory=dict,
+        description="Per-model estimate weights: tokens per word, digit, punctuation and CJK char",
+    )
+
+
+class JobSettings(BaseModel):
+    """Configuration for the asynchronous query job API"""
+
+    workers: int = Field(2, description="Agent runs processed concurrently")
+    max_queued: int = Field(100, description="Jobs accepted but not yet started")
+    result_ttl: int = Field(3600, description="Seconds finished jobs are kept")
+    dedicated_pool: bool = Field(
+        True,
+        description=(
+            "Run jobs on their own MCP server and database pool instead of sharing "
+            "the websocket sessions' ones"
+        ),
+    )
+
+
+class IngestSettings(BaseModel):
+    """Configuration for loading uploaded CSV files into the database"""
+
+    batch_size: int = Field(2000, description="Rows inserted per executemany batch")
+    sample_rows: int = Field(1000, description="Rows sampled to infer column types")
+    chunk_bytes: int = Field(1024 * 1024, description="Upload read size in bytes")
+
+
+class AgentPoolSettings(BaseModel):
+    """Configuration for the pool of warm agents used by the websocket endpoint"""
+
+    enabled: bool = Field(
+        True, description="Lease pre-initialized agents instead of creating one per connection"
+    )
+    warm_sessions: int = Field(2, description="Agent sessions prepared ahead of connections")
+    max_idle: int = Field(8, description="Released sessions kept for reuse")
+    max_age: int = Field(
+        1800,
+        description="Seconds before the MCP connection and catalog are rebuilt in the background (0 to disable)",
+    )
+    mcp_command: Optional[str] = Field(
+        None, description="MCP server command (defaults to the current Python interpreter)"
+    )
+    mcp_args: List[str] = Field(
+        default_factory=lambda: ["-m", "mysql_mcp_server.server"],
+        description="MCP server arguments",
+    )
+    loading_strategy: str = Field(
+        "on_demand", description="Metadata loading strategy: auto/full/on_demand"
+    )
+
+
+class LLMRateLimitSettings(BaseModel):
+    """Process-wide limits on LLM requests shared by all agents"""
+
+    max_concurrent_requests: int = Field(
+        0, description="Maximum LLM calls in flight at once (0 for no limit)"
+    )
+    requests_per_minute: int = Field(
+        0, description="Maximum LLM calls started per minute (0 for no limit)"
+    )
+
+
+class ModelRoutingSettings(BaseModel):
+    """Configuration for choosing an LLM per agent step type"""
+
+    enabled: bool = Field(False, description="Whether to route steps to different models")
+    routes: Dict[str, List[str]] = Field(
+        default_factory=dict,
+        description="Step type (exploration, sql_generation, answer_synthesis) to candidate [llm.<name>] configs",
+    )
+    prefer_fastest: bool = Field(
+        False,
+        description="Pick the candidate with the lowest observed latency instead of the first",
+    )
+    latency_alpha: float = Field(
+        0.3, description="Smoothing factor of the latency moving average"
+    )
+
+
 class MCPServerConfig(BaseModel):
     """Configuration for a single MCP server"""
 
@@ -277,6 +486,39 @@ class AppConfig(BaseModel):
     database_config: Optional[DatabaseSettings] = Field(
         None, description="Database configuration"
     )
+    query_cache_config: Optional[QueryCacheSettings] = Field(
+        None, description="Query cache configuration"
+    )
+    response_cache_config: Optional[ResponseCacheSettings] = Field(
+        None, description="LLM response cache configuration"
+    )
+    agent_config: Optional[AgentSettings] = Field(
+        None, description="Agent execution configuration"
+    )
+    llm_client_config: Optional[LLMClientSettings] = Field(
+        None, description="LLM HTTP client configuration"
+    )
+    llm_retry_config: Optional[LLMRetrySettings] = Field(
+        None, description="LLM retry and hedging configuration"
+    )
+    llm_rate_limit_config: Optional[LLMRateLimitSettings] = Field(
+        None, description="Global LLM rate limit configuration"
+    )
+    agent_pool_config: Optional[AgentPoolSettings] = Field(
+        None, description="Warm agent pool configuration"
+    )
+    ingest_config: Optional[IngestSettings] = Field(
+        None, description="CSV ingestion configuration"
+    )
+    job_config: Optional[JobSettings] = Field(
+        None, description="Query job API configuration"
+    )
+    tokenizer_config: Optional[TokenizerSettings] = Field(
+        None, description="Token counting configuration"
+    )
+    model_routing_config: Optional[ModelRoutingSettings] = Field(
+        None, description="Per-step model routing configuration"
+    )
 
     class Config:
         arbitrary_types_allowed = True
@@ -462,6 +704,72 @@ class Config:
         if database_config:
             database_settings = DatabaseSettings(**database_config)
 
+        query_cache_config = raw_config.get("query_cache")
+        if query_cache_config:
+            query_cache_settings = QueryCacheSettings(**query_cache_config)
+        else:
+            query_cache_settings = QueryCacheSettings()
+
+        response_cache_config = raw_config.get("response_cache")
+        if response_cache_config:
+            response_cache_settings = ResponseCacheSettings(**response_cache_config)
+        else:
+            response_cache_settings = ResponseCacheSettings()
+
+        agent_config = raw_config.get("agent")
+        if agent_config:
+            agent_settings = AgentSettings(**agent_config)
+        else:
+            agent_settings = AgentSettings()
+
+        llm_client_config = raw_config.get("llm_client")
+        if llm_client_config:
+            llm_client_settings = LLMClientSettings(**llm_client_config)
+        else:
+            llm_client_settings = LLMClientSettings()
+
+        llm_retry_config = raw_config.get("llm_retry")
+        if llm_retry_config:
+            llm_retry_settings = LLMRetrySettings(**llm_retry_config)
+        else:
+            llm_retry_settings = LLMRetrySettings()
+
+        llm_rate_limit_config = raw_config.get("llm_rate_limit")
+        if llm_rate_limit_config:
+            llm_rate_limit_settings = LLMRateLimitSettings(**llm_rate_limit_config)
+        else:
+            llm_rate_limit_settings = LLMRateLimitSettings()
+
+        agent_pool_config = raw_config.get("agent_pool")
+        if agent_pool_config:
+            agent_pool_settings = AgentPoolSettings(**agent_pool_config)
+        else:
+            agent_pool_settings = AgentPoolSettings()
+
+        ingest_config = raw_config.get("ingest")
+        if ingest_config:
+            ingest_settings = IngestSettings(**ingest_config)
+        else:
+            ingest_settings = IngestSettings()
+
+        job_config = raw_config.get("jobs")
+        if job_config:
+            job_settings = JobSettings(**job_config)
+        else:
+            job_settings = JobSettings()
+
+        tokenizer_config = raw_config.get("tokenizer")
+        if tokenizer_config:
+            tokenizer_settings = TokenizerSettings(**tokenizer_config)
+        else:
+            tokenizer_settings = TokenizerSettings()
+
+        model_routing_config = raw_config.get("model_routing")
+        if model_routing_config:
+            model_routing_settings = ModelRoutingSettings(**model_routing_config)
+        else:
+            model_routing_settings = ModelRoutingSettings()
+
         config_dict = {
             "llm": {
                 "default": default_settings,
@@ -476,6 +784,17 @@ class Config:
             "mcp_config": mcp_settings,
             "run_flow_config": run_flow_settings,
             "database_config": database_settings,
+            "query_cache_config": query_cache_settings,
+            "response_cache_config": response_cache_settings,
+            "agent_config": agent_settings,
+            "llm_client_config": llm_client_settings,
+            "llm_retry_config": llm_retry_settings,
+            "llm_rate_limit_config": llm_rate_limit_settings,
+            "agent_pool_config": agent_pool_settings,
+            "ingest_config": ingest_settings,
+            "job_config": job_settings,
+            "tokenizer_config": tokenizer_settings,
+            "model_routing_config": model_routing_settings,
         }
 
         self._config = AppConfig(**config_dict)
@@ -511,6 +830,61 @@ class Config:
         """Get the database configuration"""
         return self._config.database_config
 
+    @property
+    def query_cache_config(self) -> QueryCacheSettings:
+        """Get the query cache configuration"""
+        return self._config.query_cache_config
+
+    @property
+    def response_cache_config(self) -> ResponseCacheSettings:
+        """Get the LLM response cache configuration"""
+        return self._config.response_cache_config
+
+    @property
+    def agent_config(self) -> AgentSettings:
+        """Get the agent execution configuration"""
+        return self._config.agent_config
+
+    @property
+    def llm_client_config(self) -> LLMClientSettings:
+        """Get the LLM HTTP client configuration"""
+        return self._config.llm_client_config
+
+    @property
+    def llm_retry_config(self) -> LLMRetrySettings:
+        """Get the LLM retry and hedging configuration"""
+        return self._config.llm_retry_config
+
+    @property
+    def llm_rate_limit_config(self) -> LLMRateLimitSettings:
+        """Get the global LLM rate limit configuration"""
+        return self._config.llm_rate_limit_config
+
+    @property
+    def agent_pool_config(self) -> AgentPoolSettings:
+        """Get the warm agent pool configuration"""
+        return self._config.agent_pool_config
+
+    @property
+    def ingest_config(self) -> IngestSettings:
+        """Get the CSV ingestion configuration"""
+        return self._config.ingest_config
+
+    @property
+    def job_config(self) -> JobSettings:
+        """Get the query job API configuration"""
+        return self._config.job_config
+
+    @property
+    def tokenizer_config(self) -> TokenizerSettings:
+        """Get the token counting configuration"""
+        return self._config.tokenizer_config
+
+    @property
+    def model_routing_config(self) -> ModelRoutingSettings:
+        """Get the per-step model routing configuration"""
+        return self._config.model_routing_config
+
     @property
     def workspace_root(self) -> Path:
         """Get the workspace root directory"""
@@ -11,3 +11,11 @@ class OpenManusError(Exception):
 
 class TokenLimitExceeded(OpenManusError):
     """Exception raised when the token limit is exceeded"""
+
+
+class EmptyResponseError(OpenManusError, ValueError):
+    """Exception raised when the LLM returns an empty response"""
+
+
+class DeadlineExceeded(OpenManusError, TimeoutError):
+    """Exception raised when the latency budget of a query is used up"""
@@ -1,34 +1,48 @@
 import math
-from typing import Dict, List, Optional, Union
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
 
-import tiktoken
 from openai import (
     APIError,
-    AsyncAzureOpenAI,
-    AsyncOpenAI,
     AuthenticationError,
     OpenAIError,
     RateLimitError,
 )
-from openai.types.chat import ChatCompletion, ChatCompletionMessage
-from tenacity import (
-    retry,
-    retry_if_exception_type,
-    stop_after_attempt,
-    wait_random_exponential,
+from openai.types.chat import (
+    ChatCompletion,
+    ChatCompletionMessage,
+    ChatCompletionMessageToolCall,
 )
+from openai.types.chat.chat_completion_message_tool_call import Function
 
-from app.bedrock import BedrockClient
+from app.cache import ResponseCache, get_response_cache
 from app.config import LLMSettings, config
-from app.exceptions import TokenLimitExceeded
+from app.exceptions import EmptyResponseError, TokenLimitExceeded
+from app.llm_client import get_client
 from app.logger import logger  # Assuming a logger is set up in your app
+from app.retry import RetryPolicy, with_retry_policy
 from app.schema import (
     ROLE_VALUES,
     TOOL_CHOICE_TYPE,
     TOOL_CHOICE_VALUES,
+    Memory,
     Message,
     ToolChoice,
 )
+from app.tokenizer import get_tokenizer
 
 
 REASONING_MODELS = ["o1", "o3-mini"]
@@ -42,6 +56,39 @@ MULTIMODAL_MODELS = [
 ]
 
 
+@dataclass
+class TokenUsage:
+    """Tokens consumed by the LLM calls made inside ``track_token_usage``"""
+
+    input_tokens: int = 0
+    completion_tokens: int = 0
+
+    @property
+    def total_tokens(self) -> int:
+        return self.input_tokens + self.completion_tokens
+
+
+# Usage records of the enclosing ``track_token_usage`` blocks, innermost last
+_token_usage: ContextVar[Tuple[TokenUsage, ...]] = ContextVar(
+    "llm_token_usage", default=()
+)
+
+
+@contextmanager
+def track_token_usage() -> Iterator[TokenUsage]:
+    """Attribute the tokens of LLM calls made in this context to one record.
+
+    The record follows the context into tasks started inside the block, so
+    concurrent queries sharing an ``LLM`` instance are accounted separately.
+    """
+    usage = TokenUsage()
+    token = _token_usage.set(_token_usage.get() + (usage,))
+    try:
+        yield usage
+    finally:
+        _token_usage.reset(token)
+
+
 class TokenCounter:
     # Token constants
     BASE_MESSAGE_TOKENS = 4
@@ -55,11 +102,12 @@ class TokenCounter:
     TILE_SIZE = 512
 
     def __init__(self, tokenizer):
+        # Anything with ``count(text) -> int``, see ``app.tokenizer``
         self.tokenizer = tokenizer
 
     def count_text(self, text: str) -> int:
         """Calculate tokens for a text string"""
-        return 0 if not text else len(self.tokenizer.encode(text))
+        return 0 if not text else self.tokenizer.count(text)
 
     def count_image(self, image_item: dict) -> int:
         """
@@ -144,29 +192,45 @@ class TokenCounter:
                 token_count += self.count_text(function.get("arguments", ""))
         return token_count
 
-    def count_message_tokens(self, messages: List[dict]) -> int:
-        """Calculate the total number of tokens in a message list"""
-        total_tokens = self.FORMAT_TOKENS  # Base format tokens
+    def count_single_message(self, message: dict) -> int:
+        """Calculate the tokens of one message, excluding list format tokens"""
+        tokens = self.BASE_MESSAGE_TOKENS  # Base tokens per message
 
-        for message in messages:
-            tokens = self.BASE_MESSAGE_TOKENS  # Base tokens per message
+        # Add role tokens
+        tokens += self.count_text(message.get("role", ""))
+
+        # Add content tokens
+        if "content" in message:
+            tokens += self.count_content(message["content"])
+
+        # Add tool calls tokens
+        if "tool_calls" in message:
+            tokens += self.count_tool_calls(message["tool_calls"])
 
-            # Add role tokens
-            tokens += self.count_text(message.get("role", ""))
+        # Add name and tool_call_id tokens
+        tokens += self.count_text(message.get("name", ""))
+        tokens += self.count_text(message.get("tool_call_id", ""))
 
-            # Add content tokens
-            if "content" in message:
-                tokens += self.count_content(message["content"])
+        return tokens
 
-            # Add tool calls tokens
-            if "tool_calls" in message:
-                tokens += self.count_tool_calls(message["tool_calls"])
+    def count_message_tokens(self, messages: List[Union[dict, Message]]) -> int:
+        """Calculate the total number of tokens in a message list
 
-            # Add name and tool_call_id tokens
-            tokens += self.count_text(message.get("name", ""))
-            tokens += self.count_text(message.get("tool_call_id", ""))
+        The cost of a ``Message`` is cached on the message itself (see
+        ``Memory.token_cost``), so on each agent step only messages added since
+        the previous request are tokenized. Dicts are counted every time.
+        """
+        total_tokens = self.FORMAT_TOKENS  # Base format tokens
 
-            total_tokens += tokens
+        for message in messages:
+            if isinstance(message, Message):
+                # The cached cost is that of a one-message list
+                total_tokens += (
+                    Memory.token_cost(message, self.count_message_tokens)
+                    - self.FORMAT_TOKENS
+                )
+            else:
+                total_tokens += self.count_single_message(message)
 
         return total_tokens
 
@@ -188,69 +252,103 @@ class LLM:
         """Clear all cached LLM instances to force re-initialization with new config"""
         cls._instances = {}
 
+    @classmethod
+    def reload_settings(cls) -> None:
+        """Apply the current config to existing instances in place.
+
+        Provider clients come from a shared registry, so connection pools are
+        kept across reloads and requests already in flight are unaffected.
+        """
+        for config_name, instance in list(cls._instances.items()):
+            if instance._from_global_config:
+                instance._apply_settings(
+                    config.llm.get(config_name, config.llm["default"])
+                )
+
     def __init__(
         self, config_name: str = "default", llm_config: Optional[LLMSettings] = None
     ):
         if not hasattr(self, "client"):  # Only initialize if not already initialized
+            self.config_name = config_name
+            self._from_global_config = llm_config is None
             llm_config = llm_config or config.llm
             llm_config = llm_config.get(config_name, llm_config["default"])
-            self.model = llm_config.model
-            self.max_tokens = llm_config.max_tokens
-            self.temperature = llm_config.temperature
-            self.api_type = llm_config.api_type
-            self.api_key = llm_config.api_key
-            self.api_version = llm_config.api_version
-            self.base_url = llm_config.base_url
 
             # Add token counting related attributes
             self.total_input_tokens = 0
             self.total_completion_tokens = 0
-            self.max_input_tokens = (
-                llm_config.max_input_tokens
-                if hasattr(llm_config, "max_input_tokens")
-                else None
-            )
 
-            # Initialize tokenizer
-            try:
-                self.tokenizer = tiktoken.encoding_for_model(self.model)
-            except KeyError:
-                # If the model is not in tiktoken's presets, use cl100k_base as default
-                self.tokenizer = tiktoken.get_encoding("cl100k_base")
-
-            if self.api_type == "azure":
-                self.client = AsyncAzureOpenAI(
-                    base_url=self.base_url,
-                    api_key=self.api_key,
-                    api_version=self.api_version,
-                )
-            elif self.api_type == "aws":
-                self.client = BedrockClient()
-            else:
-                self.client = AsyncOpenAI(api_key=self.api_key, base_url=self.base_url)
+            # Retries and hedging; latency percentiles are tracked per instance
+            self.retry_policy = RetryPolicy()
+
+            self._apply_settings(llm_config)
+
+    def _apply_settings(self, llm_config: LLMSettings) -> None:
+        """Apply provider settings; the API client is shared per endpoint"""
+        previous_model = getattr(self, "model", None)
+        self.model = llm_config.model
+        self.max_tokens = llm_config.max_tokens
+        self.temperature = llm_config.temperature
+        self.api_type = llm_config.api_type
+        self.api_key = llm_config.api_key
+        self.api_version = llm_config.api_version
+        self.base_url = llm_config.base_url
+        self.max_input_tokens = (
+            llm_config.max_input_tokens
+            if hasattr(llm_config, "max_input_tokens")
+            else None
+        )
 
+        # Tokenizers load their encoding on first use; keep the cached token
+        # costs if the model is unchanged
+        if previous_model != self.model or not hasattr(self, "tokenizer"):
+            self.tokenizer = get_tokenizer(self.model)
             self.token_counter = TokenCounter(self.tokenizer)
 
+        self.client = get_client(llm_config)
+
     def count_tokens(self, text: str) -> int:
         """Calculate the number of tokens in a text"""
         if not text:
             return 0
-        return len(self.tokenizer.encode(text))
+        return self.tokenizer.count(text)
 
-    def count_message_tokens(self, messages: List[dict]) -> int:
+    def count_message_tokens(self, messages: List[Union[dict, Message]]) -> int:
         return self.token_counter.count_message_tokens(messages)
 
+    def _count_input_tokens(
+        self, messages: List[Union[dict, Message]], supports_images: bool
+    ) -> int:
+        """Count request messages before formatting, reusing cached Message costs"""
+        counted: List[Union[dict, Message]] = []
+        for message in messages:
+            if isinstance(message, Message) and not (
+                supports_images and message.base64_image
+            ):
+                counted.append(message)
+            else:
+                # Images become content parts; format a copy so the caller's dict is kept
+                if isinstance(message, dict):
+                    message = dict(message)
+                counted.extend(self.format_messages([message], supports_images))
+        return self.count_message_tokens(counted)
+
     def update_token_count(self, input_tokens: int, completion_tokens: int = 0) -> None:
         """Update token counts"""
-        # Only track tokens if max_input_tokens is set
-        self.total_input_tokens += input_tokens
-        self.total_completion_tokens += completion_tokens
+        self._record_usage(input_tokens, completion_tokens)
         logger.info(
             f"Token usage: Input={input_tokens}, Completion={completion_tokens}, "
             f"Cumulative Input={self.total_input_tokens}, Cumulative Completion={self.total_completion_tokens}, "
             f"Total={input_tokens + completion_tokens}, Cumulative Total={self.total_input_tokens + self.total_completion_tokens}"
         )
 
+    def _record_usage(self, input_tokens: int, completion_tokens: int) -> None:
+        self.total_input_tokens += input_tokens
+        self.total_completion_tokens += completion_tokens
+        for usage in _token_usage.get():
+            usage.input_tokens += input_tokens
+            usage.completion_tokens += completion_tokens
+
     def check_token_limit(self, input_tokens: int) -> bool:
         """Check if token limits are exceeded"""
         if self.max_input_tokens is not None:
@@ -356,19 +454,173 @@ class LLM:
 
         return formatted_messages
 
-    @retry(
-        wait=wait_random_exponential(min=1, max=60),
-        stop=stop_after_attempt(6),
-        retry=retry_if_exception_type(
-            (OpenAIError, Exception, ValueError)
-        ),  # Don't retry TokenLimitExceeded
-    )
+    @staticmethod
+    def _response_cache_key(params: dict) -> Optional[str]:
+        """Content address of a request, or None when the response cache is off"""
+        if get_response_cache() is None:
+            return None
+        return ResponseCache.key(
+            model=params["model"],
+            messages=params["messages"],
+            tools=params.get("tools"),
+            tool_choice=params.get("tool_choice"),
+            temperature=params.get("temperature"),
+            max_tokens=params.get("max_tokens", params.get("max_completion_tokens")),
+        )
+
+    def _build_request(
+        self,
+        messages: List[Union[dict, Message]],
+        system_msgs: Optional[List[Union[dict, Message]]],
+        temperature: Optional[float],
+    ) -> Tuple[dict, int]:
+        """Validate a text request, check token limits and build its params"""
+        # Check if the model supports images
+        supports_images = self.model in MULTIMODAL_MODELS
+
+        # Calculate input token count, before formatting drops the Message objects
+        input_tokens = self._count_input_tokens(
+            list(system_msgs or []) + list(messages), supports_images
+        )
+
+        # Format system and user messages with image support check
+        if system_msgs:
+            system_msgs = self.format_messages(system_msgs, supports_images)
+            messages = system_msgs + self.format_messages(messages, supports_images)
+        else:
+            messages = self.format_messages(messages, supports_images)
+
+        # Check if token limits are exceeded
+        if not self.check_token_limit(input_tokens):
+            error_message = self.get_limit_error_message(input_tokens)
+            # Raise a special exception that won't be retried
+            raise TokenLimitExceeded(error_message)
+
+        params = {
+            "model": self.model,
+            "messages": messages,
+        }
+
+        if self.model in REASONING_MODELS:
+            params["max_completion_tokens"] = self.max_tokens
+        else:
+            params["max_tokens"] = self.max_tokens
+            params["temperature"] = (
+                temperature if temperature is not None else self.temperature
+            )
+        return params, input_tokens
+
+    async def _stream_text(
+        self,
+        params: dict,
+        input_tokens: int,
+        open_stream: Callable[[dict], Awaitable[Any]],
+    ) -> AsyncIterator[dict]:
+        """Stream a text completion and record its usage.
+
+        Yields ``{"type": "content", "content": str}`` deltas, then
+        ``{"type": "message", "content": str, "total_tokens": int}`` with the
+        assembled text. Usage reported by the provider is used when available,
+        otherwise the completion is counted locally.
+
+        ``open_stream`` is ``_open_stream`` for standalone streams, and
+        ``_create_stream`` inside methods that already hold a retry policy.
+        """
+        params = {**params, "stream": True}
+        if self.api_type != "azure":
+            params["stream_options"] = {"include_usage": True}
+
+        stream = await open_stream(params)
+
+        parts: List[str] = []
+        usage = None
+        async for chunk in stream:
+            if getattr(chunk, "usage", None):
+                usage = chunk.usage
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                parts.append(delta)
+                yield {"type": "content", "content": delta}
+
+        content = "".join(parts)
+        if usage:
+            prompt_tokens, completion_tokens = (
+                usage.prompt_tokens,
+                usage.completion_tokens,
+            )
+        else:
+            prompt_tokens, completion_tokens = input_tokens, self.count_tokens(content)
+        self.update_token_count(prompt_tokens, completion_tokens)
+        yield {
+            "type": "message",
+            "content": content,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+
+    async def ask_stream(
+        self,
+        messages: List[Union[dict, Message]],
+        system_msgs: Optional[List[Union[dict, Message]]] = None,
+        temperature: Optional[float] = None,
+    ) -> AsyncIterator[dict]:
+        """
+        Streaming variant of ``ask``.
+
+        Yields events as the response is generated:
+            {"type": "content", "content": str}: a content delta
+            {"type": "message", "content": str}: the full response, always last
+
+        Only opening the stream is retried; once deltas have been yielded, a
+        failure is raised to the caller.
+
+        Raises:
+            The same errors as ``ask``.
+        """
+        async for event in self._ask_stream(
+            messages, system_msgs, temperature, self._open_stream
+        ):
+            yield event
+
+    async def _ask_stream(
+        self,
+        messages: List[Union[dict, Message]],
+        system_msgs: Optional[List[Union[dict, Message]]],
+        temperature: Optional[float],
+        open_stream: Callable[[dict], Awaitable[Any]],
+    ) -> AsyncIterator[dict]:
+        params, input_tokens = self._build_request(messages, system_msgs, temperature)
+
+        cache_key = self._response_cache_key(params)
+        if cache_key:
+            cached = get_response_cache().get(cache_key)
+            if cached is not None:
+                yield {"type": "content", "content": cached}
+                yield {"type": "message", "content": cached}
+                return
+
+        content, total_tokens = "", 0
+        async for event in self._stream_text(params, input_tokens, open_stream):
+            if event["type"] == "content":
+                yield event
+            else:
+                content, total_tokens = event["content"].strip(), event["total_tokens"]
+        if not content:
+            raise EmptyResponseError("Empty response from streaming LLM")
+
+        if cache_key:
+            get_response_cache().put(cache_key, content, total_tokens)
+        yield {"type": "message", "content": content}
+
+    @with_retry_policy(hedge_if=lambda kwargs: kwargs.get("stream") is False)
     async def ask(
         self,
         messages: List[Union[dict, Message]],
         system_msgs: Optional[List[Union[dict, Message]]] = None,
         stream: bool = True,
         temperature: Optional[float] = None,
+        on_delta: Optional[Callable[[str], Awaitable[None]]] = None,
     ) -> str:
         """
         Send a prompt to the LLM and get the response.
@@ -378,6 +630,9 @@ class LLM:
             system_msgs: Optional system messages to prepend
             stream (bool): Whether to stream the response
             temperature (float): Sampling temperature for the response
+            on_delta: Awaited with each content delta of a streamed response.
+                If the stream fails midway and the call is retried, the
+                retried response is delivered from its start.
 
         Returns:
             str: The generated response
@@ -389,80 +644,44 @@ class LLM:
             Exception: For unexpected errors
         """
         try:
-            # Check if the model supports images
-            supports_images = self.model in MULTIMODAL_MODELS
-
-            # Format system and user messages with image support check
-            if system_msgs:
-                system_msgs = self.format_messages(system_msgs, supports_images)
-                messages = system_msgs + self.format_messages(messages, supports_images)
-            else:
-                messages = self.format_messages(messages, supports_images)
-
-            # Calculate input token count
-            input_tokens = self.count_message_tokens(messages)
-
-            # Check if token limits are exceeded
-            if not self.check_token_limit(input_tokens):
-                error_message = self.get_limit_error_message(input_tokens)
-                # Raise a special exception that won't be retried
-                raise TokenLimitExceeded(error_message)
-
-            params = {
-                "model": self.model,
-                "messages": messages,
-            }
-
-            if self.model in REASONING_MODELS:
-                params["max_completion_tokens"] = self.max_tokens
-            else:
-                params["max_tokens"] = self.max_tokens
-                params["temperature"] = (
-                    temperature if temperature is not None else self.temperature
-                )
-
-            if not stream:
-                # Non-streaming request
-                response = await self.client.chat.completions.create(
-                    **params, stream=False
-                )
-
-                if not response.choices or not response.choices[0].message.content:
-                    raise ValueError("Empty or invalid response from LLM")
-
-                # Update token counts
-                self.update_token_count(
-                    response.usage.prompt_tokens, response.usage.completion_tokens
-                )
-
-                return response.choices[0].message.content
-
-            # Streaming request, For streaming, update estimated token count before making the request
-            self.update_token_count(input_tokens)
+            if stream:
+                content = ""
+                # Already under the retry policy and holding a rate limiter slot
+                async for event in self._ask_stream(
+                    messages, system_msgs, temperature, self._create_stream
+                ):
+                    if event["type"] == "message":
+                        content = event["content"]
+                    elif on_delta is not None:
+                        await on_delta(event["content"])
+                return content
+
+            params, input_tokens = self._build_request(
+                messages, system_msgs, temperature
+            )
 
-            response = await self.client.chat.completions.create(**params, stream=True)
+            cache_key = self._response_cache_key(params)
+            if cache_key:
+                cached = get_response_cache().get(cache_key)
+                if cached is not None:
+                    return cached
 
-            collected_messages = []
-            completion_text = ""
-            async for chunk in response:
-                chunk_message = chunk.choices[0].delta.content or ""
-                collected_messages.append(chunk_message)
-                completion_text += chunk_message
-                print(chunk_message, end="", flush=True)
+            response = await self.client.chat.completions.create(
+                **params, stream=False
+            )
 
-            print()  # Newline after streaming
-            full_response = "".join(collected_messages).strip()
-            if not full_response:
-                raise ValueError("Empty response from streaming LLM")
+            if not response.choices or not response.choices[0].message.content:
+                raise EmptyResponseError("Empty or invalid response from LLM")
 
-            # estimate completion tokens for streaming response
-            completion_tokens = self.count_tokens(completion_text)
-            logger.info(
-                f"Estimated completion tokens for streaming response: {completion_tokens}"
+            # Update token counts
+            self.update_token_count(
+                response.usage.prompt_tokens, response.usage.completion_tokens
             )
-            self.total_completion_tokens += completion_tokens
 
-            return full_response
+            content = response.choices[0].message.content
+            if cache_key:
+                get_response_cache().put(cache_key, content, response.usage.total_tokens)
+            return content
 
         except TokenLimitExceeded:
             # Re-raise token limit errors without logging
@@ -483,13 +702,7 @@ class LLM:
             logger.exception(f"Unexpected error in ask")
             raise
 
-    @retry(
-        wait=wait_random_exponential(min=1, max=60),
-        stop=stop_after_attempt(6),
-        retry=retry_if_exception_type(
-            (OpenAIError, Exception, ValueError)
-        ),  # Don't retry TokenLimitExceeded
-    )
+    @with_retry_policy(hedge_if=lambda kwargs: not kwargs.get("stream", False))
     async def ask_with_images(
         self,
         messages: List[Union[dict, Message]],
@@ -497,6 +710,7 @@ class LLM:
         system_msgs: Optional[List[Union[dict, Message]]] = None,
         stream: bool = False,
         temperature: Optional[float] = None,
+        on_delta: Optional[Callable[[str], Awaitable[None]]] = None,
     ) -> str:
         """
         Send a prompt with images to the LLM and get the response.
@@ -507,6 +721,7 @@ class LLM:
             system_msgs: Optional system messages to prepend
             stream (bool): Whether to stream the response
             temperature (float): Sampling temperature for the response
+            on_delta: Awaited with each content delta of a streamed response
 
         Returns:
             str: The generated response
@@ -591,32 +806,45 @@ class LLM:
                     temperature if temperature is not None else self.temperature
                 )
 
+            cache_key = self._response_cache_key(params)
+            if cache_key:
+                cached = get_response_cache().get(cache_key)
+                if cached is not None:
+                    return cached
+
             # Handle non-streaming request
             if not stream:
                 response = await self.client.chat.completions.create(**params)
 
                 if not response.choices or not response.choices[0].message.content:
-                    raise ValueError("Empty or invalid response from LLM")
+                    raise EmptyResponseError("Empty or invalid response from LLM")
 
-                self.update_token_count(response.usage.prompt_tokens)
-                return response.choices[0].message.content
+                self.update_token_count(
+                    response.usage.prompt_tokens, response.usage.completion_tokens
+                )
+                content = response.choices[0].message.content
+                if cache_key:
+                    get_response_cache().put(
+                        cache_key, content, response.usage.total_tokens
+                    )
+                return content
 
             # Handle streaming request
-            self.update_token_count(input_tokens)
-            response = await self.client.chat.completions.create(**params)
-
-            collected_messages = []
-            async for chunk in response:
-                chunk_message = chunk.choices[0].delta.content or ""
-                collected_messages.append(chunk_message)
-                print(chunk_message, end="", flush=True)
-
-            print()  # Newline after streaming
-            full_response = "".join(collected_messages).strip()
+            full_response, total_tokens = "", 0
+            async for event in self._stream_text(
+                params, input_tokens, self._create_stream
+            ):
+                if event["type"] == "message":
+                    full_response = event["content"].strip()
+                    total_tokens = event["total_tokens"]
+                elif on_delta is not None:
+                    await on_delta(event["content"])
 
             if not full_response:
-                raise ValueError("Empty response from streaming LLM")
+                raise EmptyResponseError("Empty response from streaming LLM")
 
+            if cache_key:
+                get_response_cache().put(cache_key, full_response, total_tokens)
             return full_response
 
         except TokenLimitExceeded:
@@ -637,13 +865,77 @@ class LLM:
             logger.error(f"Unexpected error in ask_with_images: {e}")
             raise
 
-    @retry(
-        wait=wait_random_exponential(min=1, max=60),
-        stop=stop_after_attempt(6),
-        retry=retry_if_exception_type(
-            (OpenAIError, Exception, ValueError)
-        ),  # Don't retry TokenLimitExceeded
-    )
+    def _build_tool_request(
+        self,
+        messages: List[Union[dict, Message]],
+        system_msgs: Optional[List[Union[dict, Message]]],
+        timeout: int,
+        tools: Optional[List[dict]],
+        tool_choice: TOOL_CHOICE_TYPE,  # type: ignore
+        temperature: Optional[float],
+        tools_tokens: Optional[int],
+        **kwargs,
+    ) -> dict:
+        """Validate a tool request, check token limits and build its params"""
+        # Validate tool_choice
+        if tool_choice not in TOOL_CHOICE_VALUES:
+            raise ValueError(f"Invalid tool_choice: {tool_choice}")
+
+        # Check if the model supports images
+        supports_images = self.model in MULTIMODAL_MODELS
+
+        # Calculate input token count, before formatting drops the Message objects
+        input_tokens = self._count_input_tokens(
+            list(system_msgs or []) + list(messages), supports_images
+        )
+
+        # Format messages
+        if system_msgs:
+            system_msgs = self.format_messages(system_msgs, supports_images)
+            messages = system_msgs + self.format_messages(messages, supports_images)
+        else:
+            messages = self.format_messages(messages, supports_images)
+
+        # If there are tools, calculate token count for tool descriptions
+        if tools_tokens is None:
+            tools_tokens = 0
+            for tool in tools or []:
+                tools_tokens += self.count_tokens(str(tool))
+
+        input_tokens += tools_tokens
+
+        # Check if token limits are exceeded
+        if not self.check_token_limit(input_tokens):
+            error_message = self.get_limit_error_message(input_tokens)
+            # Raise a special exception that won't be retried
+            raise TokenLimitExceeded(error_message)
+
+        # Validate tools if provided
+        if tools:
+            for tool in tools:
+                if not isinstance(tool, dict) or "type" not in tool:
+                    raise ValueError("Each tool must be a dict with 'type' field")
+
+        # Set up the completion request
+        params = {
+            "model": self.model,
+            "messages": messages,
+            "tools": tools,
+            "tool_choice": tool_choice,
+            "timeout": timeout,
+            **kwargs,
+        }
+
+        if self.model in REASONING_MODELS:
+            params["max_completion_tokens"] = self.max_tokens
+        else:
+            params["max_tokens"] = self.max_tokens
+            params["temperature"] = (
+                temperature if temperature is not None else self.temperature
+            )
+        return params
+
+    @with_retry_policy(hedge_if=lambda kwargs: True)
     async def ask_tool(
         self,
         messages: List[Union[dict, Message]],
@@ -652,6 +944,7 @@ class LLM:
         tools: Optional[List[dict]] = None,
         tool_choice: TOOL_CHOICE_TYPE = ToolChoice.AUTO,  # type: ignore
         temperature: Optional[float] = None,
+        tools_tokens: Optional[int] = None,
         **kwargs,
     ) -> ChatCompletionMessage | None:
         """
@@ -664,6 +957,7 @@ class LLM:
             tools: List of tools to use
             tool_choice: Tool choice strategy
             temperature: Sampling temperature for the response
+            tools_tokens: Precomputed token count of ``tools``, if known
             **kwargs: Additional completion arguments
 
         Returns:
@@ -676,60 +970,22 @@ class LLM:
             Exception: For unexpected errors
         """
         try:
-            # Validate tool_choice
-            if tool_choice not in TOOL_CHOICE_VALUES:
-                raise ValueError(f"Invalid tool_choice: {tool_choice}")
-
-            # Check if the model supports images
-            supports_images = self.model in MULTIMODAL_MODELS
-
-            # Format messages
-            if system_msgs:
-                system_msgs = self.format_messages(system_msgs, supports_images)
-                messages = system_msgs + self.format_messages(messages, supports_images)
-            else:
-                messages = self.format_messages(messages, supports_images)
-
-            # Calculate input token count
-            input_tokens = self.count_message_tokens(messages)
-
-            # If there are tools, calculate token count for tool descriptions
-            tools_tokens = 0
-            if tools:
-                for tool in tools:
-                    tools_tokens += self.count_tokens(str(tool))
-
-            input_tokens += tools_tokens
-
-            # Check if token limits are exceeded
-            if not self.check_token_limit(input_tokens):
-                error_message = self.get_limit_error_message(input_tokens)
-                # Raise a special exception that won't be retried
-                raise TokenLimitExceeded(error_message)
-
-            # Validate tools if provided
-            if tools:
-                for tool in tools:
-                    if not isinstance(tool, dict) or "type" not in tool:
-                        raise ValueError("Each tool must be a dict with 'type' field")
-
-            # Set up the completion request
-            params = {
-                "model": self.model,
-                "messages": messages,
-                "tools": tools,
-                "tool_choice": tool_choice,
-                "timeout": timeout,
+            params = self._build_tool_request(
+                messages,
+                system_msgs,
+                timeout,
+                tools,
+                tool_choice,
+                temperature,
+                tools_tokens,
                 **kwargs,
-            }
+            )
 
-            if self.model in REASONING_MODELS:
-                params["max_completion_tokens"] = self.max_tokens
-            else:
-                params["max_tokens"] = self.max_tokens
-                params["temperature"] = (
-                    temperature if temperature is not None else self.temperature
-                )
+            cache_key = self._response_cache_key(params)
+            if cache_key:
+                cached = get_response_cache().get(cache_key)
+                if cached is not None:
+                    return ChatCompletionMessage.model_validate(cached)
 
             params["stream"] = False  # Always use non-streaming for tool requests
             response: ChatCompletion = await self.client.chat.completions.create(
@@ -738,8 +994,7 @@ class LLM:
 
             # Check if response is valid
             if not response.choices or not response.choices[0].message:
-                print(response)
-                # raise ValueError("Invalid or empty response from LLM")
+                logger.warning(f"Invalid or empty response from LLM: {response}")
                 return None
 
             # Update token counts
@@ -747,7 +1002,14 @@ class LLM:
                 response.usage.prompt_tokens, response.usage.completion_tokens
             )
 
-            return response.choices[0].message
+            message = response.choices[0].message
+            if cache_key:
+                get_response_cache().put(
+                    cache_key,
+                    message.model_dump(exclude_none=True),
+                    response.usage.total_tokens,
+                )
+            return message
 
         except TokenLimitExceeded:
             # Re-raise token limit errors without logging
@@ -767,3 +1029,163 @@ class LLM:
         except Exception as e:
             logger.error(f"Unexpected error in ask_tool: {e}")
             raise
+
+    async def _create_stream(self, params: dict) -> Any:
+        """Open a streaming completion within a caller's retry policy.
+
+        ``ask`` and ``ask_with_images`` already hold a rate limiter slot;
+        retrying here as well would wait for a second slot of the same limiter.
+        """
+        return await self.client.chat.completions.create(**params)
+
+    @with_retry_policy()
+    async def _open_stream(self, params: dict) -> Any:
+        """Open a streaming completion; only establishing the stream is retried"""
+        return await self._create_stream(params)
+
+    async def ask_tool_stream(
+        self,
+        messages: List[Union[dict, Message]],
+        system_msgs: Optional[List[Union[dict, Message]]] = None,
+        timeout: int = 300,
+        tools: Optional[List[dict]] = None,
+        tool_choice: TOOL_CHOICE_TYPE = ToolChoice.AUTO,  # type: ignore
+        temperature: Optional[float] = None,
+        tools_tokens: Optional[int] = None,
+        **kwargs,
+    ) -> AsyncIterator[dict]:
+        """
+        Streaming variant of ``ask_tool``.
+
+        Yields events as the completion is generated:
+            {"type": "content", "content": str}: a content delta
+            {"type": "tool_call", "index": int, "name": Optional[str], "arguments": str}:
+                a tool-call delta; ``name`` is set on the first delta of each call
+            {"type": "message", "message": Optional[ChatCompletionMessage]}:
+                the assembled message, always the last event
+
+        Raises:
+            The same errors as ``ask_tool``.
+        """
+        try:
+            params = self._build_tool_request(
+                messages,
+                system_msgs,
+                timeout,
+                tools,
+                tool_choice,
+                temperature,
+                tools_tokens,
+                **kwargs,
+            )
+
+            cache_key = self._response_cache_key(params)
+            if cache_key:
+                cached = get_response_cache().get(cache_key)
+                if cached is not None:
+                    message = ChatCompletionMessage.model_validate(cached)
+                    if message.content:
+                        yield {"type": "content", "content": message.content}
+                    yield {"type": "message", "message": message}
+                    return
+
+            params["stream"] = True
+            if self.api_type != "azure":
+                params["stream_options"] = {"include_usage": True}
+
+            stream = await self._open_stream(params)
+
+            content_parts: List[str] = []
+            calls: Dict[int, Dict[str, Any]] = {}
+            usage = None
+            async for chunk in stream:
+                if getattr(chunk, "usage", None):
+                    usage = chunk.usage
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta
+                if delta.content:
+                    content_parts.append(delta.content)
+                    yield {"type": "content", "content": delta.content}
+                for call_delta in delta.tool_calls or []:
+                    call = calls.setdefault(
+                        call_delta.index, {"id": "", "name": "", "arguments": []}
+                    )
+                    name = None
+                    if call_delta.id:
+                        call["id"] = call_delta.id
+                    if call_delta.function:
+                        if call_delta.function.name:
+                            name = call_delta.function.name
+                            call["name"] += name
+                        if call_delta.function.arguments:
+                            call["arguments"].append(call_delta.function.arguments)
+                    yield {
+                        "type": "tool_call",
+                        "index": call_delta.index,
+                        "name": name,
+                        "arguments": (
+                            call_delta.function.arguments or ""
+                            if call_delta.function
+                            else ""
+                        ),
+                    }
+
+            content = "".join(content_parts)
+            if not content and not calls:
+                yield {"type": "message", "message": None}
+                return
+
+            if usage:
+                prompt_tokens, completion_tokens = (
+                    usage.prompt_tokens,
+                    usage.completion_tokens,
+                )
+            else:
+                prompt_tokens = self.count_message_tokens(params["messages"])
+                completion_tokens = self.count_tokens(content) + sum(
+                    self.count_tokens("".join(call["arguments"]))
+                    for call in calls.values()
+                )
+            self.update_token_count(prompt_tokens, completion_tokens)
+
+            tool_calls = [
+                ChatCompletionMessageToolCall(
+                    id=call["id"],
+                    type="function",
+                    function=Function(
+                        name=call["name"], arguments="".join(call["arguments"])
+                    ),
+                )
+                for _, call in sorted(calls.items())
+            ]
+            message = ChatCompletionMessage(
+                role="assistant",
+                content=content or None,
+                tool_calls=tool_calls or None,
+            )
+            if cache_key:
+                get_response_cache().put(
+                    cache_key,
+                    message.model_dump(exclude_none=True),
+                    prompt_tokens + completion_tokens,
+                )
+            yield {"type": "message", "message": message}
+
+        except TokenLimitExceeded:
+            raise
+        except ValueError as ve:
+            logger.error(f"Validation error in ask_tool_stream: {ve}")
+            raise
+        except OpenAIError as oe:
+            logger.error(f"OpenAI API error: {oe}")
+            if isinstance(oe, AuthenticationError):
+                logger.error("Authentication failed. Check API key.")
+            elif isinstance(oe, RateLimitError):
+                logger.error("Rate limit exceeded. Consider increasing retry attempts.")
+            elif isinstance(oe, APIError):
+                logger.error(f"API error: {oe}")
+            raise
+        except Exception as e:
+            logger.error(f"Unexpected error in ask_tool_stream: {e}")
+            raise
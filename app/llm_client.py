@@ -0,0 +1,119 @@
+"""Process-wide registry of LLM provider clients.
+
+Clients are shared per provider endpoint so that every ``LLM`` instance (and
+every settings reload) reuses the same keep-alive connection pool instead of
+paying connection and TLS setup again.
+"""
+import asyncio
+import threading
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+import httpx
+from openai import AsyncAzureOpenAI, AsyncOpenAI
+
+from app.bedrock import BedrockClient
+from app.config import LLMClientSettings, LLMSettings, config
+from app.logger import logger
+
+
+_http_clients: Dict[str, httpx.AsyncClient] = {}
+_clients: Dict[Tuple[str, str, str, str], Any] = {}
+_lock = threading.Lock()
+
+
+def _client_settings() -> LLMClientSettings:
+    return config.llm_client_config or LLMClientSettings()
+
+
+def _endpoint(base_url: Optional[str]) -> str:
+    return (base_url or "").rstrip("/")
+
+
+def get_http_client(base_url: Optional[str]) -> httpx.AsyncClient:
+    """Return the pooled HTTP client for a provider endpoint."""
+    endpoint = _endpoint(base_url)
+    with _lock:
+        client = _http_clients.get(endpoint)
+        if client is None or client.is_closed:
+            settings = _client_settings()
+            client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=settings.max_connections,
+                    max_keepalive_connections=settings.max_keepalive_connections,
+                    keepalive_expiry=settings.keepalive_expiry,
+                ),
+                timeout=httpx.Timeout(None, connect=settings.connect_timeout),
+            )
+            _http_clients[endpoint] = client
+        return client
+
+
+def get_client(settings: LLMSettings) -> Any:
+    """Return the shared API client for the given provider settings.
+
+    Clients are keyed by api type, endpoint, key and api version; OpenAI and
+    Azure clients for the same endpoint share one connection pool.
+    """
+    key = (
+        settings.api_type or "",
+        _endpoint(settings.base_url),
+        settings.api_key or "",
+        settings.api_version or "",
+    )
+    with _lock:
+        client = _clients.get(key)
+    if client is not None and not getattr(client, "is_closed", lambda: False)():
+        return client
+
+    if settings.api_type == "aws":
+        client = BedrockClient()
+    elif settings.api_type == "azure":
+        client = AsyncAzureOpenAI(
+            base_url=settings.base_url,
+            api_key=settings.api_key,
+            api_version=settings.api_version,
+            http_client=get_http_client(settings.base_url),
+        )
+    else:
+        client = AsyncOpenAI(
+            api_key=settings.api_key,
+            base_url=settings.base_url,
+            http_client=get_http_client(settings.base_url),
+        )
+
+    with _lock:
+        # Another caller may have created the client meanwhile; keep the first
+        return _clients.setdefault(key, client)
+
+
+async def warm_up(settings_list: Iterable[LLMSettings], timeout: float = 5.0) -> None:
+    """Open a connection to each distinct provider endpoint ahead of the first request."""
+    endpoints = []
+    tasks = []
+    for settings in settings_list:
+        endpoint = _endpoint(settings.base_url)
+        if settings.api_type == "aws" or not endpoint or endpoint in endpoints:
+            continue
+        endpoints.append(endpoint)
+        client = get_client(settings)
+        tasks.append(
+            client.with_options(max_retries=0, timeout=timeout).models.list()
+        )
+
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    for endpoint, result in zip(endpoints, results):
+        if isinstance(result, Exception):
+            # Any HTTP response still leaves a warm connection in the pool
+            logger.debug(f"LLM warm-up for {endpoint}: {result}")
+    if endpoints:
+        logger.info(f"Warmed up LLM connections to {len(endpoints)} endpoint(s)")
+
+
+async def close_clients() -> None:
+    """Close all pooled connections (on application shutdown)."""
+    with _lock:
+        http_clients = list(_http_clients.values())
+        _http_clients.clear()
+        _clients.clear()
+    for client in http_clients:
+        await client.aclose()
@@ -0,0 +1,96 @@
+"""Process-wide rate limiting of LLM requests.
+
+Concurrent agents (batch workers, API sessions) share one provider account, so
+the number of calls in flight and the rate at which calls start are limited
+globally rather than per agent or per ``LLM`` instance.
+"""
+import asyncio
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+from app.config import LLMRateLimitSettings, config
+
+
+class RateLimiter:
+    """Cap concurrent LLM calls and space out their start times."""
+
+    def __init__(self, settings: Optional[LLMRateLimitSettings] = None):
+        self._settings = settings
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._semaphore_key = None
+        self._next_start = 0.0
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.delayed = 0
+        self.waited = 0.0
+
+    @property
+    def settings(self) -> LLMRateLimitSettings:
+        # Follow config reloads unless settings were given explicitly
+        return self._settings or config.llm_rate_limit_config
+
+    def _get_semaphore(self) -> Optional[asyncio.Semaphore]:
+        limit = self.settings.max_concurrent_requests
+        if not limit:
+            return None
+        # Semaphores are bound to an event loop; recreate for a new loop or limit
+        key = (id(asyncio.get_running_loop()), limit)
+        with self._lock:
+            if self._semaphore is None or self._semaphore_key != key:
+                self._semaphore = asyncio.Semaphore(limit)
+                self._semaphore_key = key
+            return self._semaphore
+
+    def _reserve_start(self) -> float:
+        """Reserve the next start time and return the seconds to wait for it."""
+        rpm = self.settings.requests_per_minute
+        if not rpm:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start)
+            self._next_start = start + 60.0 / rpm
+        return start - now
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Hold one LLM request slot for the duration of the block."""
+        began = time.monotonic()
+        semaphore = self._get_semaphore()
+        if semaphore is not None:
+            await semaphore.acquire()
+        try:
+            delay = self._reserve_start()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            waited = time.monotonic() - began
+            self.calls += 1
+            if waited > 0.001:
+                self.delayed += 1
+                self.waited += waited
+            yield
+        finally:
+            if semaphore is not None:
+                semaphore.release()
+
+    def report(self) -> str:
+        return (
+            f"LLM rate limit: {self.delayed}/{self.calls} calls delayed, "
+            f"{self.waited:.1f}s spent waiting"
+        )
+
+
+_rate_limiter: Optional[RateLimiter] = None
+_rate_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Return the process-wide LLM rate limiter."""
+    global _rate_limiter
+    if _rate_limiter is None:
+        with _rate_limiter_lock:
+            if _rate_limiter is None:
+                _rate_limiter = RateLimiter()
+    return _rate_limiter
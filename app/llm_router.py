@@ -0,0 +1,86 @@
+"""Per-step model routing.
+
+Agents classify each step (schema exploration, SQL generation, answer
+synthesis) and ask the router for an LLM. Configured rules map a step type to
+candidate ``[llm.<name>]`` configs; optionally the candidate with the lowest
+observed latency is preferred.
+"""
+import threading
+from enum import Enum
+from typing import Dict, List, Optional
+
+from app.config import ModelRoutingSettings, config
+from app.llm import LLM
+from app.logger import logger
+
+
+class StepType(str, Enum):
+    """Kinds of agent steps that can be routed to different models"""
+
+    EXPLORATION = "exploration"
+    SQL_GENERATION = "sql_generation"
+    ANSWER_SYNTHESIS = "answer_synthesis"
+    DEFAULT = "default"
+
+
+class ModelRouter:
+    """Select an LLM for a step type and track per-model latency."""
+
+    def __init__(self, settings: Optional[ModelRoutingSettings] = None):
+        self._settings = settings
+        self._latency: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def settings(self) -> ModelRoutingSettings:
+        # Follow config reloads unless settings were given explicitly
+        return self._settings or config.model_routing_config
+
+    def candidates(self, step_type: StepType) -> List[str]:
+        """Configured LLM names for the step type that exist in ``config.llm``."""
+        names = self.settings.routes.get(step_type.value, [])
+        return [name for name in names if name in config.llm]
+
+    def select(self, step_type: StepType, default: LLM) -> LLM:
+        """Return the LLM to use for a step, or ``default`` if no rule applies."""
+        if not self.settings.enabled:
+            return default
+        names = self.candidates(step_type)
+        if not names:
+            return default
+
+        name = names[0]
+        if self.settings.prefer_fastest and len(names) > 1:
+            with self._lock:
+                # Unobserved candidates sort first so each gets measured once
+                name = min(names, key=lambda n: self._latency.get(n, 0.0))
+
+        logger.info(f"🧭 Routing {step_type.value} step to LLM config '{name}'")
+        return LLM(config_name=name)
+
+    def observe(self, config_name: str, seconds: float) -> None:
+        """Record the latency of a completed call in the moving average."""
+        alpha = self.settings.latency_alpha
+        with self._lock:
+            previous = self._latency.get(config_name)
+            self._latency[config_name] = (
+                seconds if previous is None else alpha * seconds + (1 - alpha) * previous
+            )
+
+    def latencies(self) -> Dict[str, float]:
+        with self._lock:
+            return dict(self._latency)
+
+
+_model_router: Optional[ModelRouter] = None
+_model_router_lock = threading.Lock()
+
+
+def get_model_router() -> ModelRouter:
+    """Return the process-wide model router."""
+    global _model_router
+    if _model_router is None:
+        with _model_router_lock:
+            if _model_router is None:
+                _model_router = ModelRouter()
+    return _model_router
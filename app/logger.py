@@ -22,7 +22,8 @@ def define_log_level(print_level="INFO", logfile_level="DEBUG", name: str = None
 
     _logger.remove()
     _logger.add(sys.stderr, level=print_level)
-    _logger.add(PROJECT_ROOT / f"logs/{log_name}.log", level=logfile_level)
+    # The file is opened on the first record, not at import
+    _logger.add(PROJECT_ROOT / f"logs/{log_name}.log", level=logfile_level, delay=True)
     return _logger
 
 
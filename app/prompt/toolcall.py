@@ -3,3 +3,9 @@ SYSTEM_PROMPT = "You are an agent that can execute tool calls"
 NEXT_STEP_PROMPT = (
     "If you want to stop interaction, use `terminate` tool/function call."
 )
+
+SUMMARIZE_HISTORY_PROMPT = """Summarize the following earlier part of a conversation between a user and a tool-using assistant.
+Keep the user's requests, facts and numbers that were found, decisions made, and anything still unresolved.
+Omit raw tool output. Reply with the summary only, in the language of the conversation.
+
+{history}"""
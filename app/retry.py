@@ -0,0 +1,243 @@
+"""Deadline-based retries and hedged requests for LLM calls.
+
+Each agent query gets a budget of LLM time (see ``query_budget``); time spent in
+tools or waiting for a rate-limiter slot is not charged to it. LLM calls are
+retried only on transient errors and only while budget remains, and a
+duplicate "hedged" request can be sent when the first one runs past the
+observed p95 latency, using whichever response arrives first.
+"""
+import asyncio
+import functools
+import random
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Deque, Iterator, Optional, TypeVar
+
+import httpx
+from openai import (
+    APIConnectionError,
+    APIStatusError,
+    APITimeoutError,
+    InternalServerError,
+    RateLimitError,
+)
+
+from app.config import LLMRetrySettings, config
+from app.exceptions import DeadlineExceeded, EmptyResponseError, TokenLimitExceeded
+from app.llm_limiter import get_rate_limiter
+from app.logger import logger
+
+
+T = TypeVar("T")
+
+RETRYABLE_STATUS_CODES = {408, 409, 425, 429, 500, 502, 503, 504}
+
+class LLMBudget:
+    """Seconds of LLM time left for one query, charged as calls finish."""
+
+    def __init__(self, seconds: float, parent: Optional["LLMBudget"] = None):
+        self._remaining = seconds
+        self._parent = parent
+
+    def remaining(self) -> float:
+        if self._parent is None:
+            return self._remaining
+        return min(self._remaining, self._parent.remaining())
+
+    def spend(self, seconds: float) -> None:
+        self._remaining -= seconds
+        if self._parent is not None:
+            self._parent.spend(seconds)
+
+
+# LLM time budget of the current query, if any
+_budget: ContextVar[Optional[LLMBudget]] = ContextVar("llm_budget", default=None)
+
+
+@contextmanager
+def query_budget(budget: Optional[float] = None) -> Iterator[None]:
+    """Bound the total time of the LLM calls inside the block, in seconds.
+
+    Only time spent inside LLM calls (attempts, hedges and backoff) is
+    charged, so slow tool calls or a busy rate limiter do not eat into it.
+    Nested blocks never extend an outer budget.
+    """
+    if budget is None:
+        budget = config.llm_retry_config.query_budget
+    if not budget:
+        yield
+        return
+
+    token = _budget.set(LLMBudget(budget, parent=_budget.get()))
+    try:
+        yield
+    finally:
+        _budget.reset(token)
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Classify an error as transient (retry) or fatal (raise immediately)."""
+    if isinstance(error, (TokenLimitExceeded, DeadlineExceeded)):
+        return False
+    if isinstance(error, EmptyResponseError):
+        return True
+    if isinstance(
+        error, (APITimeoutError, APIConnectionError, RateLimitError, InternalServerError)
+    ):
+        return True
+    if isinstance(error, APIStatusError):
+        return error.status_code in RETRYABLE_STATUS_CODES
+    if isinstance(error, (asyncio.TimeoutError, httpx.TransportError, ConnectionError)):
+        return True
+    return False
+
+
+class RetryPolicy:
+    """Retry/hedging policy shared by the calls of one LLM instance."""
+
+    def __init__(self, settings: Optional[LLMRetrySettings] = None):
+        self._settings = settings
+        self._latencies: Deque[float] = deque(maxlen=self.settings.latency_window)
+        self.hedged = 0
+        self.hedge_wins = 0
+
+    @property
+    def settings(self) -> LLMRetrySettings:
+        # Follow config reloads unless settings were given explicitly
+        return self._settings or config.llm_retry_config
+
+    def hedge_delay(self) -> Optional[float]:
+        """Seconds after which a hedged request is sent, or None if disabled."""
+        settings = self.settings
+        if not settings.hedge or len(self._latencies) < settings.hedge_min_samples:
+            return None
+        ordered = sorted(self._latencies)
+        index = min(len(ordered) - 1, int(len(ordered) * settings.hedge_percentile))
+        return max(settings.hedge_min_delay, ordered[index])
+
+    def _backoff(self, attempt: int) -> float:
+        settings = self.settings
+        return random.uniform(0, min(settings.max_delay, settings.base_delay * 2**attempt))
+
+    async def _race(
+        self, fn: Callable[[], Awaitable[T]], timeout: float, hedge: bool
+    ) -> T:
+        """Run one attempt, adding a hedged duplicate if the first is slow."""
+        start = time.monotonic()
+        first = asyncio.ensure_future(fn())
+        tasks = {first}
+        try:
+            delay = self.hedge_delay() if hedge else None
+            if delay is not None and delay < timeout:
+                done, _ = await asyncio.wait(tasks, timeout=delay)
+                if not done:
+                    self.hedged += 1
+                    logger.info(f"LLM call exceeded p95 ({delay:.1f}s), sending hedged request")
+                    tasks.add(asyncio.ensure_future(fn()))
+
+            error: Optional[BaseException] = None
+            while tasks:
+                remaining = timeout - (time.monotonic() - start)
+                if remaining <= 0:
+                    break
+                done, tasks = await asyncio.wait(
+                    tasks, timeout=remaining, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    break
+                for task in done:
+                    if task.exception() is None:
+                        if task is not first:
+                            self.hedge_wins += 1
+                        self._latencies.append(time.monotonic() - start)
+                        return task.result()
+                    error = error or task.exception()
+            if error is not None and not tasks:
+                raise error
+            raise asyncio.TimeoutError(f"LLM call timed out after {timeout:.1f}s")
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def call(self, fn: Callable[[], Awaitable[T]], hedge: bool = False) -> T:
+        """Call ``fn`` with retries, within the attempt timeout and query budget."""
+        start = time.monotonic()
+        budget = _budget.get()
+        try:
+            return await self._call(fn, hedge, budget, start)
+        finally:
+            if budget is not None:
+                budget.spend(time.monotonic() - start)
+
+    async def _call(
+        self,
+        fn: Callable[[], Awaitable[T]],
+        hedge: bool,
+        budget: Optional[LLMBudget],
+        start: float,
+    ) -> T:
+        settings = self.settings
+        last_error: Optional[BaseException] = None
+
+        def remaining() -> Optional[float]:
+            if budget is None:
+                return None
+            return budget.remaining() - (time.monotonic() - start)
+
+        for attempt in range(settings.max_attempts):
+            timeout = settings.attempt_timeout
+            left = remaining()
+            if left is not None:
+                if left <= 0:
+                    break
+                timeout = min(timeout, left)
+
+            try:
+                return await self._race(fn, timeout, hedge)
+            except Exception as e:
+                if not is_retryable(e) or attempt == settings.max_attempts - 1:
+                    raise
+                last_error = e
+
+            delay = self._backoff(attempt)
+            left = remaining()
+            if left is not None and delay >= left:
+                break
+            logger.warning(
+                f"LLM call failed ({type(last_error).__name__}: {last_error}), "
+                f"retrying in {delay:.1f}s (attempt {attempt + 2}/{settings.max_attempts})"
+            )
+            await asyncio.sleep(delay)
+
+        raise DeadlineExceeded(
+            f"LLM query budget exhausted; last error: {last_error}"
+        ) from last_error
+
+
+def with_retry_policy(
+    hedge_if: Callable[[dict], bool] = lambda kwargs: False,
+) -> Callable:
+    """Decorate an ``LLM`` coroutine method to run under its ``retry_policy``.
+
+    The whole call, including its retries and hedged duplicate, holds one
+    slot of the process-wide LLM rate limiter.
+
+    Args:
+        hedge_if: Decides from the call's keyword arguments whether the call may
+            be hedged. Streaming calls must not be, as their output is consumed
+            while it arrives.
+    """
+
+    def decorator(method: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+        @functools.wraps(method)
+        async def wrapper(self, *args, **kwargs):
+            async with get_rate_limiter().slot():
+                return await self.retry_policy.call(
+                    lambda: method(self, *args, **kwargs), hedge=hedge_if(kwargs)
+                )
+
+        return wrapper
+
+    return decorator
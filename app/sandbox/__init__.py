@@ -4,6 +4,8 @@ Docker Sandbox Module
 Provides secure containerized execution environment with resource limits
 and isolation for running untrusted code.
 """
+import importlib
+
 from app.sandbox.client import (
     BaseSandboxClient,
     LocalSandboxClient,
@@ -14,8 +16,6 @@ from app.sandbox.core.exceptions import (
     SandboxResourceError,
     SandboxTimeoutError,
 )
-from app.sandbox.core.manager import SandboxManager
-from app.sandbox.core.sandbox import DockerSandbox
 
 
 __all__ = [
@@ -28,3 +28,17 @@ __all__ = [
     "SandboxTimeoutError",
     "SandboxResourceError",
 ]
+
+
+# The Docker-backed classes import the Docker SDK, so they are loaded on first
+# access rather than whenever the sandbox client is imported
+_LAZY = {
+    "DockerSandbox": "app.sandbox.core.sandbox",
+    "SandboxManager": "app.sandbox.core.manager",
+}
+
+
+def __getattr__(name: str):
+    if name in _LAZY:
+        return getattr(importlib.import_module(_LAZY[name]), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
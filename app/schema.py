@@ -1,7 +1,7 @@
 from enum import Enum
-from typing import Any, List, Literal, Optional, Union
+from typing import Any, Callable, List, Literal, Optional, Tuple, Union
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
 
 
 class Role(str, Enum):
@@ -61,6 +61,11 @@ class Message(BaseModel):
     tool_call_id: Optional[str] = Field(default=None)
     base64_image: Optional[str] = Field(default=None)
 
+    # Cached token cost, tagged with the content and counter it was computed with
+    _token_cost: Optional[Tuple[Optional[str], Callable, int]] = PrivateAttr(
+        default=None
+    )
+
     def __add__(self, other) -> List["Message"]:
         """支持 Message + list 或 Message + Message 的操作"""
         if isinstance(other, list):
@@ -156,6 +161,10 @@ class Message(BaseModel):
         )
 
 
+# Name marking the message that summarizes compacted history
+SUMMARY_MESSAGE_NAME = "conversation_summary"
+
+
 class Memory(BaseModel):
     messages: List[Message] = Field(default_factory=list)
     max_messages: int = Field(default=100)
@@ -163,16 +172,12 @@ class Memory(BaseModel):
     def add_message(self, message: Message) -> None:
         """Add a message to memory"""
         self.messages.append(message)
-        # Optional: Implement message limit
-        if len(self.messages) > self.max_messages:
-            self.messages = self.messages[-self.max_messages :]
+        self._trim_to_max_messages()
 
     def add_messages(self, messages: List[Message]) -> None:
         """Add multiple messages to memory"""
         self.messages.extend(messages)
-        # Optional: Implement message limit
-        if len(self.messages) > self.max_messages:
-            self.messages = self.messages[-self.max_messages :]
+        self._trim_to_max_messages()
 
     def clear(self) -> None:
         """Clear all messages"""
@@ -185,3 +190,129 @@ class Memory(BaseModel):
     def to_dict_list(self) -> List[dict]:
         """Convert messages to list of dicts"""
         return [msg.to_dict() for msg in self.messages]
+
+    def _pinned_prefix(self) -> int:
+        """Number of leading system messages that are never trimmed"""
+        count = 0
+        for msg in self.messages:
+            if msg.role != Role.SYSTEM or msg.name == SUMMARY_MESSAGE_NAME:
+                break
+            count += 1
+        return count
+
+    def _groups(self, start: int) -> List[List[int]]:
+        """Split messages from ``start`` into droppable units.
+
+        An assistant message with tool calls and the tool messages answering it
+        form one unit, so trimming never leaves a tool message without its call.
+        """
+        groups: List[List[int]] = []
+        for i in range(start, len(self.messages)):
+            msg = self.messages[i]
+            if msg.role == Role.TOOL and groups:
+                groups[-1].append(i)
+            else:
+                groups.append([i])
+        return groups
+
+    def _drop(self, indices: List[int]) -> List[Message]:
+        dropped_set = set(indices)
+        dropped = [self.messages[i] for i in sorted(dropped_set)]
+        self.messages = [
+            msg for i, msg in enumerate(self.messages) if i not in dropped_set
+        ]
+        return dropped
+
+    def _trim_to_max_messages(self) -> None:
+        excess = len(self.messages) - self.max_messages
+        if excess <= 0:
+            return
+        to_drop: List[int] = []
+        for group in self._groups(self._pinned_prefix()):
+            if len(to_drop) >= excess:
+                break
+            to_drop.extend(group)
+        self._drop(to_drop)
+
+    @staticmethod
+    def token_cost(msg: Message, count: Callable[[List[dict]], int]) -> int:
+        """Token cost of a message, cached until its content or counter changes"""
+        cached = msg._token_cost
+        if cached is not None and cached[0] is msg.content and cached[1] == count:
+            return cached[2]
+        cost = count([msg.to_dict()])
+        msg._token_cost = (msg.content, count, cost)
+        return cost
+
+    def total_tokens(self, count: Callable[[List[dict]], int]) -> int:
+        return sum(self.token_cost(msg, count) for msg in self.messages)
+
+    def compact(
+        self,
+        token_budget: int,
+        count: Callable[[List[dict]], int],
+        keep_recent: int = 4,
+        pruned_chars: int = 200,
+    ) -> List[Message]:
+        """Bring the history under ``token_budget`` tokens.
+
+        Leading system messages, the latest user request and the last
+        ``keep_recent`` message groups are always kept. Older tool outputs are
+        first pruned to a short stub; if that is not enough, the oldest groups
+        are dropped whole.
+
+        Returns:
+            The dropped messages, oldest first, so the caller can summarize them.
+        """
+        total = self.total_tokens(count)
+        if total <= token_budget:
+            return []
+
+        groups = self._groups(self._pinned_prefix())
+        last_user = next(
+            (
+                i
+                for i in range(len(self.messages) - 1, -1, -1)
+                if self.messages[i].role == Role.USER
+            ),
+            None,
+        )
+        candidates = [
+            group
+            for group in groups[: max(0, len(groups) - keep_recent)]
+            if last_user not in group
+        ]
+
+        # Stale tool outputs go first: the model already acted on them
+        for group in candidates:
+            for i in group:
+                msg = self.messages[i]
+                if msg.role != Role.TOOL or not msg.content:
+                    continue
+                if len(msg.content) <= pruned_chars and not msg.base64_image:
+                    continue
+                before = self.token_cost(msg, count)
+                omitted = max(0, len(msg.content) - pruned_chars)
+                msg.content = (
+                    f"{msg.content[:pruned_chars]}\n"
+                    f"[... {omitted} characters of earlier tool output pruned ...]"
+                )
+                msg.base64_image = None
+                total += self.token_cost(msg, count) - before
+            if total <= token_budget:
+                return []
+
+        to_drop: List[int] = []
+        for group in candidates:
+            if total <= token_budget:
+                break
+            to_drop.extend(group)
+            total -= sum(self.token_cost(self.messages[i], count) for i in group)
+        return self._drop(to_drop)
+
+    def insert_summary(self, summary: str) -> None:
+        """Place a summary of compacted history right after the pinned prefix"""
+        self.messages.insert(
+            self._pinned_prefix(),
+            Message(role=Role.SYSTEM, content=summary, name=SUMMARY_MESSAGE_NAME),
+        )
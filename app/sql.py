@@ -0,0 +1,37 @@
+"""Lightweight SQL text helpers shared by the agent, caches and API layer."""
+import re
+
+
+READ_ONLY_KEYWORDS = ("select", "with", "show", "describe", "desc", "explain")
+
+_COMMENT_PATTERN = re.compile(r"/\*.*?\*/|--[^\n]*|#[^\n]*", re.DOTALL)
+# Statement-level keywords are already excluded by the leading-keyword check;
+# this only has to catch DML hidden behind a CTE and locking/file clauses.
+# INSERT() and REPLACE() are also MySQL string functions, hence the lookahead.
+_WRITE_PATTERN = re.compile(
+    r"\b(update|delete|merge)\b|\b(insert|replace)\b(?!\s*\()"
+    r"|\binto\s+(outfile|dumpfile)\b|\bfor\s+update\b|\block\s+in\s+share\s+mode\b",
+    re.IGNORECASE,
+)
+
+
+def strip_sql_comments(sql: str) -> str:
+    """Remove SQL comments and surrounding whitespace/semicolons."""
+    return _COMMENT_PATTERN.sub(" ", sql or "").strip().rstrip(";").strip()
+
+
+def is_read_only_sql(sql: str) -> bool:
+    """Conservatively check that a statement is a single read-only query.
+
+    Multi-statement input, write keywords anywhere in the text and
+    ``SELECT ... INTO OUTFILE`` / ``FOR UPDATE`` are all rejected.
+    """
+    statement = strip_sql_comments(sql)
+    if not statement or ";" in statement:
+        return False
+
+    first_word = statement.split(None, 1)[0].lower()
+    if first_word not in READ_ONLY_KEYWORDS:
+        return False
+
+    return not _WRITE_PATTERN.search(statement)
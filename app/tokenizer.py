@@ -0,0 +1,222 @@
+"""Token counting for prompt budget checks.
+
+Exact counts come from tiktoken. Encodings are loaded on first use rather
+than when an ``LLM`` is created, and their BPE files are cached on disk in
+``[tokenizer].cache_dir`` (see ``configure_cache_dir``) so later starts work
+offline. ``TokenEstimator`` is a fast alternative for deployments where budget
+checks need not be exact: it estimates a count from the number of words,
+digits, punctuation and CJK characters, with weights calibrated per encoding.
+It is also used when an encoding cannot be loaded (e.g. no network and no
+cached BPE file).
+"""
+import os
+import string
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import tiktoken
+
+from app.config import PROJECT_ROOT, TokenizerSettings, config
+from app.logger import logger
+
+
+DEFAULT_ENCODING = "cl100k_base"
+
+# Tokens per word, digit, punctuation and CJK character, fitted with
+# ``TokenEstimator.calibrate`` on prompts, SQL and JSON query results
+# (benchmarks/token_estimate.py)
+ENCODING_WEIGHTS: Dict[str, Tuple[float, ...]] = {
+    "cl100k_base": (1.099, 0.412, 0.778, 1.097),
+    "o200k_base": (1.107, 0.329, 0.817, 0.755),
+}
+
+_encodings: Dict[str, "tiktoken.Encoding"] = {}
+# Encodings that failed to load; not retried on every count
+_failed: Dict[str, Exception] = {}
+_encodings_lock = threading.Lock()
+
+
+class EncodingUnavailable(Exception):
+    """Raised when a tiktoken encoding cannot be fetched or loaded."""
+
+
+def configure_cache_dir(settings: Optional[TokenizerSettings] = None) -> None:
+    """Point tiktoken at ``[tokenizer].cache_dir``; call once at startup.
+
+    tiktoken only reads its cache location from ``TIKTOKEN_CACHE_DIR``. An
+    explicitly set variable takes precedence.
+    """
+    settings = settings or config.tokenizer_config
+    if settings.cache_dir and "TIKTOKEN_CACHE_DIR" not in os.environ:
+        cache_dir = PROJECT_ROOT / settings.cache_dir
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        os.environ["TIKTOKEN_CACHE_DIR"] = str(cache_dir)
+
+
+def encoding_name(model: str) -> str:
+    """tiktoken encoding used for a model (without loading it)."""
+    try:
+        return tiktoken.encoding_name_for_model(model)
+    except KeyError:
+        # Models outside tiktoken's presets (Claude, DeepSeek, Qwen, ...)
+        return DEFAULT_ENCODING
+
+
+def load_encoding(name: str) -> "tiktoken.Encoding":
+    """Load an encoding once per process, using the on-disk BPE cache.
+
+    Raises:
+        EncodingUnavailable: The encoding could not be loaded; the failure is
+            logged once and remembered for the rest of the process.
+    """
+    encoding = _encodings.get(name)
+    if encoding is not None:
+        return encoding
+    with _encodings_lock:
+        if name not in _encodings:
+            if name in _failed:
+                raise EncodingUnavailable(name) from _failed[name]
+            logger.debug(f"Loading tiktoken encoding {name}")
+            try:
+                _encodings[name] = tiktoken.get_encoding(name)
+            except Exception as e:
+                _failed[name] = e
+                logger.warning(
+                    f"Could not load tiktoken encoding {name} ({type(e).__name__}: {e}); "
+                    "falling back to estimated token counts"
+                )
+                raise EncodingUnavailable(name) from e
+        return _encodings[name]
+
+
+class ExactTokenizer:
+    """tiktoken counts; the encoding is loaded on the first count.
+
+    If the encoding cannot be loaded, counts fall back to ``TokenEstimator``
+    unless ``fallback`` is False.
+    """
+
+    def __init__(self, name: str, fallback: bool = True):
+        self.name = name
+        self.fallback = fallback
+        self._encoding: Optional["tiktoken.Encoding"] = None
+        self._estimator: Optional["TokenEstimator"] = None
+
+    @property
+    def encoding(self) -> "tiktoken.Encoding":
+        if self._encoding is None:
+            self._encoding = load_encoding(self.name)
+        return self._encoding
+
+    def encode(self, text: str) -> list:
+        return self.encoding.encode(text)
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        if self._estimator is None:
+            try:
+                return len(self.encoding.encode(text))
+            except EncodingUnavailable:
+                if not self.fallback:
+                    raise
+                self._estimator = TokenEstimator(
+                    self.name,
+                    ENCODING_WEIGHTS.get(self.name, ENCODING_WEIGHTS[DEFAULT_ENCODING]),
+                )
+        return self._estimator.count(text)
+
+
+# Byte classes for the estimator: ASCII letters, digits, punctuation,
+# whitespace/control, and bytes of non-ASCII characters
+_CLASSES = bytearray(b" " * 256)
+for _byte in string.ascii_letters.encode():
+    _CLASSES[_byte] = ord("a")
+for _byte in string.digits.encode():
+    _CLASSES[_byte] = ord("0")
+for _byte in string.punctuation.encode():
+    _CLASSES[_byte] = ord(".")
+for _byte in range(128, 256):
+    _CLASSES[_byte] = ord("x")
+_CLASSES = bytes(_CLASSES)
+
+
+def text_features(text: str) -> Tuple[int, int, int, int]:
+    """(words, digits, punctuation, CJK characters) of a text.
+
+    Computed with ``bytes.translate``/``count`` so the scan runs in C. CJK
+    characters take 3 bytes in UTF-8, so the extra bytes over the character
+    count approximate two per non-ASCII character.
+    """
+    data = text.encode("utf-8")
+    classes = data.translate(_CLASSES)
+    words = sum(classes.count(prefix + b"a") for prefix in (b" ", b".", b"0", b"x"))
+    words += classes[:1] == b"a"
+    return (
+        words,
+        classes.count(b"0"),
+        classes.count(b"."),
+        (len(data) - len(text)) // 2,
+    )
+
+
+def _solve(matrix: List[List[float]], vector: List[float]) -> List[float]:
+    """Solve a small linear system by Gaussian elimination."""
+    size = len(vector)
+    rows = [row[:] + [value] for row, value in zip(matrix, vector)]
+    for i in range(size):
+        pivot = max(range(i, size), key=lambda r: abs(rows[r][i]))
+        if not rows[pivot][i]:
+            raise ValueError("Calibration samples do not cover every character class")
+        rows[i], rows[pivot] = rows[pivot], rows[i]
+        for r in range(size):
+            if r != i:
+                factor = rows[r][i] / rows[i][i]
+                rows[r] = [a - factor * b for a, b in zip(rows[r], rows[i])]
+    return [rows[i][size] / rows[i][i] for i in range(size)]
+
+
+class TokenEstimator:
+    """Approximate token counts as a weighted sum of ``text_features``."""
+
+    def __init__(self, name: str, weights: Sequence[float]):
+        if len(weights) != 4:
+            raise ValueError(
+                "Estimator weights are tokens per word, digit, punctuation and CJK character"
+            )
+        self.name = name
+        self.weights = tuple(weights)
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        features = text_features(text)
+        return max(1, round(sum(w * f for w, f in zip(self.weights, features))))
+
+    @classmethod
+    def calibrate(
+        cls, tokenizer: ExactTokenizer, samples: Iterable[str]
+    ) -> "TokenEstimator":
+        """Fit the weights to exact counts of sample texts (least squares)."""
+        gram = [[0.0] * 4 for _ in range(4)]
+        moments = [0.0] * 4
+        for text in samples:
+            features = text_features(text)
+            tokens = tokenizer.count(text)
+            for i in range(4):
+                moments[i] += features[i] * tokens
+                for j in range(4):
+                    gram[i][j] += features[i] * features[j]
+        return cls(tokenizer.name, [round(w, 3) for w in _solve(gram, moments)])
+
+
+def get_tokenizer(model: str, settings: Optional[TokenizerSettings] = None):
+    """Token counter for a model, per the ``[tokenizer]`` mode."""
+    settings = settings or config.tokenizer_config
+    name = encoding_name(model)
+    if settings.mode != "estimate":
+        return ExactTokenizer(name)
+    weights = settings.weights.get(model) or ENCODING_WEIGHTS.get(
+        name, ENCODING_WEIGHTS[DEFAULT_ENCODING]
+    )
+    return TokenEstimator(name, weights)
@@ -8,6 +8,8 @@ class BaseTool(ABC, BaseModel):
     name: str
     description: str
     parameters: Optional[dict] = None
+    # Read-only/idempotent tools may run concurrently with other such calls
+    parallel_safe: bool = False
 
     class Config:
         arbitrary_types_allowed = True
@@ -20,6 +22,10 @@ class BaseTool(ABC, BaseModel):
     async def execute(self, **kwargs) -> Any:
         """Execute the tool with given parameters."""
 
+    def is_parallel_safe(self, **kwargs) -> bool:
+        """Whether a call with these arguments may run concurrently with others."""
+        return self.parallel_safe
+
     def to_param(self) -> Dict:
         """Convert tool to function call format."""
         return {
@@ -0,0 +1,64 @@
+import json
+
+from pydantic import Field
+
+from app.tool.base import BaseTool, ToolResult
+from app.tool.result_store import ResultStore, parse_rows
+
+
+_FETCH_RESULT_DESCRIPTION = """Fetch rows from a large tool result that was compacted into a digest.
+Use the `handle` from the digest and page through rows with `offset` and `limit`.
+Only fetch rows you actually need; the digest already contains row count, column statistics and head/tail rows."""
+
+
+class FetchResult(BaseTool):
+    name: str = "fetch_result"
+    description: str = _FETCH_RESULT_DESCRIPTION
+    parameters: dict = {
+        "type": "object",
+        "properties": {
+            "handle": {
+                "type": "string",
+                "description": "The handle of the stored result, e.g. res_1a2b3c4d.",
+            },
+            "offset": {
+                "type": "integer",
+                "description": "Index of the first row (or line for text results) to return.",
+                "default": 0,
+            },
+            "limit": {
+                "type": "integer",
+                "description": "Number of rows (or lines) to return.",
+                "default": 20,
+            },
+        },
+        "required": ["handle"],
+    }
+    parallel_safe: bool = True
+
+    store: ResultStore = Field(default_factory=ResultStore, exclude=True)
+    max_limit: int = 100
+
+    async def execute(self, handle: str, offset: int = 0, limit: int = 20) -> ToolResult:
+        """Return a page of a stored result"""
+        raw = self.store.get(handle)
+        if raw is None:
+            return ToolResult(error=f"Unknown or expired result handle: {handle}")
+
+        offset = max(0, offset)
+        limit = max(1, min(limit, self.max_limit))
+        rows = parse_rows(raw)
+        if rows is not None:
+            page = {
+                "handle": handle,
+                "rowCount": len(rows),
+                "offset": offset,
+                "data": rows[offset : offset + limit],
+            }
+            return ToolResult(output=json.dumps(page, ensure_ascii=False, default=str))
+
+        lines = raw.splitlines()
+        return ToolResult(
+            output=f"[lines {offset}-{min(offset + limit, len(lines))} of {len(lines)}]\n"
+            + "\n".join(lines[offset : offset + limit])
+        )
@@ -1,16 +1,72 @@
+import asyncio
 from contextlib import AsyncExitStack
-from typing import Dict, List, Optional
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
 
 from mcp import ClientSession, StdioServerParameters
 from mcp.client.sse import sse_client
 from mcp.client.stdio import stdio_client
-from mcp.types import ListToolsResult, TextContent
+from mcp.types import (
+    CancelledNotification,
+    CancelledNotificationParams,
+    ClientNotification,
+    JSONRPCRequest,
+    ListToolsResult,
+    RequestId,
+    TextContent,
+)
 
 from app.logger import logger
+from app.sql import is_read_only_sql
 from app.tool.base import BaseTool, ToolResult
 from app.tool.tool_collection import ToolCollection
 
 
+# Database tools that only read metadata and can always run concurrently
+READ_ONLY_TOOLS = {"list_tables", "get_table_schema"}
+
+# Upper bound on telling the server about a cancelled call
+CANCEL_NOTIFY_TIMEOUT = 0.5
+
+# JSON-RPC id of the tools/call request the current task last sent
+_call_request_id: ContextVar[Optional[RequestId]] = ContextVar(
+    "mcp_call_request_id", default=None
+)
+
+
+class RequestTrackingStream:
+    """Client write stream that records the id of each outgoing tools/call.
+
+    Cancelling a call needs the id of its request, which ``ClientSession``
+    does not expose. The request is sent from the calling task, so the id is
+    kept in a context variable visible to that caller.
+    """
+
+    def __init__(self, stream: Any):
+        self._stream = stream
+
+    async def send(self, item: Any) -> None:
+        message = getattr(getattr(item, "message", None), "root", None)
+        if isinstance(message, JSONRPCRequest) and message.method == "tools/call":
+            _call_request_id.set(message.id)
+        await self._stream.send(item)
+
+    async def __aenter__(self) -> "RequestTrackingStream":
+        await self._stream.__aenter__()
+        return self
+
+    async def __aexit__(self, *exc_info) -> Optional[bool]:
+        return await self._stream.__aexit__(*exc_info)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._stream, name)
+
+
+def tracked_session(read_stream: Any, write_stream: Any) -> ClientSession:
+    """A ``ClientSession`` whose tool calls can be cancelled on the server."""
+    return ClientSession(read_stream, RequestTrackingStream(write_stream))
+
+
 class MCPClientTool(BaseTool):
     """Represents a tool proxy that can be called on the MCP server from the client side."""
 
@@ -18,6 +74,14 @@ class MCPClientTool(BaseTool):
     server_id: str = ""  # Add server identifier
     original_name: str = ""
 
+    def is_parallel_safe(self, **kwargs) -> bool:
+        """Metadata lookups and read-only SQL are safe to run concurrently."""
+        if self.original_name in READ_ONLY_TOOLS:
+            return True
+        if self.original_name == "execute_sql":
+            return is_read_only_sql(kwargs.get("query", ""))
+        return self.parallel_safe
+
     async def execute(self, **kwargs) -> ToolResult:
         """Execute the tool by making a remote call to the MCP server."""
         if not self.session:
@@ -25,7 +89,15 @@ class MCPClientTool(BaseTool):
 
         try:
             logger.info(f"Executing tool: {self.original_name}")
-            result = await self.session.call_tool(self.original_name, kwargs)
+            _call_request_id.set(None)
+            try:
+                result = await self.session.call_tool(self.original_name, kwargs)
+            except asyncio.CancelledError:
+                request_id = _call_request_id.get()
+                # None: cancelled before the request was sent
+                if request_id is not None:
+                    await self._notify_cancelled(request_id)
+                raise
 
             # Extract text content from result
             text_contents = [
@@ -48,6 +120,27 @@ class MCPClientTool(BaseTool):
         except Exception as e:
             return ToolResult(error=f"Error executing tool: {str(e)}")
 
+    async def _notify_cancelled(self, request_id: RequestId) -> None:
+        """Tell the server to abort a call whose caller was cancelled.
+
+        The client library only stops waiting for the response; without the
+        notification the server would finish the call (e.g. a long SQL query).
+        """
+        notification = ClientNotification(
+            CancelledNotification(
+                params=CancelledNotificationParams(
+                    requestId=request_id, reason="Cancelled by client"
+                )
+            )
+        )
+        try:
+            await asyncio.wait_for(
+                self.session.send_notification(notification), CANCEL_NOTIFY_TIMEOUT
+            )
+            logger.info(f"Cancelled tool call {self.original_name} (request {request_id})")
+        except Exception as e:
+            logger.warning(f"Failed to send cancellation for {self.original_name}: {e}")
+
 
 class MCPClients(ToolCollection):
     """
@@ -61,6 +154,9 @@ class MCPClients(ToolCollection):
     def __init__(self):
         super().__init__()  # Initialize with empty tools list
         self.name = "mcp"  # Keep name for backward compatibility
+        # Per instance, so separate clients never disconnect each other's servers
+        self.sessions = {}
+        self.exit_stacks = {}
 
     async def connect_sse(self, server_url: str, server_id: str = "") -> None:
         """Connect to an MCP server using SSE transport."""
@@ -85,7 +181,7 @@ class MCPClients(ToolCollection):
 
         streams_context = sse_client(url=server_url)
         streams = await exit_stack.enter_async_context(streams_context)
-        session = await exit_stack.enter_async_context(ClientSession(*streams))
+        session = await exit_stack.enter_async_context(tracked_session(*streams))
         self.sessions[server_id] = session
 
         await self._initialize_and_list_tools(server_id)
@@ -119,7 +215,7 @@ class MCPClients(ToolCollection):
             stdio_client(server_params)
         )
         read, write = stdio_transport
-        session = await exit_stack.enter_async_context(ClientSession(read, write))
+        session = await exit_stack.enter_async_context(tracked_session(read, write))
         self.sessions[server_id] = session
 
         await self._initialize_and_list_tools(server_id)
@@ -151,6 +247,7 @@ class MCPClients(ToolCollection):
 
         # Update tools tuple
         self.tools = tuple(self.tool_map.values())
+        self._invalidate()
         logger.info(
             f"Connected to server {server_id} with tools: {[tool.name for tool in response.tools]}"
         )
@@ -212,6 +309,7 @@ class MCPClients(ToolCollection):
                         if v.server_id != server_id
                     }
                     self.tools = tuple(self.tool_map.values())
+                    self._invalidate()
                     logger.info(f"Disconnected from MCP server {server_id}")
                 except Exception as e:
                     logger.error(f"Error disconnecting from server {server_id}: {e}")
@@ -221,4 +319,5 @@ class MCPClients(ToolCollection):
                 await self.disconnect(sid)
             self.tool_map = {}
             self.tools = tuple()
+            self._invalidate()
             logger.info("Disconnected from all MCP servers")
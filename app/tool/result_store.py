@@ -0,0 +1,171 @@
+"""Out-of-band storage and compact digests for large tool results.
+
+Large results (typically ``execute_sql`` rows) are kept here and replaced in
+the conversation by a structured digest, so later LLM requests do not re-send
+them on every step. The full result stays retrievable by handle.
+"""
+import json
+import math
+import re
+import uuid
+from collections import Counter, OrderedDict
+from typing import Any, Dict, List, Optional
+
+
+_DATE_PATTERN = re.compile(r"^\d{4}-\d{2}-\d{2}")
+_MAX_CELL_CHARS = 200
+_MAX_DISTINCT_TRACKED = 1000
+
+
+class ResultStore:
+    """Bounded LRU store of raw tool results addressed by handle."""
+
+    def __init__(self, max_entries: int = 32, max_chars: int = 50_000_000):
+        self.max_entries = max_entries
+        self.max_chars = max_chars
+        self._results: "OrderedDict[str, str]" = OrderedDict()
+        self._total_chars = 0
+
+    def put(self, raw: str) -> str:
+        handle = f"res_{uuid.uuid4().hex[:8]}"
+        self._results[handle] = raw
+        self._total_chars += len(raw)
+        while self._results and (
+            len(self._results) > self.max_entries or self._total_chars > self.max_chars
+        ):
+            _, evicted = self._results.popitem(last=False)
+            self._total_chars -= len(evicted)
+        return handle
+
+    def get(self, handle: str) -> Optional[str]:
+        raw = self._results.get(handle)
+        if raw is not None:
+            self._results.move_to_end(handle)
+        return raw
+
+    def clear(self) -> None:
+        self._results.clear()
+        self._total_chars = 0
+
+    def __contains__(self, handle: str) -> bool:
+        return handle in self._results
+
+    def __len__(self) -> int:
+        return len(self._results)
+
+
+def parse_rows(raw: str) -> Optional[List[Dict[str, Any]]]:
+    """Return the row list of an ``execute_sql`` style payload, if any."""
+    try:
+        payload = json.loads(raw)
+    except (TypeError, ValueError):
+        return None
+    rows = payload.get("data") if isinstance(payload, dict) else payload
+    if isinstance(rows, list) and all(isinstance(row, dict) for row in rows):
+        return rows
+    return None
+
+
+def _to_number(value: Any) -> Optional[float]:
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            number = float(value)
+        except ValueError:
+            return None
+        return number if math.isfinite(number) else None
+    return None
+
+
+def _clip(value: Any) -> Any:
+    if isinstance(value, str) and len(value) > _MAX_CELL_CHARS:
+        return value[:_MAX_CELL_CHARS] + "…"
+    return value
+
+
+def column_stats(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Compute per-column type, null count, cardinality and value summaries."""
+    columns: List[str] = []
+    for row in rows:
+        for name in row:
+            if name not in columns:
+                columns.append(name)
+
+    stats = []
+    for name in columns:
+        values = [row.get(name) for row in rows]
+        present = [v for v in values if v is not None and v != ""]
+        numbers = [_to_number(v) for v in present]
+        distinct = set()
+        for v in present:
+            if len(distinct) > _MAX_DISTINCT_TRACKED:
+                break
+            distinct.add(str(v))
+
+        column: Dict[str, Any] = {
+            "name": name,
+            "nulls": len(values) - len(present),
+            "distinct": (
+                len(distinct)
+                if len(distinct) <= _MAX_DISTINCT_TRACKED
+                else f">{_MAX_DISTINCT_TRACKED}"
+            ),
+        }
+        if present and all(n is not None for n in numbers):
+            column["type"] = "number"
+            column["min"] = min(numbers)
+            column["max"] = max(numbers)
+            column["mean"] = round(sum(numbers) / len(numbers), 4)
+        elif present and all(
+            isinstance(v, str) and _DATE_PATTERN.match(v) for v in present
+        ):
+            column["type"] = "date"
+            column["min"] = min(present)
+            column["max"] = max(present)
+        else:
+            column["type"] = "string" if present else "null"
+            if present and len(distinct) <= 50:
+                column["top"] = [
+                    {"value": _clip(value), "count": count}
+                    for value, count in Counter(str(v) for v in present).most_common(5)
+                ]
+        stats.append(column)
+    return stats
+
+
+def build_digest(
+    raw: str,
+    handle: str,
+    head_rows: int = 5,
+    tail_rows: int = 3,
+    text_chars: int = 2000,
+) -> str:
+    """Replace a large result with a bounded, structured digest."""
+    rows = parse_rows(raw)
+    if rows is None:
+        if len(raw) <= text_chars:
+            return raw
+        half = max(1, text_chars // 2)
+        head, tail = raw[:half], raw[len(raw) - half :]
+        return (
+            f"{head}\n"
+            f"[... {len(raw) - len(head) - len(tail)} characters omitted; full result "
+            f"stored as handle `{handle}` ...]\n"
+            f"{tail}"
+        )
+
+    head = rows[:head_rows]
+    tail = rows[max(head_rows, len(rows) - tail_rows) :]
+    digest = {
+        "status": "OK",
+        "compacted": True,
+        "handle": handle,
+        "rowCount": len(rows),
+        "columns": column_stats(rows),
+        "head": [{k: _clip(v) for k, v in row.items()} for row in head],
+        "tail": [{k: _clip(v) for k, v in row.items()} for row in tail],
+    }
+    return json.dumps(digest, ensure_ascii=False, default=str)
@@ -1,7 +1,6 @@
 from typing import List, Optional, Tuple
 
 import requests
-from bs4 import BeautifulSoup
 
 from app.logger import logger
 from app.tool.search.base import SearchItem, WebSearchEngine
@@ -83,6 +82,8 @@ class BingSearchEngine(WebSearchEngine):
         Returns:
             tuple: (List of SearchItem objects, next page URL or None)
         """
+        from bs4 import BeautifulSoup
+
         try:
             res = self.session.get(url=url)
             res.encoding = "utf-8"
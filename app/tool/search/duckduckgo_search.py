@@ -1,7 +1,5 @@
 from typing import List
 
-from duckduckgo_search import DDGS
-
 from app.tool.search.base import SearchItem, WebSearchEngine
 
 
@@ -14,6 +12,8 @@ class DuckDuckGoSearchEngine(WebSearchEngine):
 
         Returns results formatted according to SearchItem model.
         """
+        from duckduckgo_search import DDGS
+
         raw_results = DDGS().text(query, max_results=num_results)
 
         results = []
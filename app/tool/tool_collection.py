@@ -1,5 +1,5 @@
 """Collection classes for managing multiple tools."""
-from typing import Any, Dict, List
+from typing import Any, Callable, Dict, List, Optional
 
 from app.exceptions import ToolError
 from app.logger import logger
@@ -15,12 +15,36 @@ class ToolCollection:
     def __init__(self, *tools: BaseTool):
         self.tools = tools
         self.tool_map = {tool.name: tool for tool in tools}
+        # Bumped whenever the tool set changes; memoized params follow it
+        self.version = 0
+        self._params: Optional[List[Dict[str, Any]]] = None
+        self._params_tokens: Optional[int] = None
 
     def __iter__(self):
         return iter(self.tools)
 
+    def _invalidate(self) -> None:
+        """Drop memoized params after tools were added or removed."""
+        self.version += 1
+        self._params = None
+        self._params_tokens = None
+
     def to_params(self) -> List[Dict[str, Any]]:
-        return [tool.to_param() for tool in self.tools]
+        """Tool schemas in function-calling format, built once per tool set.
+
+        The returned list is shared between calls and must not be mutated.
+        """
+        if self._params is None:
+            self._params = [tool.to_param() for tool in self.tools]
+        return self._params
+
+    def params_tokens(self, count_tokens: Callable[[str], int]) -> int:
+        """Estimated prompt tokens of ``to_params()``, computed once per tool set."""
+        if self._params_tokens is None:
+            self._params_tokens = sum(
+                count_tokens(str(param)) for param in self.to_params()
+            )
+        return self._params_tokens
 
     async def execute(
         self, *, name: str, tool_input: Dict[str, Any] = None
@@ -59,6 +83,7 @@ class ToolCollection:
 
         self.tools += (tool,)
         self.tool_map[tool.name] = tool
+        self._invalidate()
         return self
 
     def add_tools(self, *tools: BaseTool):
@@ -2,7 +2,6 @@ import asyncio
 from typing import Any, Dict, List, Optional
 
 import requests
-from bs4 import BeautifulSoup
 from pydantic import BaseModel, ConfigDict, Field, model_validator
 from tenacity import retry, stop_after_attempt, wait_exponential
 
@@ -135,6 +134,8 @@ class WebContentFetcher:
                 return None
 
             # Parse HTML with BeautifulSoup
+            from bs4 import BeautifulSoup
+
             soup = BeautifulSoup(response.text, "html.parser")
 
             # Remove script and style elements
@@ -0,0 +1,412 @@
+"""Offline end-to-end benchmark of ``EnhancedDatabaseQueryAgent``.
+
+Runs the agent against a scripted OpenAI-compatible stub (``stub_llm``) and
+the SQLite stand-in for ``mysql_mcp_server`` (``stub_mcp_server``, spawned over
+stdio like the real server) with generated schemas of 10/100/1000 tables.
+The scripted model answers each question in the fast path (plan + answer) or
+in the full ReAct loop (schema lookup, SQL, answer + terminate), so the
+numbers measure the agent's own overhead rather than a provider's.
+
+Reports per-phase timings (init, metadata, each step, LLM and tool calls),
+tokens, LLM calls and Python heap memory (tracemalloc; the MCP subprocess is
+not included). Tokens are counted in "estimate" mode, so no tiktoken encoding
+is downloaded. Results can be saved as a baseline and compared against later.
+
+Usage:
+    python benchmarks/agent_e2e.py --tables 10 100 1000 --output baseline.json
+    python benchmarks/agent_e2e.py --baseline baseline.json
+"""
+import argparse
+import asyncio
+import json
+import re
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from pydantic import PrivateAttr
+
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from stub_llm import LatencyProfile, start_in_thread  # noqa: E402
+from stub_mcp_server import build_database, table_name  # noqa: E402
+
+from app.agent.enhanced_database_query import EnhancedDatabaseQueryAgent  # noqa: E402
+from app.config import LLMSettings, config  # noqa: E402
+from app.llm import LLM  # noqa: E402
+from app.logger import define_log_level  # noqa: E402
+
+
+TABLE_PATTERN = re.compile(r"t\d{4}_[a-z]+")
+QUESTION_MARKER = "## 用户问题"
+
+# Metrics compared against a baseline; all are "lower is better"
+COMPARED_METRICS = [
+    "init_s",
+    "metadata_s",
+    "query_mean_s",
+    "query_max_s",
+    "steps_per_query",
+    "llm_calls_per_query",
+    "tokens_per_query",
+    "peak_mb",
+]
+
+
+def question_for(table: str) -> str:
+    return f"统计 {table} 表中各类别的记录数和总金额"
+
+
+def summary_sql(table: str) -> str:
+    return (
+        f"SELECT category, COUNT(*) AS cnt, ROUND(SUM(amount), 2) AS total "
+        f"FROM {table} GROUP BY category"
+    )
+
+
+class ScriptedResponder:
+    """Deterministic model for the stub LLM.
+
+    Without tools (fast path and answer prompts) it plans one SQL statement
+    or phrases an answer. With tools it walks the ReAct loop: inspect the
+    table schema, run the SQL, then answer and call ``terminate``.
+    """
+
+    def __call__(self, body: dict) -> dict:
+        messages = body.get("messages", [])
+        if body.get("tools"):
+            return self._tool_reply(messages, body["tools"])
+        return self._text_reply(messages)
+
+    @staticmethod
+    def _text(message: dict) -> str:
+        content = message.get("content") or ""
+        if isinstance(content, list):
+            content = " ".join(part.get("text", "") for part in content)
+        return content
+
+    def _question(self, messages: List[dict]) -> Tuple[int, str]:
+        """Index of the user question and the table it asks about."""
+        for index in range(len(messages) - 1, -1, -1):
+            if messages[index].get("role") != "user":
+                continue
+            text = self._text(messages[index])
+            if QUESTION_MARKER in text:
+                text = text.split(QUESTION_MARKER, 1)[1]
+            match = TABLE_PATTERN.search(text)
+            if match:
+                return index, match.group(0)
+        return -1, table_name(0)
+
+    def _text_reply(self, messages: List[dict]) -> dict:
+        prompt = self._text(messages[-1]) if messages else ""
+        _, table = self._question(messages)
+        if '"answerable"' in prompt:
+            content = json.dumps(
+                {
+                    "answerable": True,
+                    "sql": summary_sql(table),
+                    "answer_template": f"{table} 各类别的记录数与总金额如下。",
+                },
+                ensure_ascii=False,
+            )
+        elif "已执行的 SQL 与结果" in prompt:
+            content = f"根据最新查询结果，{table} 共有 4 个类别，各类别的记录数和总金额见上表。"
+        else:
+            content = "此前的对话统计了若干表中各类别的记录数和总金额。"
+        return {"role": "assistant", "content": content}
+
+    def _tool_reply(self, messages: List[dict], tools: List[dict]) -> dict:
+        names = [tool["function"]["name"] for tool in tools]
+
+        def tool(suffix: str) -> str:
+            return next(name for name in names if name.endswith(suffix))
+
+        index, table = self._question(messages)
+        done = sum(1 for message in messages[index + 1 :] if message.get("role") == "tool")
+        if done == 0:
+            content, name, arguments = None, tool("get_table_schema"), {"table": table}
+        elif done == 1:
+            content, name, arguments = None, tool("execute_sql"), {"query": summary_sql(table)}
+        else:
+            content = f"根据查询结果，{table} 共有 4 个类别，各类别的记录数和总金额如上。"
+            name, arguments = "terminate", {"status": "success"}
+        return {
+            "role": "assistant",
+            "content": content,
+            "tool_calls": [
+                {
+                    "id": f"call_{len(messages)}_{done}",
+                    "type": "function",
+                    "function": {
+                        "name": name,
+                        "arguments": json.dumps(arguments, ensure_ascii=False),
+                    },
+                }
+            ],
+        }
+
+
+class PhaseTimer:
+    """Collects wall-clock samples per named phase."""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+
+    @contextmanager
+    def measure(self, phase: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.samples[phase].append(time.perf_counter() - start)
+
+    def total(self, prefix: str) -> float:
+        return sum(
+            sum(values) for phase, values in self.samples.items() if phase.startswith(prefix)
+        )
+
+    def summary(self) -> Dict[str, dict]:
+        return {
+            phase: {
+                "count": len(values),
+                "total_s": round(sum(values), 4),
+                "mean_ms": round(statistics.mean(values) * 1000, 2),
+                "p50_ms": round(statistics.median(values) * 1000, 2),
+                "max_ms": round(max(values) * 1000, 2),
+            }
+            for phase, values in sorted(self.samples.items())
+            if values
+        }
+
+
+class InstrumentedAgent(EnhancedDatabaseQueryAgent):
+    """``EnhancedDatabaseQueryAgent`` with timing hooks around each phase."""
+
+    _timer: PhaseTimer = PrivateAttr(default_factory=PhaseTimer)
+
+    @property
+    def timer(self) -> PhaseTimer:
+        return self._timer
+
+    async def _preload_basic_metadata(self):
+        with self.timer.measure("metadata.list_tables"):
+            await super()._preload_basic_metadata()
+
+    async def _inject_metadata_with_strategy(self):
+        with self.timer.measure("metadata.inject"):
+            await super()._inject_metadata_with_strategy()
+
+    async def step(self) -> str:
+        with self.timer.measure("step"):
+            return await super().step()
+
+    async def _ask_llm(self, **request):
+        with self.timer.measure("llm.ask_tool"):
+            return await super()._ask_llm(**request)
+
+    async def _run_fast_path(self, request: str, reference=None) -> Optional[str]:
+        with self.timer.measure("fast_path"):
+            return await super()._run_fast_path(request, reference)
+
+    async def _phrase_answer(self, *args, **kwargs) -> str:
+        with self.timer.measure("llm.answer"):
+            return await super()._phrase_answer(*args, **kwargs)
+
+    async def execute_tool(self, command) -> str:
+        name = command.function.name if command and command.function else "invalid"
+        if name.startswith("mcp_"):
+            name = name.split("_", 2)[-1]
+        with self.timer.measure(f"tool.{name}"):
+            return await super().execute_tool(command)
+
+    async def _execute_mcp_tool(self, tool_name: str, arguments: dict):
+        with self.timer.measure(f"mcp.{tool_name}"):
+            return await super()._execute_mcp_tool(tool_name, arguments)
+
+
+async def run_scenario(
+    tables: int, mode: str, queries: int, db_path: Path, stub_app, loading_strategy: str
+) -> dict:
+    llm = LLM()
+    agent = InstrumentedAgent(max_steps=10)
+    agent.fast_path = mode == "fast"
+    agent.query_cache = None  # Every question must reach the model
+
+    tracemalloc.reset_peak()
+    heap_before = tracemalloc.get_traced_memory()[0]
+    with agent.timer.measure("init"):
+        await agent.initialize(
+            connection_type="stdio",
+            command=sys.executable,
+            args=[str(Path(__file__).resolve().parent / "stub_mcp_server.py"), "--db", str(db_path)],
+            loading_strategy=loading_strategy,
+        )
+    heap_after_init = tracemalloc.get_traced_memory()[0]
+
+    per_query = []
+    try:
+        for i in range(queries):
+            table = table_name(i * tables // queries)
+            await agent.reset()
+            steps_before = len(agent.timer.samples["step"])
+            tokens_before = llm.total_input_tokens + llm.total_completion_tokens
+            calls_before = stub_app.state.requests
+
+            start = time.perf_counter()
+            answer = await agent.run(question_for(table))
+            elapsed = time.perf_counter() - start
+
+            per_query.append(
+                {
+                    "table": table,
+                    "seconds": round(elapsed, 4),
+                    "step_ms": [
+                        round(value * 1000, 2)
+                        for value in agent.timer.samples["step"][steps_before:]
+                    ],
+                    "llm_calls": stub_app.state.requests - calls_before,
+                    "tokens": llm.total_input_tokens
+                    + llm.total_completion_tokens
+                    - tokens_before,
+                    "answered": table in answer,
+                }
+            )
+    finally:
+        await agent.cleanup()
+
+    current, peak = tracemalloc.get_traced_memory()
+    init_s = sum(agent.timer.samples["init"])
+    metadata_s = agent.timer.total("metadata.")
+    seconds = [query["seconds"] for query in per_query]
+    return {
+        "tables": tables,
+        "mode": mode,
+        "loading_strategy": loading_strategy,
+        "queries": queries,
+        "init_s": round(init_s, 4),
+        "connect_s": round(init_s - metadata_s, 4),
+        "metadata_s": round(metadata_s, 4),
+        "query_mean_s": round(statistics.mean(seconds), 4),
+        "query_max_s": round(max(seconds), 4),
+        "steps_per_query": statistics.mean(len(query["step_ms"]) for query in per_query),
+        "llm_calls_per_query": statistics.mean(query["llm_calls"] for query in per_query),
+        "tokens_per_query": round(statistics.mean(query["tokens"] for query in per_query)),
+        "answered": sum(query["answered"] for query in per_query),
+        "init_heap_mb": round((heap_after_init - heap_before) / 1e6, 2),
+        "retained_heap_mb": round((current - heap_before) / 1e6, 2),
+        "peak_mb": round(peak / 1e6, 2),
+        "phases": agent.timer.summary(),
+        "per_query": per_query,
+    }
+
+
+def compare(results: List[dict], baseline: List[dict], threshold: float) -> List[str]:
+    """Print metric changes against a baseline and return the regressions."""
+    previous = {(r["tables"], r["mode"]): r for r in baseline}
+    regressions = []
+    for result in results:
+        key = (result["tables"], result["mode"])
+        if key not in previous:
+            continue
+        print(f"\n{result['tables']} tables / {result['mode']}:")
+        for metric in COMPARED_METRICS:
+            old, new = previous[key].get(metric), result.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            flag = "  <-- regression" if change > threshold else ""
+            print(f"  {metric:20s} {old:>12} -> {new:>12} ({change:+.1%}){flag}")
+            if flag:
+                regressions.append(f"{key}: {metric} {change:+.1%}")
+    return regressions
+
+
+def print_table(results: List[dict]) -> None:
+    header = (
+        f"{'tables':>6} {'mode':>6} {'init s':>8} {'meta s':>8} {'query s':>8} "
+        f"{'steps':>5} {'calls':>5} {'tokens':>8} {'peak MB':>8}"
+    )
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(
+            f"{r['tables']:>6} {r['mode']:>6} {r['init_s']:>8.3f} {r['metadata_s']:>8.3f} "
+            f"{r['query_mean_s']:>8.3f} {r['steps_per_query']:>5.1f} "
+            f"{r['llm_calls_per_query']:>5.1f} {r['tokens_per_query']:>8} {r['peak_mb']:>8.1f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tables", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--modes", nargs="+", choices=["fast", "react"], default=["fast", "react"])
+    parser.add_argument("--queries", type=int, default=5, help="Questions per scenario")
+    parser.add_argument("--rows", type=int, default=50, help="Rows per generated table")
+    parser.add_argument(
+        "--loading-strategy", default="on_demand", choices=["auto", "full", "on_demand"]
+    )
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="Stub LLM median latency (s)")
+    parser.add_argument("--output", help="Write results JSON (usable as a baseline)")
+    parser.add_argument("--baseline", help="Compare against a previous results JSON")
+    parser.add_argument(
+        "--threshold", type=float, default=0.25, help="Relative increase reported as a regression"
+    )
+    args = parser.parse_args()
+
+    define_log_level(print_level="ERROR", logfile_level="ERROR")
+    # Exact counting would download tiktoken's BPE files; stay offline
+    config.tokenizer_config.mode = "estimate"
+    base_url, stub_app = start_in_thread(
+        LatencyProfile(median=args.llm_latency, sigma=0.0, tail_prob=0.0),
+        ScriptedResponder(),
+    )
+    stub_settings = LLMSettings(
+        model="stub-model", base_url=base_url, api_key="stub", api_type="openai", api_version=""
+    )
+    # The agent uses the default LLM instance; register it against the stub first
+    LLM("default", {"default": stub_settings})
+
+    async def run_all(workdir: Path) -> List[dict]:
+        results = []
+        for tables in args.tables:
+            db_path = workdir / f"bench_{tables}.sqlite"
+            build_database(db_path, tables, args.rows)
+            for mode in args.modes:
+                result = await run_scenario(
+                    tables, mode, args.queries, db_path, stub_app, args.loading_strategy
+                )
+                results.append(result)
+                print(
+                    f"✔ {tables} tables / {mode}: init {result['init_s']:.2f}s, "
+                    f"query {result['query_mean_s']:.3f}s", file=sys.stderr
+                )
+        return results
+
+    tracemalloc.start()
+    with tempfile.TemporaryDirectory() as workdir:
+        results = asyncio.run(run_all(Path(workdir)))
+    tracemalloc.stop()
+
+    print_table(results)
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2, ensure_ascii=False))
+        print(f"\nResults written to {args.output}")
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) above {args.threshold:.0%}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
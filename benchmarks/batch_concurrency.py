@@ -0,0 +1,114 @@
+"""Measure batch throughput of ``run.py -f --concurrency N``.
+
+Runs the same question list through ``run._run_batch`` at
+several concurrency levels, against the scripted stub LLM (with a fixed
+per-call latency standing in for the provider) and the SQLite MCP stand-in
+from ``agent_e2e``. Forked agent sessions share one MCP connection and the
+loaded catalog, so throughput should scale close to linearly until the
+``[llm_rate_limit]`` settings (or ``--max-concurrent-requests``) bind.
+
+Usage:
+    python benchmarks/batch_concurrency.py --queries 40 --levels 1 2 4 8
+"""
+import argparse
+import asyncio
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from agent_e2e import ScriptedResponder, question_for  # noqa: E402
+from stub_llm import LatencyProfile, start_in_thread  # noqa: E402
+from stub_mcp_server import build_database, table_name  # noqa: E402
+
+import run  # noqa: E402
+from app.agent.enhanced_database_query import EnhancedDatabaseQueryAgent  # noqa: E402
+from app.config import LLMRateLimitSettings, LLMSettings  # noqa: E402
+from app.llm import LLM  # noqa: E402
+from app.llm_limiter import RateLimiter  # noqa: E402
+from app.logger import define_log_level  # noqa: E402
+import app.llm_limiter  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tables", type=int, default=100)
+    parser.add_argument("--queries", type=int, default=40)
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="Stub LLM latency (s)")
+    parser.add_argument("--max-concurrent-requests", type=int, default=0)
+    parser.add_argument("--requests-per-minute", type=int, default=0)
+    parser.add_argument("--mode", choices=["fast", "react"], default="react")
+    args = parser.parse_args()
+
+    define_log_level(print_level="ERROR", logfile_level="ERROR")
+    base_url, _ = start_in_thread(
+        LatencyProfile(median=args.llm_latency, sigma=0.0, tail_prob=0.0),
+        ScriptedResponder(),
+    )
+    LLM(
+        "default",
+        {
+            "default": LLMSettings(
+                model="stub-model", base_url=base_url, api_key="stub",
+                api_type="openai", api_version="",
+            )
+        },
+    )
+    app.llm_limiter._rate_limiter = RateLimiter(
+        LLMRateLimitSettings(
+            max_concurrent_requests=args.max_concurrent_requests,
+            requests_per_minute=args.requests_per_minute,
+        )
+    )
+    queries = [
+        question_for(table_name(i * args.tables // args.queries)) for i in range(args.queries)
+    ]
+
+    async def run_levels(db_path: Path) -> list:
+        agent = EnhancedDatabaseQueryAgent()
+        agent.fast_path = args.mode == "fast"
+        agent.query_cache = None
+        await agent.initialize(
+            connection_type="stdio",
+            command=sys.executable,
+            args=[str(Path(__file__).resolve().parent / "stub_mcp_server.py"), "--db", str(db_path)],
+        )
+        rows = []
+        try:
+            for level in args.levels:
+                results = []
+                start = time.perf_counter()
+                await run._run_batch(agent, list(enumerate(queries)), level, results.append)
+                elapsed = time.perf_counter() - start
+                complete = sorted(r["index"] for r in results) == list(range(len(queries)))
+                rows.append(
+                    {
+                        "concurrency": level,
+                        "seconds": round(elapsed, 2),
+                        "queries_per_min": round(len(queries) / elapsed * 60, 1),
+                        "succeeded": sum(r["status"] == "success" for r in results),
+                        "complete": complete,
+                    }
+                )
+        finally:
+            await agent.cleanup()
+        base = rows[0]["queries_per_min"]
+        for row in rows:
+            row["speedup"] = round(row["queries_per_min"] / base, 2)
+        return rows
+
+    with tempfile.TemporaryDirectory() as workdir:
+        db_path = Path(workdir) / "batch.sqlite"
+        build_database(db_path, args.tables, 50)
+        rows = asyncio.run(run_levels(db_path))
+    print(json.dumps(rows, indent=2))
+
+
+if __name__ == "__main__":
+    main()
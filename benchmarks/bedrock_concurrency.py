@@ -0,0 +1,131 @@
+"""Measure concurrent Bedrock sessions against the in-process runtime stub.
+
+Runs ``--sessions`` concurrent ``LLM.ask_tool_stream`` calls through the
+Bedrock adapter while a heartbeat task records event loop lag. With blocking
+boto3 calls on the loop the wall time grows linearly with the session count
+and the lag equals a whole generation; run off the loop, sessions overlap and
+the first streamed delta arrives after the stub's first-token delay.
+
+Usage:
+    python benchmarks/bedrock_concurrency.py [--sessions 8] [--tokens 40]
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from stub_bedrock import StubBedrockRuntime  # noqa: E402
+
+from app.bedrock import BedrockClient  # noqa: E402
+from app.config import LLMSettings  # noqa: E402
+from app.llm import LLM  # noqa: E402
+from app.schema import Message  # noqa: E402
+
+
+TOOLS = [
+    {
+        "type": "function",
+        "function": {
+            "name": "execute_sql",
+            "description": "Run a SQL query",
+            "parameters": {
+                "type": "object",
+                "properties": {"query": {"type": "string"}},
+                "required": ["query"],
+            },
+        },
+    }
+]
+
+
+async def heartbeat(lags: list, stop: asyncio.Event, interval: float = 0.01) -> None:
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - start - interval)
+
+
+async def run(args) -> dict:
+    # boto3 is not called, but creating the real client needs a region
+    os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+    settings = LLMSettings(
+        model="stub.bedrock-model",
+        base_url="",
+        api_key="stub",
+        api_type="aws",
+        api_version="",
+    )
+    llm = LLM("bedrock-stub", {"default": settings, "bedrock-stub": settings})
+    llm.client = BedrockClient(
+        client=StubBedrockRuntime(
+            tokens=args.tokens,
+            first_token=args.first_token,
+            token_gap=args.token_gap,
+            tool_name="execute_sql" if args.tools else None,
+        )
+    )
+
+    first_delta = []
+
+    async def session():
+        start = time.perf_counter()
+        seen = False
+        message = None
+        async for event in llm.ask_tool_stream(
+            [Message.user_message("how many rows?")],
+            tools=TOOLS if args.tools else None,
+        ):
+            if not seen and event["type"] in ("content", "tool_call"):
+                first_delta.append(time.perf_counter() - start)
+                seen = True
+            if event["type"] == "message":
+                message = event["message"]
+        return message
+
+    lags: list = []
+    stop = asyncio.Event()
+    beat = asyncio.create_task(heartbeat(lags, stop))
+    start = time.perf_counter()
+    messages = await asyncio.gather(*(session() for _ in range(args.sessions)))
+    wall = time.perf_counter() - start
+    stop.set()
+    await beat
+
+    sample = messages[0]
+    single = args.first_token + args.tokens * args.token_gap
+    return {
+        "sessions": args.sessions,
+        "single_generation_s": round(single, 3),
+        "wall_s": round(wall, 3),
+        "first_delta_p50_s": round(statistics.median(first_delta), 3),
+        "max_loop_lag_s": round(max(lags, default=0.0), 3),
+        "content": (sample.content or "")[:40] if sample else None,
+        "tool_calls": [call.function.name for call in sample.tool_calls or []]
+        if sample
+        else None,
+        "input_tokens": llm.total_input_tokens,
+        "completion_tokens": llm.total_completion_tokens,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=8)
+    parser.add_argument("--tokens", type=int, default=40)
+    parser.add_argument("--first-token", type=float, default=0.2)
+    parser.add_argument("--token-gap", type=float, default=0.01)
+    parser.add_argument("--tools", action="store_true", help="reply with a tool call")
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args)), indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Measure the import cost of the CLI, API server and MCP server entry points.
+
+Each module is imported in a fresh interpreter with ``python -X importtime``;
+the report gives the wall time of the process, the cumulative import time of
+the module and the slowest packages it pulls in (each including its own
+dependencies, so the figures overlap). Heavy optional dependencies (Docker
+SDK, browser_use, search engine clients, boto3) should not appear unless the
+entry point actually uses them.
+
+Usage:
+    python benchmarks/import_time.py [--modules run app.api.server] [--repeat 3] [--top 8]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+
+ROOT = Path(__file__).resolve().parent.parent
+
+DEFAULT_MODULES = ["run", "app.api.server", "app.mcp.server", "mysql_mcp_server.server"]
+
+
+def import_profile(module: str) -> dict:
+    """Import a module in a new interpreter and parse its ``-X importtime`` log."""
+    path = [str(ROOT), os.environ.get("PYTHONPATH")]
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, path)))
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    wall = time.perf_counter() - start
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+
+    packages = {}
+    total = 0
+    root = module.split(".")[0]
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line.split("|")
+        # Nested imports are indented two spaces per level
+        nested = name[1:].startswith(" ")
+        name = name.strip()
+        if not nested and name == module:
+            total = int(cumulative_us)
+        elif nested and "." not in name and name != root:
+            # Cumulative time of each package, including what it imports
+            packages[name] = max(packages.get(name, 0), int(cumulative_us))
+    return {"wall": wall, "total_us": total, "packages": packages}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--modules", nargs="+", default=DEFAULT_MODULES)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--top", type=int, default=8)
+    args = parser.parse_args()
+
+    results = []
+    for module in args.modules:
+        runs = [import_profile(module) for _ in range(args.repeat)]
+        best = min(runs, key=lambda run: run["total_us"])
+        slowest = sorted(best["packages"].items(), key=lambda item: -item[1])[: args.top]
+        results.append(
+            {
+                "module": module,
+                "wall_ms": round(statistics.median(run["wall"] for run in runs) * 1000, 1),
+                "import_ms": round(best["total_us"] / 1000, 1),
+                "slowest_packages_ms": {name: round(us / 1000, 1) for name, us in slowest},
+            }
+        )
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Measure LLM call latency percentiles against the local stub server.
+
+Starts ``stub_llm`` in a background thread and issues ``LLM.ask`` calls
+(non-streaming, so they can be hedged) with hedging off and on, then reports
+p50/p95/p99 latency, errors and how often the hedged request won.
+
+Usage:
+    python benchmarks/llm_latency.py [--requests 300] [--concurrency 8]
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from stub_llm import LatencyProfile, start_in_thread  # noqa: E402
+
+from app.config import LLMRetrySettings, LLMSettings  # noqa: E402
+from app.llm import LLM  # noqa: E402
+from app.retry import RetryPolicy  # noqa: E402
+from app.schema import Message  # noqa: E402
+
+
+def percentile(values, q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+async def run_mode(base_url: str, hedge: bool, requests: int, concurrency: int) -> dict:
+    name = f"stub-{'hedged' if hedge else 'plain'}"
+    settings = LLMSettings(
+        model="stub-model",
+        base_url=base_url,
+        api_key="stub",
+        api_type="openai",
+        api_version="",
+    )
+    llm = LLM(name, {"default": settings, name: settings})
+    llm.retry_policy = RetryPolicy(
+        LLMRetrySettings(
+            hedge=hedge, hedge_min_samples=20, hedge_min_delay=0.1, base_delay=0.05
+        )
+    )
+
+    latencies, errors = [], 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await llm.ask([Message.user_message("ping")], stream=False)
+                latencies.append(time.perf_counter() - start)
+            except Exception:
+                errors += 1
+
+    await asyncio.gather(*(one() for _ in range(requests)))
+    return {
+        "hedge": hedge,
+        "requests": requests,
+        "errors": errors,
+        "p50": round(statistics.median(latencies), 3),
+        "p95": round(percentile(latencies, 0.95), 3),
+        "p99": round(percentile(latencies, 0.99), 3),
+        "hedged": llm.retry_policy.hedged,
+        "hedge_wins": llm.retry_policy.hedge_wins,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--median", type=float, default=0.2)
+    parser.add_argument("--tail-prob", type=float, default=0.05)
+    parser.add_argument("--tail-delay", type=float, default=3.0)
+    parser.add_argument("--error-rate", type=float, default=0.02)
+    args = parser.parse_args()
+
+    base_url, _ = start_in_thread(
+        LatencyProfile(
+            median=args.median,
+            tail_prob=args.tail_prob,
+            tail_delay=args.tail_delay,
+            error_rate=args.error_rate,
+        )
+    )
+
+    async def run_all():
+        return [
+            await run_mode(base_url, hedge, args.requests, args.concurrency)
+            for hedge in (False, True)
+        ]
+
+    print(json.dumps(asyncio.run(run_all()), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""In-process stub of the boto3 ``bedrock-runtime`` client.
+
+Implements ``converse`` and ``converse_stream`` with the same blocking
+behaviour as boto3: a first-token delay, then one event per token with a
+fixed gap, so an adapter that calls it on the event loop stalls every other
+coroutine for the whole generation. Replies are a short text answer, or a
+tool call when the request offers tools and ``tool_name`` is set.
+
+Pass it to ``BedrockClient(client=StubBedrockRuntime(...))``.
+"""
+import json
+import time
+import uuid
+from typing import Iterator, List, Optional
+
+
+class StubEventStream:
+    """Iterable of converse_stream events with a ``close`` like botocore's."""
+
+    def __init__(self, events: List[dict], first_token: float, token_gap: float):
+        self.events = events
+        self.first_token = first_token
+        self.token_gap = token_gap
+        self.closed = False
+
+    def __iter__(self) -> Iterator[dict]:
+        time.sleep(self.first_token)
+        for event in self.events:
+            if self.closed:
+                return
+            if "contentBlockDelta" in event:
+                time.sleep(self.token_gap)
+            yield event
+
+    def close(self) -> None:
+        self.closed = True
+
+
+class StubBedrockRuntime:
+    def __init__(
+        self,
+        tokens: int = 40,
+        first_token: float = 0.2,
+        token_gap: float = 0.01,
+        tool_name: Optional[str] = None,
+    ):
+        self.tokens = tokens
+        self.first_token = first_token
+        self.token_gap = token_gap
+        self.tool_name = tool_name
+        self.requests: List[dict] = []
+
+    def _blocks(self, request: dict) -> List[dict]:
+        if self.tool_name and request.get("toolConfig"):
+            return [
+                {
+                    "toolUse": {
+                        "toolUseId": f"tooluse_{uuid.uuid4().hex[:12]}",
+                        "name": self.tool_name,
+                        "input": {"query": "SELECT 1"},
+                    }
+                }
+            ]
+        return [{"text": " ".join(f"word{i}" for i in range(self.tokens))}]
+
+    def _usage(self, blocks: List[dict]) -> dict:
+        output = self.tokens if "text" in blocks[0] else 10
+        return {"inputTokens": 100, "outputTokens": output, "totalTokens": 100 + output}
+
+    def converse(self, **request) -> dict:
+        self.requests.append(request)
+        time.sleep(self.first_token + self.tokens * self.token_gap)
+        blocks = self._blocks(request)
+        return {
+            "output": {"message": {"role": "assistant", "content": blocks}},
+            "stopReason": "tool_use" if "toolUse" in blocks[0] else "end_turn",
+            "usage": self._usage(blocks),
+        }
+
+    def converse_stream(self, **request) -> dict:
+        self.requests.append(request)
+        blocks = self._blocks(request)
+        events: List[dict] = [{"messageStart": {"role": "assistant"}}]
+        if "toolUse" in blocks[0]:
+            tool_use = blocks[0]["toolUse"]
+            arguments = json.dumps(tool_use["input"])
+            events.append(
+                {
+                    "contentBlockStart": {
+                        "contentBlockIndex": 0,
+                        "start": {
+                            "toolUse": {
+                                "toolUseId": tool_use["toolUseId"],
+                                "name": tool_use["name"],
+                            }
+                        },
+                    }
+                }
+            )
+            for i in range(0, len(arguments), 8):
+                events.append(
+                    {
+                        "contentBlockDelta": {
+                            "contentBlockIndex": 0,
+                            "delta": {"toolUse": {"input": arguments[i : i + 8]}},
+                        }
+                    }
+                )
+            stop_reason = "tool_use"
+        else:
+            for i, word in enumerate(blocks[0]["text"].split(" ")):
+                events.append(
+                    {
+                        "contentBlockDelta": {
+                            "contentBlockIndex": 0,
+                            "delta": {"text": word if i == 0 else " " + word},
+                        }
+                    }
+                )
+            stop_reason = "end_turn"
+        events += [
+            {"contentBlockStop": {"contentBlockIndex": 0}},
+            {"messageStop": {"stopReason": stop_reason}},
+            {"metadata": {"usage": self._usage(blocks), "metrics": {"latencyMs": 1}}},
+        ]
+        return {"stream": StubEventStream(events, self.first_token, self.token_gap)}
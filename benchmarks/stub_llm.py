@@ -0,0 +1,199 @@
+"""Local OpenAI-compatible stub server with a configurable latency distribution.
+
+Serves ``POST /v1/chat/completions`` (streaming and non-streaming) and
+``GET /v1/models``. Latency is log-normal around ``--median`` with a slow tail
+(``--tail-prob`` of requests take an extra ``--tail-delay`` seconds) and an
+optional share of 503 errors, which is enough to exercise retries and hedged
+requests without a real provider.
+
+Replies are "stub answer" unless ``create_app`` is given a responder, which
+maps the request body to an assistant message (content and/or tool calls) so
+that scripted agent runs can be replayed. Usage is estimated from the request
+and reply size.
+
+Usage:
+    python benchmarks/stub_llm.py --port 8765 --median 0.2 --tail-prob 0.05
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import socket
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+
+@dataclass
+class LatencyProfile:
+    median: float = 0.2
+    sigma: float = 0.3
+    tail_prob: float = 0.05
+    tail_delay: float = 3.0
+    error_rate: float = 0.0
+
+    def sample(self) -> float:
+        delay = self.median * math.exp(random.gauss(0, self.sigma))
+        if random.random() < self.tail_prob:
+            delay += self.tail_delay
+        return delay
+
+
+Responder = Callable[[dict], dict]
+
+
+def _default_responder(body: dict) -> dict:
+    return {"role": "assistant", "content": "stub answer"}
+
+
+def estimate_tokens(value) -> int:
+    """Rough token estimate (~3 characters per token for mixed CJK/ASCII)."""
+    text = value if isinstance(value, str) else json.dumps(value, ensure_ascii=False)
+    return max(1, len(text) // 3)
+
+
+def _usage(body: dict, message: dict) -> dict:
+    prompt = estimate_tokens(body.get("messages", [])) + (
+        estimate_tokens(body["tools"]) if body.get("tools") else 0
+    )
+    completion = estimate_tokens(message.get("content") or "") + sum(
+        estimate_tokens(call["function"]) for call in message.get("tool_calls") or []
+    )
+    return {
+        "prompt_tokens": prompt,
+        "completion_tokens": completion,
+        "total_tokens": prompt + completion,
+    }
+
+
+def _completion(model: str, message: dict, usage: dict) -> dict:
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [
+            {
+                "index": 0,
+                "message": message,
+                "finish_reason": "tool_calls" if message.get("tool_calls") else "stop",
+            }
+        ],
+        "usage": usage,
+    }
+
+
+def _chunks(model: str, message: dict, usage: Optional[dict]):
+    def chunk(delta: dict, **extra) -> str:
+        payload = {
+            "id": "chatcmpl-stub",
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "delta": delta, "finish_reason": None}],
+            **extra,
+        }
+        return f"data: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+    content = message.get("content") or ""
+    for start in range(0, len(content), 8):
+        yield chunk({"content": content[start : start + 8]})
+    for index, call in enumerate(message.get("tool_calls") or []):
+        yield chunk(
+            {
+                "tool_calls": [
+                    {
+                        "index": index,
+                        "id": call["id"],
+                        "type": "function",
+                        "function": call["function"],
+                    }
+                ]
+            }
+        )
+    if usage:
+        yield chunk({}, usage=usage)
+    yield "data: [DONE]\n\n"
+
+
+def create_app(profile: LatencyProfile, responder: Optional[Responder] = None) -> FastAPI:
+    app = FastAPI(title="Stub LLM")
+    app.state.requests = 0
+    responder = responder or _default_responder
+
+    @app.get("/v1/models")
+    async def models():
+        return {"object": "list", "data": [{"id": "stub-model", "object": "model"}]}
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        app.state.requests += 1
+        await asyncio.sleep(profile.sample())
+        if random.random() < profile.error_rate:
+            return JSONResponse(
+                {"error": {"message": "stub overloaded", "type": "server_error"}},
+                status_code=503,
+            )
+
+        model = body.get("model", "stub-model")
+        message = responder(body)
+        usage = _usage(body, message)
+        if not body.get("stream"):
+            return _completion(model, message, usage)
+
+        include_usage = (body.get("stream_options") or {}).get("include_usage")
+        return StreamingResponse(
+            _chunks(model, message, usage if include_usage else None),
+            media_type="text/event-stream",
+        )
+
+    return app
+
+
+def start_in_thread(profile: LatencyProfile, responder: Optional[Responder] = None):
+    """Serve the stub on a free local port in a daemon thread.
+
+    Returns:
+        The ``/v1`` base URL and the FastAPI app (whose ``state.requests``
+        counts the completions served).
+    """
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    app = create_app(profile, responder)
+    server = uvicorn.Server(
+        uvicorn.Config(app, host="127.0.0.1", port=port, log_level="error")
+    )
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{port}/v1", app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--median", type=float, default=0.2)
+    parser.add_argument("--sigma", type=float, default=0.3)
+    parser.add_argument("--tail-prob", type=float, default=0.05)
+    parser.add_argument("--tail-delay", type=float, default=3.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    profile = LatencyProfile(
+        args.median, args.sigma, args.tail_prob, args.tail_delay, args.error_rate
+    )
+    uvicorn.run(create_app(profile), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+"""SQLite-backed stand-in for ``mysql_mcp_server`` with a generated schema.
+
+Serves the same MCP tools (``list_tables``, ``get_table_schema``,
+``execute_sql``) over stdio with the same JSON payloads as the MySQL server,
+so the agent can be benchmarked without a database server. The schema is
+generated deterministically: ``--tables`` tables, each with ``--rows`` rows,
+a few typed columns and a reference to the previous table.
+
+Usage:
+    python benchmarks/stub_mcp_server.py --db /tmp/bench_100.sqlite --tables 100
+"""
+import argparse
+import asyncio
+import json
+import random
+import sqlite3
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from mcp.server import Server
+from mcp.types import TextContent, Tool
+
+
+ENTITIES = ["orders", "customers", "products", "payments", "shipments", "stores", "staff", "reviews"]
+
+COLUMNS = [
+    ("id", "INTEGER PRIMARY KEY", "int(11)", "PRI", "主键"),
+    ("name", "TEXT", "varchar(64)", "", "名称"),
+    ("category", "TEXT", "varchar(32)", "MUL", "类别"),
+    ("amount", "REAL", "decimal(10,2)", "", "金额"),
+    ("created_at", "TEXT", "datetime", "", "创建时间"),
+    ("ref_id", "INTEGER", "int(11)", "MUL", "关联上一张表的 id"),
+]
+
+
+def table_name(index: int) -> str:
+    return f"t{index:04d}_{ENTITIES[index % len(ENTITIES)]}"
+
+
+def build_database(path: Path, tables: int, rows: int, seed: int = 7) -> None:
+    """Create the SQLite file with ``tables`` generated tables."""
+    rng = random.Random(seed)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if path.exists():
+        path.unlink()
+
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute("CREATE TABLE _meta_tables (name TEXT PRIMARY KEY, comment TEXT)")
+        for i in range(tables):
+            name = table_name(i)
+            columns = ", ".join(f"{col} {sql_type}" for col, sql_type, *_ in COLUMNS)
+            conn.execute(f"CREATE TABLE {name} ({columns})")
+            conn.execute(
+                "INSERT INTO _meta_tables VALUES (?, ?)",
+                (name, f"{ENTITIES[i % len(ENTITIES)]} 业务表 #{i}"),
+            )
+            conn.executemany(
+                f"INSERT INTO {name} VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        r + 1,
+                        f"{name}-{r}",
+                        rng.choice(["A", "B", "C", "D"]),
+                        round(rng.uniform(1, 1000), 2),
+                        f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d} 12:00:00",
+                        rng.randint(1, rows) if i else None,
+                    )
+                    for r in range(rows)
+                ],
+            )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+class StubDatabase:
+    """Answers the MCP tools from the generated SQLite database."""
+
+    def __init__(self, path: Path):
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.comments: Dict[str, str] = dict(
+            self.conn.execute("SELECT name, comment FROM _meta_tables").fetchall()
+        )
+        self.row_counts: Dict[str, int] = {
+            name: self.conn.execute(f"SELECT COUNT(*) FROM {name}").fetchone()[0]
+            for name in self.comments
+        }
+
+    def list_tables(self) -> dict:
+        tables = [
+            {
+                "name": name,
+                "comment": comment,
+                "rowCount": self.row_counts[name],
+                "keyColumns": [
+                    {"name": col, "comment": comment}
+                    for col, _, _, key, comment in COLUMNS
+                    if key or "name" in col or "id" in col
+                ][:5],
+            }
+            for name, comment in self.comments.items()
+        ]
+        return {"status": "success", "data": tables, "totalTables": len(tables)}
+
+    def get_table_schema(self, table: Optional[str]) -> dict:
+        if not table:
+            return {"error": "必须提供表名。"}
+        if table not in self.comments:
+            return {"error": f"表 '{table}' 不存在。"}
+        return {
+            "tableName": table,
+            "tableComment": self.comments[table],
+            "columns": [
+                {
+                    "name": col,
+                    "type": mysql_type,
+                    "isNullable": key != "PRI",
+                    "isPrimaryKey": key == "PRI",
+                    "isUniqueKey": False,
+                    "isForeignKeyIndex": key == "MUL",
+                    "default": None,
+                    "extra": "",
+                    "comment": comment,
+                }
+                for col, _, mysql_type, key, comment in COLUMNS
+            ],
+        }
+
+    def execute_sql(self, query: Optional[str]) -> dict:
+        if not query:
+            return {"error": "必须提供 SQL 查询语句。"}
+        try:
+            cursor = self.conn.execute(query)
+        except sqlite3.Error as e:
+            return {"error": f"SQL 错误: {e}"}
+        if cursor.description is None:
+            return {"status": "OK", "rowsAffected": cursor.rowcount}
+        columns = [desc[0] for desc in cursor.description]
+        rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+        return {"status": "OK", "data": rows, "rowCount": len(rows)}
+
+
+def create_server(db: StubDatabase) -> Server:
+    server = Server("mysql_mcp_server")
+
+    @server.list_tools()
+    async def list_tools() -> List[Tool]:
+        return [
+            Tool(
+                name="execute_sql",
+                description="执行单条原生 SQL 查询语句。以 JSON 格式返回结果。",
+                inputSchema={
+                    "type": "object",
+                    "properties": {"query": {"type": "string"}},
+                    "required": ["query"],
+                },
+            ),
+            Tool(
+                name="get_table_schema",
+                description="以 JSON 格式获取指定表的完整结构信息，包含列名、类型、键和注释。",
+                inputSchema={
+                    "type": "object",
+                    "properties": {"table": {"type": "string"}},
+                    "required": ["table"],
+                },
+            ),
+            Tool(
+                name="list_tables",
+                description="列出数据库中所有表的名称和详细注释信息。",
+                inputSchema={"type": "object", "properties": {}, "required": []},
+            ),
+        ]
+
+    @server.call_tool()
+    async def call_tool(name: str, arguments: dict) -> List[TextContent]:
+        if name == "list_tables":
+            result = db.list_tables()
+        elif name == "get_table_schema":
+            result = db.get_table_schema(arguments.get("table"))
+        elif name == "execute_sql":
+            result = db.execute_sql(arguments.get("query"))
+        else:
+            raise ValueError(f"未知的工具: {name}")
+        text = json.dumps(result, default=str, indent=2, ensure_ascii=False)
+        return [TextContent(type="text", text=text)]
+
+    return server
+
+
+async def serve(path: Path) -> None:
+    from mcp.server.stdio import stdio_server
+
+    server = create_server(StubDatabase(path))
+    async with stdio_server() as (read_stream, write_stream):
+        await server.run(read_stream, write_stream, server.create_initialization_options())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", required=True, help="SQLite file to serve")
+    parser.add_argument("--tables", type=int, default=None, help="(Re)generate with N tables")
+    parser.add_argument("--rows", type=int, default=50)
+    args = parser.parse_args()
+
+    path = Path(args.db)
+    if args.tables is not None or not path.exists():
+        build_database(path, args.tables or 10, args.rows)
+    asyncio.run(serve(path))
+
+
+if __name__ == "__main__":
+    main()
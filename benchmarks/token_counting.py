@@ -0,0 +1,103 @@
+"""Benchmark per-step token accounting on long agent histories.
+
+Simulates an agent run where every step adds an assistant tool call and its
+tool result, then counts the whole history before the next request the way
+``LLM.ask_tool`` does. Compares tokenizing every message from scratch with the
+per-message costs ``TokenCounter`` caches on ``Message`` objects.
+
+Usage:
+    python benchmarks/token_counting.py [--steps 20] [--result-chars 4000]
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.llm import LLM, TokenCounter  # noqa: E402
+from app.schema import Function, Message, ToolCall  # noqa: E402
+from app.tokenizer import ExactTokenizer, configure_cache_dir  # noqa: E402
+
+
+def build_step(step: int, result_chars: int) -> list:
+    call = ToolCall(
+        id=f"call_{step}",
+        function=Function(
+            name="execute_sql",
+            arguments=json.dumps({"query": f"SELECT * FROM orders WHERE id > {step}"}),
+        ),
+    )
+    rows = [
+        {"id": step * 1000 + i, "customer": f"客户{i}", "amount": i * 3.5}
+        for i in range(result_chars // 60)
+    ]
+    return [
+        Message.from_tool_calls(tool_calls=[call], content=f"Step {step}: querying"),
+        Message.tool_message(
+            json.dumps({"status": "OK", "data": rows}, ensure_ascii=False),
+            name="execute_sql",
+            tool_call_id=call.id,
+        ),
+    ]
+
+
+def uncached_count(counter: TokenCounter, messages: list) -> int:
+    return counter.FORMAT_TOKENS + sum(
+        counter.count_single_message(message) for message in messages
+    )
+
+
+def run(steps: int, result_chars: int, history: int) -> dict:
+    configure_cache_dir()
+    tokenizer = ExactTokenizer("cl100k_base", fallback=False)
+    timings = {}
+    for mode in ("uncached", "cached"):
+        counter = TokenCounter(tokenizer)
+        memory = [Message.system_message("You are a database assistant.")]
+        for i in range(history):
+            memory.append(Message.user_message(f"Earlier question {i}"))
+            memory.extend(build_step(-i - 1, result_chars))
+        memory.append(Message.user_message("How many orders were placed last month?"))
+
+        per_step = []
+        counts = set()
+        for step in range(steps):
+            formatted = LLM.format_messages(memory)
+            start = time.perf_counter()
+            if mode == "cached":
+                counts.add(counter.count_message_tokens(memory))
+            else:
+                counts.add(uncached_count(counter, formatted))
+            per_step.append(time.perf_counter() - start)
+            memory.extend(build_step(step, result_chars))
+
+        timings[mode] = {
+            "total_ms": round(sum(per_step) * 1000, 2),
+            "last_step_ms": round(per_step[-1] * 1000, 3),
+            "messages": len(memory),
+            "final_tokens": max(counts),
+        }
+    assert timings["cached"]["final_tokens"] == timings["uncached"]["final_tokens"]
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--steps", type=int, default=20)
+    parser.add_argument("--result-chars", type=int, default=4000)
+    parser.add_argument(
+        "--history", type=int, default=10, help="earlier turns already in memory"
+    )
+    args = parser.parse_args()
+
+    timings = run(args.steps, args.result_chars, args.history)
+    print(json.dumps(timings, indent=2))
+    speedup = timings["uncached"]["total_ms"] / max(timings["cached"]["total_ms"], 1e-6)
+    print(f"Token counting speedup over {args.steps} steps: {speedup:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""Calibrate and check the approximate token estimator against tiktoken.
+
+Builds a corpus like the agent's prompts (system prompts, README text, SQL
+and JSON query results with Chinese values), fits ``TokenEstimator`` weights
+per encoding on half of it, and reports the estimate error on the other half
+together with counting throughput and the cost of creating an ``LLM``
+(encodings are now loaded lazily, on the first count).
+
+The fitted weights are what ``app.tokenizer.ENCODING_WEIGHTS`` holds; pass
+the printed values to ``[tokenizer.weights]`` to calibrate other models.
+
+Usage:
+    python benchmarks/token_estimate.py [--encodings cl100k_base o200k_base]
+"""
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from app.config import LLMSettings  # noqa: E402
+from app.llm import LLM  # noqa: E402
+from app.prompt import database_query, mcp, toolcall  # noqa: E402
+from app.tokenizer import (  # noqa: E402
+    ExactTokenizer,
+    TokenEstimator,
+    configure_cache_dir,
+    load_encoding,
+)
+
+
+CHUNK_CHARS = 600
+
+
+def _chunks(text: str):
+    for i in range(0, len(text), CHUNK_CHARS):
+        chunk = text[i : i + CHUNK_CHARS].strip()
+        if chunk:
+            yield chunk
+
+
+def build_corpus(seed: int = 0) -> list:
+    rng = random.Random(seed)
+    texts = [
+        value
+        for module in (database_query, mcp, toolcall)
+        for value in vars(module).values()
+        if isinstance(value, str) and len(value) > 40
+    ]
+    readme = ROOT / "README.md"
+    if readme.exists():
+        texts.append(readme.read_text(encoding="utf-8"))
+
+    cities = ["北京", "上海", "广州", "深圳", "杭州", "成都"]
+    for batch in range(40):
+        rows = [
+            {
+                "id": batch * 100 + i,
+                "customer": f"客户{rng.randint(1, 9999)}",
+                "city": rng.choice(cities),
+                "amount": round(rng.uniform(1, 5000), 2),
+                "created_at": f"2024-0{rng.randint(1, 9)}-1{rng.randint(0, 9)} 12:00:00",
+                "note": rng.choice(["", "加急订单", "VIP customer", "退货中"]),
+            }
+            for i in range(rng.randint(5, 30))
+        ]
+        texts.append(json.dumps({"status": "OK", "data": rows}, ensure_ascii=False))
+        texts.append(
+            f"SELECT city, SUM(amount) AS total FROM orders WHERE created_at >= "
+            f"'2024-0{batch % 9 + 1}-01' GROUP BY city ORDER BY total DESC LIMIT {batch + 5}"
+        )
+        texts.append(
+            rng.choice(cities)
+            + "上个月销售额最高的前十个客户分别是谁？请按金额排序并给出占比。"
+        )
+    return [chunk for text in texts for chunk in _chunks(text)]
+
+
+def evaluate(name: str, corpus: list) -> dict:
+    exact = ExactTokenizer(name, fallback=False)
+    train, test = corpus[::2], corpus[1::2]
+    estimator = TokenEstimator.calibrate(exact, train)
+
+    errors = []
+    for text in test:
+        actual = exact.count(text)
+        errors.append(abs(estimator.count(text) - actual) / actual)
+    total_exact = sum(exact.count(text) for text in test)
+    total_estimate = sum(estimator.count(text) for text in test)
+
+    text = "\n".join(corpus)
+    timings = {}
+    for label, counter in (("exact", exact), ("estimate", estimator)):
+        start = time.perf_counter()
+        for _ in range(5):
+            counter.count(text)
+        timings[label] = (time.perf_counter() - start) / 5
+
+    return {
+        "encoding": name,
+        "weights": list(estimator.weights),
+        "samples": len(test),
+        "mean_abs_error_pct": round(statistics.mean(errors) * 100, 1),
+        "p95_abs_error_pct": round(sorted(errors)[int(len(errors) * 0.95)] * 100, 1),
+        "total_error_pct": round((total_estimate - total_exact) / total_exact * 100, 1),
+        "exact_ms_per_100k_chars": round(timings["exact"] * 1e8 / len(text), 2),
+        "estimate_ms_per_100k_chars": round(timings["estimate"] * 1e8 / len(text), 3),
+    }
+
+
+def startup(name: str) -> dict:
+    settings = LLMSettings(
+        model="gpt-4o" if name == "o200k_base" else "gpt-4",
+        base_url="http://127.0.0.1:9/v1",
+        api_key="stub",
+        api_type="openai",
+        api_version="",
+    )
+    start = time.perf_counter()
+    llm = LLM(f"startup-{name}", {"default": settings})
+    created = time.perf_counter() - start
+    start = time.perf_counter()
+    load_encoding(name)
+    loaded = time.perf_counter() - start
+    start = time.perf_counter()
+    llm.count_tokens("warm")
+    first_count = time.perf_counter() - start
+    return {
+        "llm_init_ms": round(created * 1000, 2),
+        "encoding_load_ms": round(loaded * 1000, 1),
+        "first_count_ms": round(first_count * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--encodings", nargs="+", default=["cl100k_base", "o200k_base"]
+    )
+    args = parser.parse_args()
+    configure_cache_dir()
+
+    corpus = build_corpus()
+    results = []
+    for name in args.encodings:
+        # Measure lazy startup before anything else loads the encoding
+        result = {"startup": startup(name)}
+        result.update(evaluate(name, corpus))
+        results.append(result)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,11 @@
 import React, { useState, useEffect, useRef } from 'react';
-import { Send, Loader2, AlertCircle, Copy, Check, Bot, User, Sparkles, PanelRightOpen, PanelRightClose, Terminal } from 'lucide-react';
+import { Send, Square, Download, Loader2, AlertCircle, Copy, Check, Bot, User, Sparkles, PanelRightOpen, PanelRightClose, Terminal } from 'lucide-react';
 import { clsx } from 'clsx';
 import ReactMarkdown from 'react-markdown';
 import { useChat } from '../hooks/useChat';
 
 export default function ChatInterface() {
-    const { messages, status, isThinking, logs, currentStatus, sendMessage, reconnect } = useChat();
+    const { messages, status, isThinking, logs, currentStatus, streamingText, sessionId, sendMessage, cancelQuery, reconnect } = useChat();
     const [input, setInput] = useState('');
     const [showDetails, setShowDetails] = useState(false);
     const messagesEndRef = useRef(null);
@@ -29,7 +29,7 @@ export default function ChatInterface() {
 
     useEffect(() => {
         scrollToBottom();
-    }, [messages, isThinking]);
+    }, [messages, isThinking, streamingText]);
 
     const handleSubmit = (e) => {
         e.preventDefault();
@@ -97,7 +97,7 @@ export default function ChatInterface() {
                         )}
 
                         {messages.map((msg, idx) => (
-                            <MessageBubble key={idx} message={msg} />
+                            <MessageBubble key={idx} message={msg} sessionId={sessionId} />
                         ))}
 
                         {isThinking && (
@@ -105,9 +105,16 @@ export default function ChatInterface() {
                                 <div className="flex-shrink-0 w-8 h-8 rounded-full bg-bg-secondary flex items-center justify-center mt-1 border border-border-color">
                                     <Bot size={16} className="text-text-secondary" />
                                 </div>
-                                <div className="flex items-center gap-3 text-xs text-text-secondary bg-white border border-border-color/60 px-5 py-3 rounded-2xl rounded-tl-sm shadow-sm ring-1 ring-black/5">
-                                    <Loader2 size={14} className="animate-spin text-accent-secondary" />
-                                    <span className="font-medium">{currentStatus || '思考中...'}</span>
+                                <div className="flex flex-col gap-2 text-xs text-text-secondary bg-white border border-border-color/60 px-5 py-3 rounded-2xl rounded-tl-sm shadow-sm ring-1 ring-black/5 min-w-0">
+                                    <div className="flex items-center gap-3">
+                                        <Loader2 size={14} className="animate-spin text-accent-secondary" />
+                                        <span className="font-medium">{currentStatus || '思考中...'}</span>
+                                    </div>
+                                    {streamingText && (
+                                        <div className="text-sm text-text-primary whitespace-pre-wrap break-words leading-relaxed">
+                                            {streamingText}
+                                        </div>
+                                    )}
                                 </div>
                             </div>
                         )}
@@ -130,6 +137,16 @@ export default function ChatInterface() {
                                 className="w-full bg-transparent border-none text-text-primary px-5 py-3 pr-16 resize-none min-h-[48px] max-h-[160px] focus:outline-none placeholder:text-text-tertiary text-sm leading-relaxed"
                             />
                             <div className="absolute right-3 top-1/2 -translate-y-1/2 flex items-center gap-2">
+                                {isThinking && (
+                                    <button
+                                        type="button"
+                                        onClick={cancelQuery}
+                                        title="停止查询"
+                                        className="p-2.5 bg-bg-secondary text-text-secondary rounded-xl hover:scale-105 active:scale-95 transition-all border border-border-color"
+                                    >
+                                        <Square size={18} />
+                                    </button>
+                                )}
                                 <button
                                     type="submit"
                                     disabled={!input.trim() || status !== 'connected'}
@@ -217,7 +234,7 @@ export default function ChatInterface() {
     );
 }
 
-function MessageBubble({ message }) {
+function MessageBubble({ message, sessionId }) {
     const isUser = message.role === 'user';
     const isError = message.role === 'error';
 
@@ -287,6 +304,22 @@ function MessageBubble({ message }) {
                     </div>
                 </div>
 
+                {/* 导出本次查询的完整结果（服务端重新执行最近一次只读 SQL 并流式返回） */}
+                {message.exportable && sessionId && (
+                    <div className="flex items-center gap-2 px-1 text-[10px] font-bold text-text-tertiary">
+                        <Download size={12} />
+                        {['csv', 'ndjson'].map(format => (
+                            <a
+                                key={format}
+                                href={`/api/v1/export?session_id=${sessionId}&format=${format}`}
+                                className="uppercase hover:text-accent-secondary transition-colors"
+                            >
+                                {format}
+                            </a>
+                        ))}
+                    </div>
+                )}
+
                 {/* Footer / Meta (Optional) */}
                 <div className="px-1 opacity-0 group-hover:opacity-100 transition-opacity">
                     <span className="text-[9px] font-bold text-text-tertiary uppercase tracking-tighter">
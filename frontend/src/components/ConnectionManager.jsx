@@ -62,6 +62,8 @@ function FileUploadZone() {
     const [isDragging, setIsDragging] = useState(false);
     const [uploadStatus, setUploadStatus] = useState('idle'); // idle, uploading, success, error
     const [fileName, setFileName] = useState('');
+    const [progress, setProgress] = useState(null); // CSV 导入进度 { rows, percent }
+    const [resultText, setResultText] = useState('');
 
     const handleDragOver = (e) => {
         e.preventDefault();
@@ -88,13 +90,59 @@ function FileUploadZone() {
         }
     };
 
+    // CSV 文件导入数据库：服务端以 NDJSON 逐行返回 schema / progress / done / error 事件
+    const ingestCsv = async (formData) => {
+        const response = await fetch('/api/v1/upload?ingest=true', { method: 'POST', body: formData });
+        if (!response.ok) {
+            const detail = await response.json().catch(() => ({}));
+            throw new Error(detail.detail || `HTTP ${response.status}`);
+        }
+
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        while (true) {
+            const { done, value } = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, { stream: true });
+            const lines = buffer.split('\n');
+            buffer = lines.pop();
+            for (const line of lines) {
+                if (!line.trim()) continue;
+                const event = JSON.parse(line);
+                if (event.type === 'progress') {
+                    setProgress({ rows: event.rows, percent: Math.round((event.bytes / event.total_bytes) * 100) });
+                } else if (event.type === 'done') {
+                    return `已导入 ${event.rows} 行到表 ${event.table}`;
+                } else if (event.type === 'error') {
+                    throw new Error(event.error);
+                }
+            }
+        }
+        throw new Error('导入中断');
+    };
+
     const handleFile = async (file) => {
         setFileName(file.name);
         setUploadStatus('uploading');
+        setProgress(null);
+        setResultText('');
 
         const formData = new FormData();
         formData.append('file', file);
 
+        if (file.name.toLowerCase().endsWith('.csv')) {
+            try {
+                setResultText(await ingestCsv(formData));
+                setUploadStatus('success');
+            } catch (error) {
+                console.error('Import failed:', error);
+                setResultText(error.message);
+                setUploadStatus('error');
+            }
+            return;
+        }
+
         try {
             // Use configured proxy to hit backend
             const response = await axios.post('/api/v1/upload', formData, {
@@ -138,18 +186,23 @@ function FileUploadZone() {
                     <div className="animate-pulse flex flex-col items-center">
                         <Upload className="text-accent-primary mb-2" size={32} />
                         <span className="text-sm font-medium">Uploading {fileName}...</span>
+                        {progress && (
+                            <span className="text-xs text-text-tertiary">
+                                {progress.rows.toLocaleString()} rows · {progress.percent}%
+                            </span>
+                        )}
                     </div>
                 ) : uploadStatus === 'success' ? (
                     <div className="flex flex-col items-center text-success">
                         <Check size={32} className="mb-2" />
                         <span className="text-sm font-bold">Upload Complete</span>
-                        <span className="text-xs opacity-75">{fileName} processed</span>
+                        <span className="text-xs opacity-75">{resultText || `${fileName} processed`}</span>
                     </div>
                 ) : uploadStatus === 'error' ? (
                     <div className="flex flex-col items-center text-error">
                         <AlertCircle size={32} className="mb-2" />
                         <span className="text-sm font-bold">Upload Failed</span>
-                        <span className="text-xs opacity-75">Please try again</span>
+                        <span className="text-xs opacity-75">{resultText || 'Please try again'}</span>
                     </div>
                 ) : (
                     <>
@@ -8,6 +8,8 @@ export function useChat() {
     const [isThinking, setIsThinking] = useState(false);
     const [logs, setLogs] = useState([]); // 存储工作日志
     const [currentStatus, setCurrentStatus] = useState(''); // 当前进度提示
+    const [streamingText, setStreamingText] = useState(''); // 当前步骤 LLM 流式输出
+    const [sessionId, setSessionId] = useState(null); // 用于导出本会话最近一次查询的结果
 
     const wsRef = useRef(null);
 
@@ -63,6 +65,7 @@ export function useChat() {
             // Add user message immediately
             setMessages(prev => [...prev, { role: 'user', content }]);
             setLogs([]); // 清空旧日志
+            setStreamingText('');
             setCurrentStatus('🤔 正在准备...');
 
             wsRef.current.send(JSON.stringify({ content }));
@@ -71,17 +74,43 @@ export function useChat() {
         }
     }, []);
 
+    const cancelQuery = useCallback(() => {
+        if (wsRef.current?.readyState === WebSocket.OPEN) {
+            // 服务端会中止 LLM 调用与正在执行的 SQL
+            wsRef.current.send(JSON.stringify({ type: 'cancel' }));
+            setCurrentStatus('⏹️ 正在取消...');
+        }
+    }, []);
+
     const handleServerMessage = (data) => {
-        // data structure: { type: 'system'|'response'|'status'|'error'|'thought'|'tool_call', content: string, status?: string }
+        // data structure: { type: 'system'|'response'|'status'|'error'|'thought'|'tool_call'|'delta'|'cancelled', content: string, status?: string }
 
         switch (data.type) {
             case 'system':
+                if (data.session_id) {
+                    setSessionId(data.session_id);
+                }
                 setMessages(prev => [...prev, { role: 'system', content: data.content }]);
                 break;
             case 'response':
-                setMessages(prev => [...prev, { role: 'assistant', content: data.content }]);
+                setMessages(prev => [
+                    ...prev.map(msg => ({ ...msg, exportable: false })),
+                    { role: 'assistant', content: data.content, exportable: !!data.exportable }
+                ]);
                 setIsThinking(false);
                 setCurrentStatus('');
+                setStreamingText('');
+                break;
+            case 'delta':
+                // LLM 流式增量：kind 为 content（回答文本）或 tool_call（工具参数）
+                setIsThinking(true);
+                if (data.kind === 'tool_call') {
+                    if (data.tool) {
+                        setCurrentStatus(`🛠️ 正在生成工具调用: ${data.tool}`);
+                    }
+                } else {
+                    setStreamingText(prev => prev + data.content);
+                }
                 break;
             case 'status':
                 setIsThinking(true);
@@ -91,15 +120,23 @@ export function useChat() {
             case 'tool_call':
                 console.log('📋 Received log data:', data);
                 setIsThinking(true); // 只要有日志动作，就在思考
+                setStreamingText(''); // 新的步骤开始，清空上一步的流式输出
                 setLogs(prev => [...prev, data]);
                 if (data.content) {
                     setCurrentStatus(data.content);
                 }
                 break;
+            case 'cancelled':
+                setMessages(prev => [...prev, { role: 'assistant', content: '⏹️ 已取消本次查询。' }]);
+                setIsThinking(false);
+                setCurrentStatus('');
+                setStreamingText('');
+                break;
             case 'error':
                 setMessages(prev => [...prev, { role: 'error', content: data.content }]);
                 setIsThinking(false);
                 setCurrentStatus('');
+                setStreamingText('');
                 break;
             default:
                 console.log('Unknown message type:', data);
@@ -117,7 +154,10 @@ export function useChat() {
         isThinking,
         logs,
         currentStatus,
+        streamingText,
+        sessionId,
         sendMessage,
+        cancelQuery,
         reconnect: connect
     };
 }
@@ -3,7 +3,10 @@ import json
 import logging
 import os
 import sys
+import threading
+from typing import Optional
 
+import anyio
 from mcp.server import Server
 from mcp.types import Resource, TextContent, Tool
 from mysql.connector import Error, connect, pooling
@@ -18,6 +21,9 @@ logger = logging.getLogger("mysql_mcp_server")
 # 可选：用户可自定义表用途说明作为备用
 TABLE_PURPOSES = {}
 
+# 连接池大小，同时也是并发执行的数据库操作上限
+POOL_SIZE = 10
+
 
 def get_db_config():
     """从环境变量或配置文件获取数据库配置。"""
@@ -106,7 +112,7 @@ class DatabasePool:
         self.pool_config = {
             **config,
             "pool_name": "mysql_mcp_pool",
-            "pool_size": 10,
+            "pool_size": POOL_SIZE,
             "pool_reset_session": True,
         }
         self.pool = None
@@ -130,14 +136,20 @@ class DatabasePool:
 
 # 全局连接池实例
 db_pool = None
+_db_pool_lock = threading.Lock()
+
+# MySQLConnectionPool 在连接用尽时直接抛出 PoolError 而不会等待，
+# 因此每个占用连接的操作先取得一个名额，名额数与连接池大小一致
+_db_slots = asyncio.Semaphore(POOL_SIZE)
 
 
 def get_db_connection():
-    """获取数据库连接"""
+    """获取数据库连接（工作线程中也会调用，初始化需加锁）"""
     global db_pool
     if not db_pool:
-        config = get_db_config()
-        db_pool = DatabasePool(config)
+        with _db_pool_lock:
+            if not db_pool:
+                db_pool = DatabasePool(get_db_config())
     return db_pool.get_connection()
 
 
@@ -147,44 +159,45 @@ async def list_resources() -> list[Resource]:
     """列出数据库中的表作为资源，包含表注释和关键字段。"""
     db_name = get_db_config()["database"]
     try:
-        with get_db_connection() as conn:
-            with conn.cursor() as cursor:
-                table_comments = _get_table_comments(cursor, db_name)
-                tables = get_valid_tables(cursor)
-                resources = []
-                for table in tables:
-                    try:
-                        cursor.execute(f"DESCRIBE `{table}`")
-                        columns = cursor.fetchall()
-                        if not columns:
-                            continue
-
-                        key_fields = [
-                            f"{col[0]}({col[1]}){'*' if col[3] == 'PRI' else ''}"
-                            for col in columns
-                            if col[3] in ("PRI", "MUL")
-                            or any(
-                                kw in col[0].lower() for kw in ("name", "email", "id")
+        async with _db_slots:
+            with get_db_connection() as conn:
+                with conn.cursor() as cursor:
+                    table_comments = _get_table_comments(cursor, db_name)
+                    tables = get_valid_tables(cursor)
+                    resources = []
+                    for table in tables:
+                        try:
+                            cursor.execute(f"DESCRIBE `{table}`")
+                            columns = cursor.fetchall()
+                            if not columns:
+                                continue
+
+                            key_fields = [
+                                f"{col[0]}({col[1]}){'*' if col[3] == 'PRI' else ''}"
+                                for col in columns
+                                if col[3] in ("PRI", "MUL")
+                                or any(
+                                    kw in col[0].lower() for kw in ("name", "email", "id")
+                                )
+                            ][:5]
+
+                            key_fields_str = ", ".join(key_fields) if key_fields else "..."
+                            table_comment = table_comments.get(table) or TABLE_PURPOSES.get(
+                                table, "A data table."
                             )
-                        ][:5]
-
-                        key_fields_str = ", ".join(key_fields) if key_fields else "..."
-                        table_comment = table_comments.get(table) or TABLE_PURPOSES.get(
-                            table, "A data table."
-                        )
-                        description = f"{table_comment}\nKey fields: {key_fields_str}"
-
-                        resources.append(
-                            Resource(
-                                uri=f"mysql://{table}/data",
-                                name=f"Table: {table}",
-                                mimeType="text/plain",
-                                description=description,
+                            description = f"{table_comment}\nKey fields: {key_fields_str}"
+
+                            resources.append(
+                                Resource(
+                                    uri=f"mysql://{table}/data",
+                                    name=f"Table: {table}",
+                                    mimeType="text/plain",
+                                    description=description,
+                                )
                             )
-                        )
-                    except Error as e:
-                        logger.warning(f"无法描述表 {table}: {e}")
-                return resources
+                        except Error as e:
+                            logger.warning(f"无法描述表 {table}: {e}")
+                    return resources
     except Error as e:
         logger.error(f"列出资源失败: {str(e)}")
         return []
@@ -195,15 +208,16 @@ async def read_resource(uri: AnyUrl) -> str:
     """读取指定表的前100行数据。"""
     table = str(uri).split("/")[2]
     try:
-        with get_db_connection() as conn:
-            with conn.cursor() as cursor:
-                if table not in get_valid_tables(cursor):
-                    raise ValueError(f"表 '{table}' 不存在。")
-                cursor.execute(f"SELECT * FROM `{table}` LIMIT 100")
-                columns = [desc[0] for desc in cursor.description]
-                rows = cursor.fetchall()
-                result = [",".join(map(str, row)) for row in rows]
-                return "\n".join([",".join(columns)] + result)
+        async with _db_slots:
+            with get_db_connection() as conn:
+                with conn.cursor() as cursor:
+                    if table not in get_valid_tables(cursor):
+                        raise ValueError(f"表 '{table}' 不存在。")
+                    cursor.execute(f"SELECT * FROM `{table}` LIMIT 100")
+                    columns = [desc[0] for desc in cursor.description]
+                    rows = cursor.fetchall()
+                    result = [",".join(map(str, row)) for row in rows]
+                    return "\n".join([",".join(columns)] + result)
     except Error as e:
         raise RuntimeError(f"数据库错误: {str(e)}")
 
@@ -240,7 +254,74 @@ async def list_tools() -> list[Tool]:
 
 @app.call_tool()
 async def call_tool(name: str, arguments: dict) -> list[TextContent]:
-    """处理 LLM 的工具调用请求。"""
+    """处理 LLM 的工具调用请求。
+
+    数据库访问是阻塞的，放到线程池中执行，使客户端并发发起的多个工具调用
+    能够真正并行，而不会阻塞服务器事件循环。同时执行的调用数不超过连接池
+    大小，超出的调用排队等待空闲连接，而不是因连接池耗尽而报错。
+
+    客户端取消调用（notifications/cancelled）时，线程中的语句不会随之停止，
+    因此通过 KILL QUERY 终止该连接上正在执行的 SQL。
+    """
+    running = RunningQuery()
+    try:
+        async with _db_slots:
+            return await asyncio.to_thread(_call_tool_sync, name, arguments, running)
+    except asyncio.CancelledError:
+        with anyio.CancelScope(shield=True):
+            await asyncio.to_thread(running.kill)
+        raise
+
+
+class RunningQuery:
+    """登记正在执行 SQL 的连接 ID，供取消时终止该查询。
+
+    登记的清除与 KILL 在同一把锁下进行，且清除发生在连接归还连接池之前，
+    因此 KILL 不会落到已被其他调用复用的连接上。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.connection_id: Optional[int] = None
+
+    def start(self, connection_id: int) -> None:
+        with self._lock:
+            self.connection_id = connection_id
+
+    def finish(self) -> None:
+        with self._lock:
+            self.connection_id = None
+
+    def kill(self) -> None:
+        with self._lock:
+            if self.connection_id is not None:
+                _kill_query(self.connection_id)
+
+
+def _kill_query(connection_id: int) -> None:
+    """在独立的连接上终止指定连接正在执行的语句。
+
+    不使用连接池：连接池可能已被占满，KILL 不应排队等待。
+    """
+    try:
+        conn = connect(**get_db_config())
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(f"KILL QUERY {int(connection_id)}")
+        finally:
+            conn.close()
+        logger.info(f"已终止连接 {connection_id} 上被取消的查询")
+    except Error as e:
+        logger.warning(f"终止连接 {connection_id} 上的查询失败: {e}")
+
+
+def _call_tool_sync(
+    name: str, arguments: dict, running: Optional[RunningQuery] = None
+) -> list[TextContent]:
+    """同步执行工具调用。
+
+    running 用于向调用方登记执行 SQL 的连接 ID，以便取消时终止该查询。
+    """
     config = get_db_config()
     db_name = config["database"]
     logger.info(f"调用工具: {name}，参数: {arguments}")
@@ -385,34 +466,41 @@ async def call_tool(name: str, arguments: dict) -> list[TextContent]:
             ]
         try:
             with get_db_connection() as conn:
-                with conn.cursor() as cursor:
-                    # **修正点**: 移除 multi=True，恢复为标准的单语句执行。
-                    cursor.execute(query)
-
-                    # 检查是否有返回行 (如 SELECT, SHOW)
-                    if cursor.description is not None:
-                        columns = [desc[0] for desc in cursor.description]
-                        rows = cursor.fetchall()
-                        # 将行数据转换为字典列表，对 LLM 更友好
-                        rows_as_dict = [dict(zip(columns, row)) for row in rows]
-                        result = {
-                            "status": "OK",
-                            "data": rows_as_dict,
-                            "rowCount": cursor.rowcount,
-                        }
-                    # 没有返回行 (如 INSERT, UPDATE, DELETE)
-                    else:
-                        result = {"status": "OK", "rowsAffected": cursor.rowcount}
+                if running is not None:
+                    running.start(conn.connection_id)
+                try:
+                    with conn.cursor() as cursor:
+                        # **修正点**: 移除 multi=True，恢复为标准的单语句执行。
+                        cursor.execute(query)
+
+                        # 检查是否有返回行 (如 SELECT, SHOW)
+                        if cursor.description is not None:
+                            columns = [desc[0] for desc in cursor.description]
+                            rows = cursor.fetchall()
+                            # 将行数据转换为字典列表，对 LLM 更友好
+                            rows_as_dict = [dict(zip(columns, row)) for row in rows]
+                            result = {
+                                "status": "OK",
+                                "data": rows_as_dict,
+                                "rowCount": cursor.rowcount,
+                            }
+                        # 没有返回行 (如 INSERT, UPDATE, DELETE)
+                        else:
+                            result = {"status": "OK", "rowsAffected": cursor.rowcount}
 
-                    # 使用 default=str 来处理 Decimal、Date 等特殊类型
-                    return [
-                        TextContent(
-                            type="text",
-                            text=json.dumps(
-                                result, default=str, indent=2, ensure_ascii=False
-                            ),
-                        )
-                    ]
+                        # 使用 default=str 来处理 Decimal、Date 等特殊类型
+                        return [
+                            TextContent(
+                                type="text",
+                                text=json.dumps(
+                                    result, default=str, indent=2, ensure_ascii=False
+                                ),
+                            )
+                        ]
+                finally:
+                    # 在连接归还连接池之前清除登记
+                    if running is not None:
+                        running.finish()
         except Error as e:
             logger.error(f"执行 SQL 失败 '{query}': {e}")
             return [
@@ -5,13 +5,19 @@
 
 import argparse
 import asyncio
+import json
 import sys
 import time
 from pathlib import Path
+from typing import Callable
 
 from app.agent.enhanced_database_query import EnhancedDatabaseQueryAgent
+from app.cache import get_response_cache
+from app.llm import track_token_usage
+from app.llm_limiter import get_rate_limiter
 from app.logger import define_log_level, logger
 from app.schema import AgentState
+from app.tokenizer import configure_cache_dir
 
 # 设置日志级别
 logger = define_log_level(print_level="ERROR", logfile_level="ERROR")
@@ -94,68 +100,206 @@ async def single_query_mode(agent: EnhancedDatabaseQueryAgent, query: str):
         return None
 
 
-async def batch_mode(agent: EnhancedDatabaseQueryAgent, queries_file: str):
-    """批处理模式"""
+def batch_output_path(queries_file: str) -> Path:
+    """批处理结果文件：与查询文件同目录的 <name>_results.jsonl"""
+    path = Path(queries_file)
+    return path.with_name(f"{path.stem}_results.jsonl")
+
+
+def load_completed(output_file: Path, queries: list) -> set:
+    """读取已有结果文件，返回已成功完成的查询序号（用于 --resume）
+
+    失败的查询不计入，续跑时会重新执行，新结果追加在文件末尾（同一序号以最后一条为准）。
+    进程中断可能留下不完整的最后一行，这里会将其截断。
+    """
+    completed = set()
+    if not output_file.exists():
+        return completed
+
+    valid_bytes = 0
+    with open(output_file, "rb") as f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            valid_bytes += len(line)
+            try:
+                record = json.loads(line)
+                index = record["index"]
+            except (ValueError, KeyError, TypeError):
+                continue
+            if (
+                record.get("status") == "success"
+                and 0 <= index < len(queries)
+                and queries[index] == record.get("query")
+            ):
+                completed.add(index)
+
+    if valid_bytes < output_file.stat().st_size:
+        with open(output_file, "r+b") as f:
+            f.truncate(valid_bytes)
+    return completed
+
+
+class BatchResultWriter:
+    """将结果逐条追加写入 JSONL，保持输入顺序
+
+    并发时先完成的后序结果暂存在重排缓冲区，直到前面的结果写出为止；
+    每条结果写出后立即 flush，中断后可通过 --resume 续跑。
+    """
+
+    def __init__(self, output_file: Path, skip: set, append: bool):
+        self._file = open(output_file, "a" if append else "w", encoding="utf-8")
+        self._skip = skip
+        self._pending = {}
+        self._next = 0
+
+    def _write(self, record: dict):
+        self._file.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+        self._file.flush()
+
+    def add(self, record: dict):
+        self._pending[record["index"]] = record
+        while True:
+            while self._next in self._skip:
+                self._next += 1
+            record = self._pending.pop(self._next, None)
+            if record is None:
+                return
+            self._write(record)
+            self._next += 1
+
+    def close(self):
+        # 中途取消时保留已完成但尚未轮到的结果
+        for index in sorted(self._pending):
+            self._write(self._pending[index])
+        self._pending.clear()
+        self._file.close()
+
+
+async def _run_batch_query(
+    agent: EnhancedDatabaseQueryAgent, index: int, query: str
+) -> dict:
+    """在给定代理上执行一条批处理查询，返回结果记录"""
+    start_time = time.time()
+    with track_token_usage() as usage:
+        try:
+            await agent.reset()
+            result = await agent.run(query)
+            status = "success"
+        except Exception as e:
+            logger.error(f"Batch query failed: {e}", exc_info=True)
+            result = str(e)
+            status = "error"
+    return {
+        "index": index,
+        "query": query,
+        "status": status,
+        "result": result,
+        "time": round(time.time() - start_time, 3),
+        "tokens": {
+            "input": usage.input_tokens,
+            "completion": usage.completion_tokens,
+            "total": usage.total_tokens,
+        },
+        "sql": list(agent.executed_sqls),
+    }
+
+
+async def _run_batch(
+    agent: EnhancedDatabaseQueryAgent,
+    pending: list,
+    concurrency: int,
+    on_result: Callable[[dict], None],
+):
+    """用 N 个共享 MCP 连接与元数据目录的代理会话执行 (序号, 查询) 列表
+
+    每条结果完成后立即交给 on_result；LLM 调用受全局限流约束（见 [llm_rate_limit]）。
+    """
+    queue = asyncio.Queue()
+    for item in pending:
+        queue.put_nowait(item)
+
+    async def worker(worker_agent: EnhancedDatabaseQueryAgent):
+        while True:
+            try:
+                index, query = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            on_result(await _run_batch_query(worker_agent, index, query))
+
+    workers = [agent] + [
+        agent.fork() for _ in range(min(concurrency, len(pending)) - 1)
+    ]
+    try:
+        await asyncio.gather(*(worker(worker_agent) for worker_agent in workers))
+    finally:
+        for worker_agent in workers[1:]:
+            await worker_agent.cleanup()
+
+
+async def batch_mode(
+    agent: EnhancedDatabaseQueryAgent,
+    queries_file: str,
+    concurrency: int = 1,
+    resume: bool = False,
+):
+    """批处理模式：结果逐条写入 JSONL，可通过 --resume 跳过已成功的查询并重试失败的查询"""
     try:
         with open(queries_file, "r", encoding="utf-8") as f:
             queries = [
                 line.strip() for line in f if line.strip() and not line.startswith("#")
             ]
 
+        output_file = batch_output_path(queries_file)
+        completed = load_completed(output_file, queries) if resume else set()
+        pending = [
+            (index, query) for index, query in enumerate(queries) if index not in completed
+        ]
+
         print(f"📁 已加载 {len(queries)} 个查询")
+        if completed:
+            print(f"⏭️  跳过已完成的 {len(completed)} 个查询")
+        if concurrency > 1:
+            print(f"⚡ 并发会话数: {concurrency}")
         print("-" * 50)
 
-        results = []
-        success_count = 0
-        total_time = 0
-
-        for i, query in enumerate(queries, 1):
-            print(f"\n🔍 查询 {i}/{len(queries)}: {query[:50]}...")
-            try:
-                await agent.reset()
-
-                start_time = time.time()
-                result = await agent.run(query)
-                elapsed_time = time.time() - start_time
-                total_time += elapsed_time
-
-                success_count += 1
-                results.append(
-                    {
-                        "query": query,
-                        "result": result,
-                        "status": "success",
-                        "time": elapsed_time,
-                    }
-                )
-                print(f"✅ 成功 (耗时: {elapsed_time:.2f}秒)")
-            except Exception as e:
-                elapsed_time = time.time() - start_time
-                total_time += elapsed_time
-                results.append(
-                    {
-                        "query": query,
-                        "result": str(e),
-                        "status": "error",
-                        "time": elapsed_time,
-                    }
-                )
-                print(f"❌ 失败: {e}")
-
-        output_file = queries_file.replace(".txt", "_results.txt")
-        with open(output_file, "w", encoding="utf-8") as f:
-            for i, result in enumerate(results, 1):
-                f.write(f"查询 {i}: {result['query']}\n")
-                f.write(f"状态: {result['status']}\n")
-                f.write(f"耗时: {result['time']:.2f}秒\n")
-                f.write(f"结果: {result['result']}\n")
-                f.write("-" * 80 + "\n\n")
+        stats = {"success": 0, "error": 0, "tokens": 0}
+        writer = BatchResultWriter(output_file, completed, append=resume)
+
+        def on_result(record: dict):
+            stats[record["status"]] += 1
+            stats["tokens"] += record["tokens"]["total"]
+            writer.add(record)
+            done = len(completed) + stats["success"] + stats["error"]
+            mark = "✅" if record["status"] == "success" else "❌"
+            print(
+                f"{mark} [{done}/{len(queries)}] 查询 {record['index'] + 1}: "
+                f"{record['query'][:30]} (耗时: {record['time']:.2f}秒, "
+                f"tokens: {record['tokens']['total']})"
+            )
+
+        batch_start = time.time()
+        try:
+            await _run_batch(agent, pending, concurrency, on_result)
+        finally:
+            writer.close()
+        total_time = time.time() - batch_start
 
         print("-" * 50)
-        print(f"📊 完成统计: {success_count}/{len(queries)} 成功")
+        print(f"📊 完成统计: {stats['success']}/{len(pending)} 成功")
         print(f"⏱️  总耗时: {total_time:.2f}秒")
+        if pending and total_time > 0:
+            print(f"🚀 吞吐量: {len(pending) / total_time * 60:.1f} 查询/分钟")
+        print(f"🔢 Token 用量: {stats['tokens']}")
+        if agent.query_cache:
+            print(f"🗃️  {agent.query_cache.report()}")
+        response_cache = get_response_cache()
+        if response_cache:
+            print(f"🗃️  {response_cache.report()}")
+        if concurrency > 1:
+            print(f"🚦 {get_rate_limiter().report()}")
         print(f"📝 结果已保存至: {output_file}")
-        return results
+        return stats
 
     except FileNotFoundError:
         print(f"❌ 文件未找到: {queries_file}")
@@ -212,8 +356,18 @@ async def main():
         "--connection-type", choices=["stdio", "sse"], default="stdio", help="连接类型"
     )
     parser.add_argument("--session", type=str, help="会话ID")
+    parser.add_argument(
+        "--concurrency", type=int, default=1, help="批处理并发会话数（配合 -f 使用）"
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="跳过结果文件中已成功的查询，失败的查询会重试（配合 -f 使用）",
+    )
 
     args = parser.parse_args()
+    # tiktoken 编码文件缓存到本地，之后离线也可计数
+    configure_cache_dir()
 
     if args.create_sample:
         create_sample_queries_file()
@@ -243,8 +397,8 @@ async def main():
             result = await single_query_mode(agent, args.query)
             sys.exit(0 if result else 1)
         elif args.file:
-            results = await batch_mode(agent, args.file)
-            sys.exit(0 if results else 1)
+            stats = await batch_mode(agent, args.file, args.concurrency, args.resume)
+            sys.exit(0 if stats else 1)
         else:
             await interactive_mode(agent, args.session)
 
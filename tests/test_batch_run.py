@@ -0,0 +1,62 @@
+import json
+
+from run import BatchResultWriter, load_completed
+
+
+QUERIES = ["q0", "q1", "q2", "q3"]
+
+
+def _record(index: int, status: str = "success") -> dict:
+    return {"index": index, "query": QUERIES[index], "status": status}
+
+
+def _lines(path) -> list:
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+def test_writer_keeps_input_order(tmp_path):
+    path = tmp_path / "results.jsonl"
+    writer = BatchResultWriter(path, skip=set(), append=False)
+    writer.add(_record(2))
+    writer.add(_record(1))
+    assert path.read_text() == ""
+    writer.add(_record(0))
+    assert [r["index"] for r in _lines(path)] == [0, 1, 2]
+    writer.add(_record(3))
+    writer.close()
+    assert [r["index"] for r in _lines(path)] == [0, 1, 2, 3]
+
+
+def test_writer_skips_completed_and_flushes_pending_on_close(tmp_path):
+    path = tmp_path / "results.jsonl"
+    path.write_text(json.dumps(_record(1)) + "\n")
+    writer = BatchResultWriter(path, skip={1}, append=True)
+    writer.add(_record(0))
+    writer.add(_record(3))
+    # Interrupted before query 2 finished: query 3 is still written
+    writer.close()
+    assert [r["index"] for r in _lines(path)] == [1, 0, 3]
+
+
+def test_load_completed_skips_only_successful_records(tmp_path):
+    path = tmp_path / "results.jsonl"
+    records = [_record(0), _record(1, "error"), {"index": 2, "query": "changed", "status": "success"}]
+    path.write_text("".join(json.dumps(r) + "\n" for r in records) + "not json\n")
+    assert load_completed(path, QUERIES) == {0}
+
+    # A retried query that succeeded later counts as completed
+    with open(path, "a") as f:
+        f.write(json.dumps(_record(1)) + "\n")
+    assert load_completed(path, QUERIES) == {0, 1}
+
+
+def test_load_completed_truncates_partial_last_line(tmp_path):
+    path = tmp_path / "results.jsonl"
+    complete = json.dumps(_record(0)) + "\n"
+    path.write_text(complete + json.dumps(_record(1))[:10])
+    assert load_completed(path, QUERIES) == {0}
+    assert path.read_text() == complete
+
+
+def test_load_completed_without_results_file(tmp_path):
+    assert load_completed(tmp_path / "missing.jsonl", QUERIES) == set()
@@ -0,0 +1,64 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api import sessions
+from app.api.routes import router
+
+
+def _client() -> TestClient:
+    app = FastAPI()
+    app.include_router(router, prefix="/api/v1")
+    return TestClient(app)
+
+
+def test_record_sqls_keeps_read_only_history():
+    session_id = sessions.open_session()
+    try:
+        last = sessions.record_sqls(
+            session_id,
+            ["SELECT 1", "UPDATE t SET a = 1", "SELECT name FROM users"],
+        )
+        assert last == "SELECT name FROM users"
+        assert sessions.last_sql(session_id) == "SELECT name FROM users"
+        assert sessions.recorded_sql(session_id, " SELECT 1; ") == "SELECT 1"
+        assert sessions.recorded_sql(session_id, "UPDATE t SET a = 1") is None
+        assert sessions.recorded_sql(session_id, "SELECT LOAD_FILE('/etc/passwd')") is None
+    finally:
+        sessions.close_session(session_id)
+
+
+def test_record_sqls_moves_repeated_statement_to_the_end():
+    session_id = sessions.open_session()
+    try:
+        sessions.record_sqls(session_id, ["SELECT 1", "SELECT 2"])
+        sessions.record_sqls(session_id, ["SELECT 1"])
+        assert sessions.last_sql(session_id) == "SELECT 1"
+    finally:
+        sessions.close_session(session_id)
+
+
+def test_export_rejects_sql_the_session_did_not_run():
+    session_id = sessions.open_session()
+    try:
+        sessions.record_sqls(session_id, ["SELECT 1"])
+        response = _client().get(
+            "/api/v1/export",
+            params={"session_id": session_id, "sql": "SELECT SLEEP(10)"},
+        )
+        assert response.status_code == 403
+    finally:
+        sessions.close_session(session_id)
+
+
+def test_export_requires_a_session():
+    response = _client().get("/api/v1/export", params={"sql": "SELECT 1"})
+    assert response.status_code == 400
+
+
+def test_export_without_history_is_not_found():
+    session_id = sessions.open_session()
+    try:
+        response = _client().get("/api/v1/export", params={"session_id": session_id})
+        assert response.status_code == 404
+    finally:
+        sessions.close_session(session_id)
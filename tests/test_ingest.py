@@ -0,0 +1,118 @@
+from contextlib import contextmanager
+
+import pytest
+
+from app.api.ingest import CsvIngestor, IngestError
+from app.config import IngestSettings
+
+
+class _Cursor:
+    def __init__(self, db):
+        self.db = db
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, args=None):
+        self.db.statements.append(sql)
+        if sql.startswith("SELECT COLUMN_NAME"):
+            self.result = [(name,) for name in self.db.existing]
+
+    def fetchall(self):
+        return self.result
+
+    def executemany(self, sql, rows):
+        for row in rows:
+            if row[1] == "N/A":
+                raise ValueError("Incorrect integer value: 'N/A'")
+        self.db.inserted += len(rows)
+
+
+class _Pool:
+    """Records the statements a load runs; rejects 'N/A' in the second column."""
+
+    def __init__(self, existing=()):
+        self.existing = list(existing)
+        self.statements = []
+        self.inserted = 0
+
+    @contextmanager
+    def connection(self, db_config):
+        conn = self
+
+        class _Conn:
+            def cursor(self):
+                return _Cursor(conn)
+
+            def commit(self):
+                pass
+
+            def rollback(self):
+                pass
+
+        yield _Conn()
+
+
+def _csv(tmp_path, rows):
+    path = tmp_path / "orders.csv"
+    path.write_text("id,amount\n" + "".join(f"{a},{b}\n" for a, b in rows), encoding="utf-8")
+    return path
+
+
+def _ingestor(path, pool):
+    settings = IngestSettings(batch_size=2, sample_rows=2)
+    return CsvIngestor(path, "orders", {"database": "test"}, pool, settings)
+
+
+def test_new_table_is_renamed_from_staging(tmp_path):
+    pool = _Pool()
+    result = _ingestor(_csv(tmp_path, [(1, 10), (2, 20), (3, 30)]), pool).run(lambda e: None)
+
+    assert result["created"] is True
+    assert result["rows"] == 3
+    create = next(sql for sql in pool.statements if sql.startswith("CREATE TABLE"))
+    staging = create.split("`")[1]
+    assert staging.startswith("orders__ingest_")
+    assert pool.statements[-1] == f"RENAME TABLE `{staging}` TO `orders`"
+
+
+def test_failed_new_table_load_drops_staging(tmp_path):
+    # The bad value is past the sampled rows, so the column was typed BIGINT
+    pool = _Pool()
+    path = _csv(tmp_path, [(1, 10), (2, 20), (3, 30), (4, "N/A")])
+    with pytest.raises(IngestError) as info:
+        _ingestor(path, pool).run(lambda e: None)
+
+    assert info.value.rows == 0
+    assert "未创建表" in str(info.value)
+    assert not any(sql.startswith("RENAME") for sql in pool.statements)
+    assert pool.statements[-1].startswith("DROP TABLE IF EXISTS `orders__ingest_")
+
+
+def test_failed_append_reports_committed_rows(tmp_path):
+    pool = _Pool(existing=["id", "amount"])
+    path = _csv(tmp_path, [(1, 10), (2, 20), (3, 30), (4, "N/A")])
+    with pytest.raises(IngestError) as info:
+        _ingestor(path, pool).run(lambda e: None)
+
+    assert info.value.rows == 2
+    assert "已有 2 行" in str(info.value)
+    assert not any(sql.startswith(("CREATE", "DROP")) for sql in pool.statements)
+
+
+def test_cancelled_new_table_load_drops_staging(tmp_path):
+    pool = _Pool()
+    ingestor = _ingestor(_csv(tmp_path, [(1, 10), (2, 20), (3, 30)]), pool)
+
+    def emit(event):
+        if event["type"] == "progress":
+            ingestor.cancelled.set()
+
+    with pytest.raises(IngestError) as info:
+        ingestor.run(emit)
+
+    assert "导入已取消" in str(info.value)
+    assert pool.statements[-1].startswith("DROP TABLE IF EXISTS `orders__ingest_")
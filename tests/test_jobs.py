@@ -0,0 +1,139 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+
+import pytest
+
+from app.api.agent_pool import get_agent_pool
+from app.api.jobs import (
+    CANCELLED,
+    FINISHED,
+    QUEUED,
+    RUNNING,
+    SUCCEEDED,
+    JobManager,
+    JobQueueFull,
+)
+from app.config import JobSettings
+
+
+class _Agent:
+    def __init__(self, gate: asyncio.Event):
+        self.gate = gate
+        self.executed_sqls = []
+        self.cancelled = False
+
+    async def run(self, query: str) -> str:
+        try:
+            await self.gate.wait()
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        self.executed_sqls.append(f"SELECT '{query}'")
+        return f"answer to {query}"
+
+
+class _Pool:
+    """Stands in for AgentPool; runs block until ``gate`` is set."""
+
+    def __init__(self):
+        self.gate = asyncio.Event()
+        self.agents = []
+
+    @asynccontextmanager
+    async def lease(self):
+        agent = _Agent(self.gate)
+        self.agents.append(agent)
+        yield agent
+
+
+async def _wait_for(predicate, timeout: float = 2.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "condition not reached"
+        await asyncio.sleep(0.01)
+
+
+def _manager(pool, **settings) -> JobManager:
+    return JobManager(JobSettings(**settings), pool=pool)
+
+
+def test_submitted_job_succeeds():
+    async def main():
+        pool = _Pool()
+        manager = _manager(pool)
+        job = manager.submit("orders today")
+        assert job.status == QUEUED
+        pool.gate.set()
+        await _wait_for(lambda: job.status in FINISHED)
+        assert job.status == SUCCEEDED
+        assert job.result == "answer to orders today"
+        assert job.sql == ["SELECT 'orders today'"]
+        assert manager.stats()[SUCCEEDED] == 1
+        await manager.close()
+
+    asyncio.run(main())
+
+
+def test_cancel_queued_and_running_jobs():
+    async def main():
+        pool = _Pool()
+        manager = _manager(pool, workers=1)
+        running = manager.submit("first")
+        queued = manager.submit("second")
+        await _wait_for(lambda: running.status == RUNNING)
+
+        assert manager.cancel(queued.job_id).status == CANCELLED
+        assert manager.cancel(running.job_id).status == CANCELLED
+        await _wait_for(lambda: pool.agents and pool.agents[0].cancelled)
+
+        # The worker skips the cancelled job and stays available
+        pool.gate.set()
+        third = manager.submit("third")
+        await _wait_for(lambda: third.status in FINISHED)
+        assert third.status == SUCCEEDED
+        assert len(pool.agents) == 2
+        # Finished jobs are left as they are
+        assert manager.cancel(third.job_id).status == SUCCEEDED
+        await manager.close()
+
+    asyncio.run(main())
+
+
+def test_finished_jobs_are_purged_after_ttl():
+    async def main():
+        pool = _Pool()
+        pool.gate.set()
+        manager = _manager(pool, result_ttl=60)
+        job = manager.submit("old")
+        await _wait_for(lambda: job.status in FINISHED)
+        assert manager.get(job.job_id) is job
+
+        job.finished_at -= 61
+        assert manager.get(job.job_id) is None
+        assert manager.list() == []
+        await manager.close()
+
+    asyncio.run(main())
+
+
+def test_submit_rejected_when_queue_is_full():
+    async def main():
+        pool = _Pool()
+        manager = _manager(pool, workers=1, max_queued=1)
+        running = manager.submit("first")
+        await _wait_for(lambda: running.status == RUNNING)
+        manager.submit("second")
+        with pytest.raises(JobQueueFull):
+            manager.submit("third")
+        await manager.close()
+        assert {job.status for job in manager.list()} == {CANCELLED}
+
+    asyncio.run(main())
+
+
+def test_jobs_use_a_dedicated_pool_by_default():
+    dedicated = JobManager(JobSettings())
+    assert dedicated.pool is dedicated.pool
+    assert dedicated.pool is not get_agent_pool()
+    assert JobManager(JobSettings(dedicated_pool=False)).pool is get_agent_pool()
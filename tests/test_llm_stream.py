@@ -0,0 +1,107 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app import llm_limiter
+from app.config import LLMRateLimitSettings, LLMSettings
+from app.llm import LLM, TokenCounter
+from app.llm_limiter import RateLimiter
+from app.tokenizer import ENCODING_WEIGHTS, TokenEstimator
+
+
+def _chunk(content=None, usage=None):
+    choices = [SimpleNamespace(delta=SimpleNamespace(content=content))] if content else []
+    return SimpleNamespace(choices=choices, usage=usage)
+
+
+class _Stream:
+    def __init__(self, parts):
+        self.chunks = [_chunk(part) for part in parts] + [
+            _chunk(usage=SimpleNamespace(prompt_tokens=5, completion_tokens=len(parts)))
+        ]
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for chunk in self.chunks:
+            await asyncio.sleep(0)
+            yield chunk
+
+
+class _Completions:
+    def __init__(self):
+        self.calls = 0
+
+    async def create(self, **params):
+        self.calls += 1
+        assert params["stream"] is True
+        return _Stream(["Hello", ", ", "world"])
+
+
+@pytest.fixture
+def llm(monkeypatch):
+    monkeypatch.setattr(
+        llm_limiter,
+        "_rate_limiter",
+        RateLimiter(LLMRateLimitSettings(max_concurrent_requests=1, requests_per_minute=0)),
+    )
+    settings = LLMSettings(
+        model="gpt-4",
+        base_url="http://127.0.0.1:9/v1",
+        api_key="stub",
+        api_type="openai",
+        api_version="",
+    )
+    instance = LLM("test-stream", {"default": settings})
+    estimator = TokenEstimator("cl100k_base", ENCODING_WEIGHTS["cl100k_base"])
+    instance.tokenizer = estimator
+    instance.token_counter = TokenCounter(estimator)
+    completions = _Completions()
+    instance.client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    yield instance
+    LLM._instances.pop("test-stream", None)
+
+
+def test_streaming_ask_completes_with_one_slot(llm):
+    deltas = []
+
+    async def on_delta(delta):
+        deltas.append(delta)
+
+    async def ask():
+        return await asyncio.wait_for(
+            llm.ask([{"role": "user", "content": "hi"}], stream=True, on_delta=on_delta),
+            timeout=5,
+        )
+
+    assert asyncio.run(ask()) == "Hello, world"
+    assert deltas == ["Hello", ", ", "world"]
+    assert llm.client.chat.completions.calls == 1
+
+
+def test_streaming_ask_with_images_completes_with_one_slot(llm):
+    async def ask():
+        return await asyncio.wait_for(
+            llm.ask_with_images(
+                [{"role": "user", "content": "describe"}],
+                images=["http://example.com/a.png"],
+                stream=True,
+            ),
+            timeout=5,
+        )
+
+    llm.model = "gpt-4o"
+    assert asyncio.run(ask()) == "Hello, world"
+
+
+def test_ask_stream_holds_its_own_slot(llm):
+    async def collect():
+        return [
+            event
+            async for event in llm.ask_stream([{"role": "user", "content": "hi"}])
+        ]
+
+    events = asyncio.run(asyncio.wait_for(collect(), timeout=5))
+    assert events[-1] == {"type": "message", "content": "Hello, world"}
@@ -0,0 +1,69 @@
+import asyncio
+
+import anyio
+from mcp.shared.message import SessionMessage
+from mcp.types import (
+    JSONRPCMessage,
+    JSONRPCNotification,
+    JSONRPCRequest,
+    JSONRPCResponse,
+)
+
+from app.tool.mcp import MCPClientTool, tracked_session
+
+
+async def _cancel_second_call():
+    client_send, server_recv = anyio.create_memory_object_stream(16)
+    server_send, client_recv = anyio.create_memory_object_stream(16)
+    requests, notifications = [], []
+    call_sent = asyncio.Event()
+
+    async def server():
+        async for item in server_recv:
+            message = item.message.root
+            if isinstance(message, JSONRPCNotification):
+                notifications.append(message)
+                continue
+            requests.append(message)
+            if message.method == "tools/list":
+                result = {"tools": []}
+            elif message.method == "tools/call" and len(requests) == 1:
+                result = {"content": [{"type": "text", "text": "[]"}]}
+            else:
+                # The second call stands in for a long running query
+                call_sent.set()
+                continue
+            response = JSONRPCResponse(jsonrpc="2.0", id=message.id, result=result)
+            await server_send.send(SessionMessage(message=JSONRPCMessage(response)))
+
+    server_task = asyncio.create_task(server())
+    async with tracked_session(client_recv, client_send) as session:
+        tool = MCPClientTool(
+            name="mcp_db_execute_sql",
+            description="",
+            session=session,
+            original_name="execute_sql",
+        )
+        first = await tool.execute(query="SELECT 1")
+        assert first.error is None
+
+        call = asyncio.create_task(tool.execute(query="SELECT SLEEP(60)"))
+        await asyncio.wait_for(call_sent.wait(), timeout=5)
+        call.cancel()
+        try:
+            await call
+        except asyncio.CancelledError:
+            pass
+    server_task.cancel()
+    return requests, notifications
+
+
+def test_cancelled_execute_sql_notifies_the_server_with_its_request_id():
+    requests, notifications = asyncio.run(_cancel_second_call())
+
+    calls = [r for r in requests if isinstance(r, JSONRPCRequest) and r.method == "tools/call"]
+    assert len(calls) == 2
+    cancelled = [n for n in notifications if n.method == "notifications/cancelled"]
+    assert len(cancelled) == 1
+    assert cancelled[0].params["requestId"] == calls[1].id
+    assert calls[1].id != calls[0].id
@@ -0,0 +1,133 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from mysql_mcp_server import server
+
+
+def test_concurrent_tool_calls_are_capped_at_the_pool_size(monkeypatch):
+    active = peak = 0
+    lock = threading.Lock()
+
+    def call_tool_sync(name, arguments, running=None):
+        nonlocal active, peak
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        time.sleep(0.02)
+        with lock:
+            active -= 1
+        return []
+
+    monkeypatch.setattr(server, "_call_tool_sync", call_tool_sync)
+
+    async def run():
+        # More threads than connections, so only the semaphore limits the calls
+        asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(64))
+        monkeypatch.setattr(server, "_db_slots", asyncio.Semaphore(server.POOL_SIZE))
+        await asyncio.gather(
+            *(server.call_tool("execute_sql", {"query": "SELECT 1"}) for _ in range(3 * server.POOL_SIZE))
+        )
+
+    asyncio.run(run())
+    assert peak == server.POOL_SIZE
+
+
+def test_pool_is_created_once_across_threads(monkeypatch):
+    created = []
+
+    class _Pool:
+        def __init__(self, config):
+            time.sleep(0.05)
+            created.append(self)
+
+        def get_connection(self):
+            return object()
+
+    monkeypatch.setattr(server, "db_pool", None)
+    monkeypatch.setattr(server, "DatabasePool", _Pool)
+    monkeypatch.setattr(server, "get_db_config", lambda: {"database": "test"})
+
+    threads = [threading.Thread(target=server.get_db_connection) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(created) == 1
+
+
+class _KillConnection:
+    def __init__(self, statements):
+        self.statements = statements
+        self.closed = False
+
+    def cursor(self):
+        conn = self
+
+        class _Cursor:
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                return False
+
+            def execute(self, sql):
+                conn.statements.append(sql)
+
+        return _Cursor()
+
+    def close(self):
+        self.closed = True
+
+
+def _record_kills(monkeypatch):
+    statements = []
+
+    class _ExhaustedPool:
+        def get_connection(self):
+            raise AssertionError("KILL must not wait for a pooled connection")
+
+    monkeypatch.setattr(server, "db_pool", _ExhaustedPool())
+    monkeypatch.setattr(server, "get_db_config", lambda: {"database": "test"})
+    monkeypatch.setattr(server, "connect", lambda **config: _KillConnection(statements))
+    return statements
+
+
+def test_cancelled_call_kills_its_query_on_a_dedicated_connection(monkeypatch):
+    statements = _record_kills(monkeypatch)
+    started = threading.Event()
+    release = threading.Event()
+
+    def call_tool_sync(name, arguments, running=None):
+        running.start(42)
+        started.set()
+        release.wait(5)
+        running.finish()
+        return []
+
+    monkeypatch.setattr(server, "_call_tool_sync", call_tool_sync)
+
+    async def run():
+        monkeypatch.setattr(server, "_db_slots", asyncio.Semaphore(server.POOL_SIZE))
+        task = asyncio.create_task(server.call_tool("execute_sql", {"query": "SELECT SLEEP(60)"}))
+        await asyncio.to_thread(started.wait, 5)
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        finally:
+            release.set()
+
+    asyncio.run(run())
+    assert statements == ["KILL QUERY 42"]
+
+
+def test_finished_query_is_not_killed(monkeypatch):
+    statements = _record_kills(monkeypatch)
+    running = server.RunningQuery()
+    running.start(42)
+    running.finish()
+    running.kill()
+    assert statements == []
@@ -0,0 +1,128 @@
+from app.llm import LLM, TokenCounter
+from app.schema import Function, Memory, Message, Role, ToolCall
+from app.tokenizer import ENCODING_WEIGHTS, TokenEstimator
+
+
+def count(messages):
+    """One token per character of content, plus one per message."""
+    return sum(len(m.get("content") or "") + 1 for m in messages)
+
+
+def _call(call_id):
+    return ToolCall(id=call_id, function=Function(name="execute_sql", arguments="{}"))
+
+
+def _turn(n, output_chars=400):
+    """An assistant tool call followed by its result."""
+    return [
+        Message(role=Role.ASSISTANT, content="", tool_calls=[_call(f"call_{n}")]),
+        Message.tool_message("x" * output_chars, name="execute_sql", tool_call_id=f"call_{n}"),
+    ]
+
+
+def _history(turns=6):
+    messages = [Message.system_message("rules"), Message.user_message("question")]
+    for n in range(turns):
+        messages += _turn(n)
+    return Memory(messages=messages)
+
+
+def _assert_tool_results_follow_their_calls(messages):
+    open_calls = set()
+    for msg in messages:
+        if msg.role == Role.ASSISTANT and msg.tool_calls:
+            open_calls = {call.id for call in msg.tool_calls}
+        elif msg.role == Role.TOOL:
+            assert msg.tool_call_id in open_calls
+        else:
+            open_calls = set()
+
+
+def test_compact_under_budget_changes_nothing():
+    memory = _history()
+    before = [msg.content for msg in memory.messages]
+    assert memory.compact(token_budget=10_000, count=count) == []
+    assert [msg.content for msg in memory.messages] == before
+
+
+def test_compact_prunes_old_tool_outputs_first():
+    memory = _history()
+    total = memory.total_tokens(count)
+    # Each pruned output saves about 150 tokens; the two oldest are enough
+    dropped = memory.compact(token_budget=total - 250, count=count, keep_recent=4)
+
+    assert dropped == []
+    assert len(memory.messages) == 14
+    tool_outputs = [msg.content for msg in memory.messages if msg.role == Role.TOOL]
+    assert all("pruned" in output for output in tool_outputs[:2])
+    # The last keep_recent groups are untouched
+    assert all(output == "x" * 400 for output in tool_outputs[-4:])
+    assert memory.total_tokens(count) <= total - 250
+
+
+def test_compact_drops_whole_groups_and_keeps_pinned_messages():
+    memory = _history()
+    dropped = memory.compact(token_budget=600, count=count, keep_recent=2)
+
+    assert dropped
+    # Calls and their results are dropped together
+    _assert_tool_results_follow_their_calls(dropped)
+    _assert_tool_results_follow_their_calls(memory.messages)
+    assert memory.messages[0].content == "rules"
+    assert memory.messages[1].content == "question"
+    kept_calls = [msg.tool_call_id for msg in memory.messages if msg.role == Role.TOOL]
+    assert kept_calls[-2:] == ["call_4", "call_5"]
+
+
+def test_compact_keeps_the_latest_user_request():
+    memory = _history(turns=2)
+    memory.messages.append(Message.user_message("follow-up " * 50))
+    memory.messages += _turn(9)
+    memory.compact(token_budget=1, count=count, keep_recent=1)
+
+    assert any(msg.content == "follow-up " * 50 for msg in memory.messages)
+    assert memory.messages[0].content == "rules"
+    _assert_tool_results_follow_their_calls(memory.messages)
+
+
+def test_token_cost_is_recomputed_when_content_changes():
+    msg = Message.user_message("abc")
+    assert Memory.token_cost(msg, count) == 4
+    msg.content = "abcdef"
+    assert Memory.token_cost(msg, count) == 7
+
+
+def test_cached_cost_is_tied_to_the_counter():
+    msg = Message.user_message("abc")
+    assert Memory.token_cost(msg, count) == 4
+    assert Memory.token_cost(msg, lambda messages: 100) == 100
+
+
+class _CountingTokenizer:
+    def __init__(self):
+        self.calls = 0
+        self.estimator = TokenEstimator("cl100k_base", ENCODING_WEIGHTS["cl100k_base"])
+
+    def count(self, text):
+        self.calls += 1
+        return self.estimator.count(text)
+
+
+def test_token_counter_reuses_message_costs():
+    tokenizer = _CountingTokenizer()
+    counter = TokenCounter(tokenizer)
+    memory = Memory()
+    memory.add_messages([Message.system_message("rules"), *_turn(1), *_turn(2)])
+    expected = counter.count_message_tokens(LLM.format_messages(memory.messages))
+
+    assert counter.count_message_tokens(memory.messages) == expected
+    calls = tokenizer.calls
+    assert counter.count_message_tokens(memory.messages) == expected
+    assert tokenizer.calls == calls
+    # Compaction with the same counter sees the costs cached by request counting
+    memory.total_tokens(counter.count_message_tokens)
+    assert tokenizer.calls == calls
+
+    memory.add_message(Message.user_message("next question"))
+    counter.count_message_tokens(memory.messages)
+    assert tokenizer.calls > calls
@@ -0,0 +1,72 @@
+import asyncio
+import json
+
+import pytest
+
+from app.agent.enhanced_database_query import EnhancedDatabaseQueryAgent
+from app.cache.query_cache import QueryCache
+from app.config import QueryCacheSettings
+
+
+HIGHEST = "统计2024年每个城市的订单总金额，并列出金额最高的前五个城市及其订单数量"
+LOWEST = "统计2024年每个城市的订单总金额，并列出金额最低的前五个城市及其订单数量"
+SQL = "SELECT city, SUM(amount) AS total FROM orders GROUP BY city ORDER BY total DESC LIMIT 5"
+OUTPUT = json.dumps({"status": "OK", "data": [{"city": "北京", "total": 10}]})
+
+
+@pytest.fixture
+def cache():
+    return QueryCache(QueryCacheSettings(enabled=True, persist_path=""))
+
+
+@pytest.fixture
+def agent(cache, monkeypatch):
+    agent = EnhancedDatabaseQueryAgent(query_cache=cache, fast_path=True)
+    cache.store(
+        question=HIGHEST,
+        schema_version=agent._schema_version(),
+        sqls=[SQL],
+        answer="金额最高的是北京",
+        result_digest=agent._digest_results([OUTPUT]),
+    )
+    executed = []
+
+    async def execute(tool_name, arguments):
+        executed.append(arguments["query"])
+        return OUTPUT
+
+    monkeypatch.setattr(agent, "_execute_mcp_tool", execute)
+    agent.executed = executed
+    return agent
+
+
+def test_similar_wording_with_opposite_meaning_is_a_near_match(cache):
+    cache.store(question=HIGHEST, schema_version="v", sqls=[SQL], answer="A")
+    match = cache.lookup(LOWEST, "v")
+    assert match is not None and not match.exact
+
+
+def test_exact_hit_reuses_the_cached_answer(agent):
+    assert asyncio.run(agent._run_query(HIGHEST)) == "金额最高的是北京"
+    assert agent.executed == [SQL]
+
+
+def test_near_hit_is_only_a_hint_for_the_fast_path(agent, monkeypatch):
+    seen = {}
+
+    async def fast_path(request, reference=None):
+        seen["reference"] = reference
+        return "金额最低的是拉萨"
+
+    monkeypatch.setattr(agent, "_run_fast_path", fast_path)
+    assert asyncio.run(agent._run_query(LOWEST)) == "金额最低的是拉萨"
+    # The cached SQL was neither re-run nor its answer returned
+    assert agent.executed == []
+    assert seen["reference"].question == HIGHEST
+
+
+def test_reference_is_included_in_the_fast_path_prompt(agent):
+    entry = agent.query_cache.lookup(LOWEST, agent._schema_version()).entry
+    text = agent._format_reference(entry)
+    assert HIGHEST in text and SQL in text
+    assert agent._format_reference(None) == "无"
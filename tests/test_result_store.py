@@ -0,0 +1,32 @@
+import json
+
+from app.tool.result_store import build_digest
+
+
+def test_short_text_is_returned_unchanged():
+    raw = "plain text result"
+    assert build_digest(raw, "r1", text_chars=len(raw)) == raw
+
+
+def test_long_text_keeps_head_and_tail_without_overlap():
+    raw = "".join(chr(ord("a") + i % 26) for i in range(101))
+    digest = build_digest(raw, "r1", text_chars=20)
+    head, marker, tail = digest.split("\n")
+    assert head == raw[:10]
+    assert tail == raw[-10:]
+    assert "81 characters omitted" in marker
+    assert "`r1`" in marker
+
+
+def test_just_over_the_limit_counts_omitted_characters():
+    digest = build_digest("x" * 21, "r1", text_chars=20)
+    assert "1 characters omitted" in digest
+
+
+def test_rows_are_summarised():
+    rows = [{"id": i, "name": f"n{i}"} for i in range(20)]
+    digest = json.loads(build_digest(json.dumps(rows), "r1", head_rows=2, tail_rows=2))
+    assert digest["rowCount"] == 20
+    assert [r["id"] for r in digest["head"]] == [0, 1]
+    assert [r["id"] for r in digest["tail"]] == [18, 19]
+    assert digest["columns"][0]["max"] == 19
@@ -0,0 +1,66 @@
+import asyncio
+
+import pytest
+
+from app.config import LLMRetrySettings
+from app.exceptions import DeadlineExceeded
+from app.retry import RetryPolicy, _budget, query_budget
+
+
+def _policy() -> RetryPolicy:
+    return RetryPolicy(LLMRetrySettings(base_delay=0.0, max_delay=0.0))
+
+
+def test_time_outside_llm_calls_is_not_charged():
+    async def answer():
+        await asyncio.sleep(0.01)
+        return "ok"
+
+    async def main():
+        policy = _policy()
+        with query_budget(0.2):
+            assert await policy.call(answer) == "ok"
+            # A slow tool call between LLM calls does not use up the budget
+            await asyncio.sleep(0.3)
+            assert await policy.call(answer) == "ok"
+            assert 0.1 < _budget.get().remaining() < 0.19
+
+    asyncio.run(main())
+
+
+def test_llm_time_exhausts_the_budget():
+    calls = 0
+
+    async def flaky():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        raise ConnectionError("reset")
+
+    async def main():
+        policy = _policy()
+        with query_budget(0.125):
+            with pytest.raises(DeadlineExceeded):
+                await policy.call(flaky)
+            with pytest.raises(DeadlineExceeded):
+                await policy.call(flaky)
+
+    asyncio.run(main())
+    # Three attempts fit in the budget; the second call has none left
+    assert calls == 3
+
+
+def test_nested_budget_never_extends_the_outer_one():
+    async def answer():
+        await asyncio.sleep(0.05)
+        return "ok"
+
+    async def main():
+        policy = _policy()
+        with query_budget(0.1):
+            with query_budget(10):
+                await policy.call(answer)
+                assert _budget.get().remaining() < 0.06
+            assert _budget.get().remaining() < 0.06
+
+    asyncio.run(main())
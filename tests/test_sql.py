@@ -0,0 +1,52 @@
+import pytest
+
+from app.sql import is_read_only_sql, strip_sql_comments
+
+
+@pytest.mark.parametrize(
+    "sql",
+    [
+        "SELECT * FROM orders",
+        "  select id from users;  ",
+        "WITH t AS (SELECT 1 AS a) SELECT a FROM t",
+        "SHOW TABLES",
+        "DESCRIBE orders",
+        "DESC orders",
+        "EXPLAIN SELECT * FROM orders",
+        "/* report */ SELECT 1",
+        "-- total\nSELECT SUM(amount) FROM orders",
+        "SELECT INSERT('abc', 1, 1, 'x')",
+        "SELECT REPLACE(name, 'a', 'b') FROM users",
+    ],
+)
+def test_read_only_statements_are_accepted(sql):
+    assert is_read_only_sql(sql)
+
+
+@pytest.mark.parametrize(
+    "sql",
+    [
+        "",
+        "   ",
+        "-- only a comment",
+        "UPDATE orders SET amount = 0",
+        "DELETE FROM orders",
+        "INSERT INTO orders VALUES (1)",
+        "REPLACE INTO orders VALUES (1)",
+        "DROP TABLE orders",
+        "SELECT 1; DROP TABLE orders",
+        "WITH t AS (SELECT 1) DELETE FROM orders",
+        "SELECT * FROM orders INTO OUTFILE '/tmp/orders.csv'",
+        "SELECT * FROM orders INTO DUMPFILE '/tmp/x'",
+        "SELECT * FROM orders FOR UPDATE",
+        "SELECT * FROM orders LOCK IN SHARE MODE",
+        "/* SELECT */ UPDATE orders SET amount = 0",
+    ],
+)
+def test_write_or_multi_statements_are_rejected(sql):
+    assert not is_read_only_sql(sql)
+
+
+def test_strip_sql_comments():
+    assert strip_sql_comments("/* a */ SELECT 1 -- b\n; ") == "SELECT 1"
+    assert strip_sql_comments(None) == ""
@@ -0,0 +1,90 @@
+import os
+
+import pytest
+
+from app import tokenizer
+from app.config import TokenizerSettings
+from app.tokenizer import (
+    ENCODING_WEIGHTS,
+    EncodingUnavailable,
+    ExactTokenizer,
+    TokenEstimator,
+    get_tokenizer,
+    text_features,
+)
+
+
+@pytest.fixture
+def offline(monkeypatch):
+    """tiktoken cannot fetch any encoding."""
+    calls = []
+
+    def get_encoding(name):
+        calls.append(name)
+        raise ConnectionError("no network")
+
+    monkeypatch.setattr(tokenizer.tiktoken, "get_encoding", get_encoding)
+    monkeypatch.setattr(tokenizer, "_encodings", {})
+    monkeypatch.setattr(tokenizer, "_failed", {})
+    return calls
+
+
+def test_counts_fall_back_to_the_estimator_when_offline(offline):
+    exact = ExactTokenizer("cl100k_base")
+    estimator = TokenEstimator("cl100k_base", ENCODING_WEIGHTS["cl100k_base"])
+    text = "SELECT city, SUM(amount) FROM orders WHERE 城市 = '北京'"
+
+    assert exact.count(text) == estimator.count(text)
+    assert ExactTokenizer("cl100k_base").count(text) == estimator.count(text)
+    # The failed load is not retried on every count
+    assert offline == ["cl100k_base"]
+
+
+def test_strict_tokenizer_raises_when_offline(offline):
+    with pytest.raises(EncodingUnavailable):
+        ExactTokenizer("cl100k_base", fallback=False).count("hello")
+
+
+def test_counting_does_not_touch_the_environment(offline, monkeypatch):
+    monkeypatch.delenv("TIKTOKEN_CACHE_DIR", raising=False)
+    ExactTokenizer("cl100k_base").count("hello")
+    assert "TIKTOKEN_CACHE_DIR" not in os.environ
+
+
+def test_configure_cache_dir_respects_an_explicit_setting(monkeypatch, tmp_path):
+    monkeypatch.setenv("TIKTOKEN_CACHE_DIR", str(tmp_path))
+    tokenizer.configure_cache_dir(TokenizerSettings(cache_dir="cache/other"))
+    assert os.environ["TIKTOKEN_CACHE_DIR"] == str(tmp_path)
+
+
+def test_text_features():
+    assert text_features("") == (0, 0, 0, 0)
+    assert text_features("hello world") == (2, 0, 0, 0)
+    assert text_features("a1, b2.") == (2, 2, 2, 0)
+    assert text_features("北京上海") == (0, 0, 0, 4)
+
+
+def test_calibrate_recovers_weights():
+    weights = (1.0, 0.5, 0.75, 1.25)
+
+    class _Exact:
+        name = "synthetic"
+
+        def count(self, text):
+            return sum(w * f for w, f in zip(weights, text_features(text)))
+
+    samples = ["hello world", "12345 678", "a, b; c.", "北京上海广州", "SELECT 1, 2 FROM 表"]
+    estimator = TokenEstimator.calibrate(_Exact(), samples)
+    assert estimator.weights == pytest.approx(weights, abs=1e-3)
+
+
+def test_estimator_rejects_wrong_weight_count():
+    with pytest.raises(ValueError):
+        TokenEstimator("cl100k_base", [1.0, 2.0])
+
+
+def test_get_tokenizer_modes():
+    estimate = TokenizerSettings(mode="estimate", weights={"my-model": [1, 1, 1, 1]})
+    assert isinstance(get_tokenizer("gpt-4", TokenizerSettings(mode="exact")), ExactTokenizer)
+    assert get_tokenizer("my-model", estimate).weights == (1, 1, 1, 1)
+    assert get_tokenizer("gpt-4", estimate).weights == ENCODING_WEIGHTS["cl100k_base"]
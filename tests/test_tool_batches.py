@@ -0,0 +1,139 @@
+import asyncio
+import json
+
+import pytest
+
+from app.agent.toolcall import ToolCallAgent
+from app.config import LLMSettings
+from app.llm import LLM
+from app.schema import Function, ToolCall
+from app.tool import Terminate, ToolCollection
+from app.tool.base import BaseTool
+from app.tool.mcp import MCPClientTool
+
+
+class _Lookup(BaseTool):
+    """Parallel-safe tool that finishes in reverse order of its delay."""
+
+    name: str = "lookup"
+    description: str = "lookup"
+    parallel_safe: bool = True
+
+    async def execute(self, key: str, delay: float = 0.0) -> str:
+        await asyncio.sleep(delay)
+        return f"value of {key}"
+
+
+class _Write(BaseTool):
+    name: str = "write"
+    description: str = "write"
+
+    async def execute(self, key: str) -> str:
+        return f"wrote {key}"
+
+
+def _call(call_id, name, **args):
+    return ToolCall(id=call_id, function=Function(name=name, arguments=json.dumps(args)))
+
+
+@pytest.fixture
+def agent():
+    settings = LLMSettings(
+        model="gpt-4",
+        base_url="http://127.0.0.1:9/v1",
+        api_key="stub",
+        api_type="openai",
+        api_version="",
+    )
+    sql_tool = MCPClientTool(
+        name="mcp_db_execute_sql", description="", original_name="execute_sql"
+    )
+    yield ToolCallAgent(
+        llm=LLM("test-batches", {"default": settings}),
+        available_tools=ToolCollection(_Lookup(), _Write(), sql_tool, Terminate()),
+        max_concurrent_tools=4,
+        observation_token_budget=0,
+    )
+    LLM._instances.pop("test-batches", None)
+
+
+def _ids(batches):
+    return [[call.id for call in batch] for batch in batches]
+
+
+def test_execute_sql_is_parallel_safe_only_for_reads():
+    tool = MCPClientTool(name="t", description="", original_name="execute_sql")
+    assert tool.is_parallel_safe(query="SELECT * FROM orders")
+    assert not tool.is_parallel_safe(query="UPDATE orders SET amount = 0")
+    assert not tool.is_parallel_safe()
+    metadata = MCPClientTool(name="t", description="", original_name="list_tables")
+    assert metadata.is_parallel_safe()
+    other = MCPClientTool(name="t", description="", original_name="create_table")
+    assert not other.is_parallel_safe()
+
+
+def test_consecutive_safe_calls_are_grouped(agent):
+    calls = [
+        _call("1", "lookup", key="a"),
+        _call("2", "mcp_db_execute_sql", query="SELECT 1"),
+        _call("3", "write", key="b"),
+        _call("4", "lookup", key="c"),
+        _call("5", "lookup", key="d"),
+        _call("6", "mcp_db_execute_sql", query="DELETE FROM orders"),
+        _call("7", "lookup", key="e"),
+    ]
+    assert _ids(agent._plan_tool_batches(calls)) == [
+        ["1", "2"],
+        ["3"],
+        ["4", "5"],
+        ["6"],
+        ["7"],
+    ]
+
+
+def test_special_unknown_and_malformed_calls_run_alone(agent):
+    bad_json = ToolCall(id="3", function=Function(name="lookup", arguments="{"))
+    calls = [
+        _call("1", "lookup", key="a"),
+        _call("2", "terminate", status="success"),
+        bad_json,
+        _call("4", "missing"),
+        _call("5", "lookup", key="b"),
+    ]
+    assert _ids(agent._plan_tool_batches(calls)) == [["1"], ["2"], ["3"], ["4"], ["5"]]
+
+
+def test_no_grouping_when_concurrency_is_disabled(agent):
+    agent.max_concurrent_tools = 1
+    calls = [_call(str(i), "lookup", key=str(i)) for i in range(3)]
+    assert _ids(agent._plan_tool_batches(calls)) == [["0"], ["1"], ["2"]]
+
+
+def test_results_are_appended_in_call_order(agent):
+    # The first call finishes last; its result must still come first
+    agent.tool_calls = [
+        _call("1", "lookup", key="a", delay=0.05),
+        _call("2", "lookup", key="b", delay=0.0),
+        _call("3", "write", key="c"),
+        _call("4", "lookup", key="d", delay=0.02),
+        _call("5", "lookup", key="e", delay=0.0),
+    ]
+    result = asyncio.run(agent.act())
+
+    tool_messages = [msg for msg in agent.memory.messages if msg.role == "tool"]
+    assert [msg.tool_call_id for msg in tool_messages] == ["1", "2", "3", "4", "5"]
+    assert "value of a" in tool_messages[0].content
+    assert "wrote c" in tool_messages[2].content
+    assert result.index("value of a") < result.index("value of b") < result.index("wrote c")
+
+
+def test_safe_calls_in_a_batch_overlap(agent):
+    agent.tool_calls = [_call(str(i), "lookup", key=str(i), delay=0.2) for i in range(4)]
+
+    async def timed():
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        await agent.act()
+        return loop.time() - start
+
+    assert asyncio.run(timed()) < 0.6